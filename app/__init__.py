@@ -48,24 +48,26 @@ def create_app(config_name=None):
     app.logger.info('블루프린트를 등록합니다.')
     register_blueprints(app)
     app.logger.info('모든 블루프린트가 등록되었습니다.')
+
+    # flask CLI 명령 (flask vectors build)
+    from app.cli import register_cli, is_vectors_command
+    register_cli(app)
     
     # chat_api_bp의 socketio 초기화 (블루프린트 등록 후)
     from app.routes.chat.chat_api import init_socketio
     init_socketio(socketio, app)
     app.logger.info('채팅 API SocketIO가 초기화되었습니다.')
     
-    # 벡터 DB 초기화 (환경 변수로 제어)
+    # 벡터 DB 준비 (환경 변수로 제어) - 백그라운드에서 진행하여 앱 기동을 막지 않음
+    # flask vectors 명령으로 불린 경우에는 건너뜀 - 명령이 직접 빌드 (flask run은 기동 시 준비)
     skip_vector_init = os.getenv('SKIP_VECTOR_INIT', 'false').lower() == 'true'
-    if not skip_vector_init:
-        app.logger.info('벡터 DB를 초기화합니다.')
-        try:
-            from app.services.dailycare.vectorstore_service import VectorStoreService
-            vector_service = VectorStoreService()
-            vector_service.initialize_vector_db()
-            app.logger.info('벡터 DB 초기화가 완료되었습니다.')
-        except Exception as e:
-            app.logger.error(f'벡터 DB 초기화 중 오류 발생: {e}')
-            app.logger.warning('벡터 DB 없이 애플리케이션을 계속 실행합니다.')
+    vectors_command = is_vectors_command()
+    if not skip_vector_init and not vectors_command:
+        app.logger.info('벡터 DB 준비를 백그라운드에서 시작합니다.')
+        from app.services.dailycare.vectorstore_registry import VectorStoreRegistry
+        VectorStoreRegistry.start_warmup()
+    elif vectors_command:
+        app.logger.info('flask vectors 명령 실행 - 벡터 DB 백그라운드 준비를 시작하지 않습니다.')
     else:
         app.logger.info('SKIP_VECTOR_INIT=true 설정으로 벡터 DB 초기화를 건너뜁니다.')
 
@@ -83,7 +85,12 @@ def create_app(config_name=None):
             from app.models import db
             from sqlalchemy import text
             db.session.execute(text('SELECT 1'))
-            return {'status': 'healthy', 'database': 'connected'}, 200
+            from app.services.dailycare.vectorstore_registry import VectorStoreRegistry
+            from app.services.dailycare.stage_timings import care_chatbot_latency
+            return {
+                'status': 'healthy', 'database': 'connected', 'vector_store': VectorStoreRegistry.status(),
+                'care_chatbot_latency_ms': care_chatbot_latency.snapshot(),
+            }, 200
         except Exception as e:
             app.logger.error(f'헬스체크 실패: {e}')
             return {'status': 'unhealthy', 'error': str(e)}, 503
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+
+import click
+from flask.cli import AppGroup
+
+from app.services.dailycare.embedding_pipeline import IngestionResult
+
+
+vectors_cli = AppGroup('vectors', help='벡터 DB 관리')
+
+
+def register_cli(app):
+    app.cli.add_command(vectors_cli)
+
+
+def is_vectors_command(argv=None) -> bool:
+    """
+    `flask vectors ...`로 실행 중인지
+    - 앱은 명령 실행 전에 만들어지므로 명령 인자로 판단 (flask run 등 다른 명령은 해당 없음)
+    """
+    argv = sys.argv if argv is None else argv
+    return os.getenv('FLASK_RUN_FROM_CLI') == 'true' and vectors_cli.name in argv[1:]
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class _BuildProgress:
+    """배치 저장마다 처리량(청크/초)과 남은 시간 출력"""
+
+    def __init__(self, collection_type: str, expected_chunks: int):
+        self.collection_type = collection_type
+        self.expected_chunks = expected_chunks
+        self.started = time.monotonic()
+
+    def __call__(self, result: IngestionResult):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        rate = result.written_chunks / elapsed
+        remaining = max(self.expected_chunks - result.written_chunks, 0)
+        eta = _format_seconds(remaining / rate) if rate else "--:--"
+        click.echo(
+            f"  {self.collection_type}: {result.written_chunks}/{self.expected_chunks}개 청크 "
+            f"({rate:.1f}개/초, 남은 시간 {eta})"
+        )
+
+
+@vectors_cli.command('build')
+@click.option('--collection', 'collections', multiple=True, help='대상 콜렉션 (생략 시 전체, 여러 번 지정 가능)')
+@click.option('--dry-run', is_flag=True, help='임베딩할 청크/토큰 수만 출력')
+def build_command(collections, dry_run):
+    """
+    매니페스트 기준 증분 색인 (중단되면 다시 실행해 이어서 진행)
+    동기화 후 콜렉션 문서 수가 파싱된 청크 수와 다르면 종료 코드 1
+    """
+    from app.services.dailycare.vectorstore_service import VectorStoreService
+
+    service = VectorStoreService(parallel_parse=True)
+    unknown = [name for name in collections if name not in service.collections]
+    if unknown:
+        raise click.BadParameter(f"알 수 없는 콜렉션: {', '.join(unknown)} (가능: {', '.join(service.collections)})")
+
+    failed = []
+    for collection_type in collections or list(service.collections):
+        plan = service.plan_collection(collection_type)
+        click.echo(
+            f"{collection_type} ({plan['collection']}): 파일 {plan['files']}개, 청크 {plan['total_chunks']}개 중 "
+            f"임베딩 {plan['embed_chunks']}개 (약 {plan['embed_tokens']} 토큰), 이어받기 {plan['resumed']}개"
+        )
+        if dry_run:
+            continue
+
+        started = time.monotonic()
+        store = service.sync_collection(collection_type, progress=_BuildProgress(collection_type, plan['embed_chunks']))
+        count = store.count() if store is not None else 0
+        if count != plan['total_chunks']:
+            click.echo(f"  {collection_type}: 문서 수 불일치 (저장 {count}개, 파싱 {plan['total_chunks']}개)", err=True)
+            failed.append(collection_type)
+        else:
+            click.echo(f"  {collection_type}: 완료 (문서 {count}개, {_format_seconds(time.monotonic() - started)})")
+
+    if failed:
+        sys.exit(1)
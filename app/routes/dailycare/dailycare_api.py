@@ -9,6 +9,7 @@ from app.models.dailycare.medicalCare.vaccination import Vaccination
 from app.models.dailycare.medicalCare.medication import Medication
 from app.models import db
 from app.services.dailycare.care_chatbot_service import CareChatbotService
+from app.services.dailycare.medication_index import get_medication_index
 
 import logging
 from datetime import datetime,timedelta
@@ -226,6 +227,36 @@ def delete_allergy(allergy_id):
     db.session.commit()
     return jsonify({"message": "삭제완료"}), 200
 
+# 알러지 - 의약품 성분 교차 확인
+# ?products=제품명,제품명 (없으면 복용 중인 약) / ?q=질문 (언급된 제품 추가) / ?indication=효능 (해당 효능 제품 중 안전한 제품)
+@dailycare_api_bp.route('/allergy-check/<int:pet_id>', methods=['GET'])
+def check_allergy_medications(pet_id):
+    allergens = [a.allergen for a in MedicalCareService.get_allergy_pet(pet_id) if a.allergen]
+    index = get_medication_index()
+
+    names = [name.strip() for name in request.args.get('products', '').split(',') if name.strip()]
+    if not names:
+        names = [m.medication_name for m in MedicalCareService.get_medications_by_pet(pet_id)]
+    product_ids = index.resolve_products(names + [request.args.get('q', '')])
+
+    indication = request.args.get('indication', '').strip()
+    indication_ids = index.products_for_indication(indication) if indication else set()
+
+    conflicts = index.check_allergies(allergens, product_ids | indication_ids)
+    conflict_ids = {c.document_id for c in conflicts}
+    # 성분 표기가 없는 제품은 안전하다고 판단할 수 없음
+    candidates = indication_ids - conflict_ids
+    verified_ids = {i for i in candidates if index.products[i].ingredients}
+    return jsonify({
+        "pet_id": pet_id,
+        "allergens": allergens,
+        "checked_products": sorted({index.products[i].product_name for i in product_ids}),
+        "conflicts": [c.to_dict() for c in conflicts if c.document_id in product_ids],
+        "indication": indication or None,
+        "safe_products": sorted({index.products[i].product_name for i in verified_ids}),
+        "unverified_products": sorted({index.products[i].product_name for i in candidates - verified_ids}),
+    }), 200
+
 #----------------------------------------------------------------------
 
 # 질병 이력 생성
@@ -0,0 +1,85 @@
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class AhoCorasick:
+    """
+    다중 패턴 문자열 매칭 (Aho-Corasick)
+    - add()로 패턴을 모두 넣고 build() 후 검색 (텍스트 길이 + 매칭 수에 비례)
+    - 같은 패턴에 값을 여러 번 넣으면 모두 반환
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 노드에서 끝나는 (패턴 길이, 값) / build() 후 실패 링크의 출력까지 합친 목록
+        self._outputs: List[List[Tuple[int, Any]]] = [[]]
+        self._matches: List[List[Tuple[int, Any]]] = [[]]
+        self._built = False
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def add(self, pattern: str, value: Any = None):
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = nxt
+        self._outputs[node].append((len(pattern), pattern if value is None else value))
+        self._built = False
+
+    def build(self) -> "AhoCorasick":
+        self._matches = [list(outputs) for outputs in self._outputs]
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._matches[child] = self._outputs[child] + self._matches[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """(시작, 끝, 값) - 끝 위치 순, 겹치는 매칭 모두 포함"""
+        if not self._built:
+            self.build()
+        node = 0
+        for end, ch in enumerate(text, start=1):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._matches[node]:
+                yield end - length, end, value
+
+    def longest_matches(
+        self, text: str, accept: Optional[Callable[[int, int], bool]] = None,
+    ) -> List[Tuple[int, int, List[Any]]]:
+        """
+        겹치지 않는 매칭 (왼쪽 우선, 같은 위치면 가장 긴 패턴) - (시작, 끝, 값 목록)
+        accept: (시작, 끝)을 받아 후보로 쓸지 판단 (단어 경계 확인 등)
+        """
+        spans: Dict[Tuple[int, int], List[Any]] = {}
+        for start, end, value in self.iter_matches(text):
+            if accept is None or accept(start, end):
+                spans.setdefault((start, end), []).append(value)
+
+        selected = []
+        covered = 0
+        for (start, end) in sorted(spans, key=lambda span: (span[0], -span[1])):
+            if start >= covered:
+                selected.append((start, end, spans[(start, end)]))
+                covered = end
+        return selected
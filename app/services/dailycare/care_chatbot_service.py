@@ -8,10 +8,16 @@ from app.services.dailycare.healthcare_service import HealthCareService
 from app.services.dailycare.medicalcare_service import MedicalCareService
 from app.services.dailycare.openAI_service import get_gpt_response
 from app.services.dailycare.vectorstore_service import VectorStoreService
+from app.services.dailycare.vectorstore_registry import VectorStoreRegistry
+from app.services.dailycare.query_analyzer import QueryAnalysis, analyze_query
+from app.services.dailycare.medication_index import get_medication_index
+from app.services.dailycare.stage_timings import StageTimings, care_chatbot_latency
+from concurrent.futures import ThreadPoolExecutor
 from flask import current_app as app
 from langchain_core.documents import Document
 from config import Config
 import os
+import time
 
 
 # LangSmith 설정
@@ -24,8 +30,11 @@ if Config.LANGCHAIN_API_KEY:
 
 
 class CareChatbotService:
-    # 벡터 스토어 인스턴스를 클래스 변수로 관리 (싱글톤)
-    _vector_store = None
+    # 기록 조회/알러지 확인을 검색과 겹쳐 실행하는 공용 스레드 풀 (0이면 순차 실행)
+    _pipeline_executor = (
+        ThreadPoolExecutor(max_workers=Config.CHATBOT_PIPELINE_WORKERS, thread_name_prefix="care-chatbot")
+        if Config.CHATBOT_PIPELINE_WORKERS > 0 else None
+    )
 
     ATTRIBUTE_MAP = {
         "health": {"weight_kg": ["몸무게", "체중"], "food": ["음식", "사료"], "water": ["물", "음수"], "excrement_status": ["배변"], "walk_time_minutes": ["산책"]},
@@ -39,49 +48,25 @@ class CareChatbotService:
     # -----------------------------
     # 벡터 스토어 관리
     # -----------------------------
-   # care_chatbot_service.py에서 VectorStoreService 호출 직후 예시
     @classmethod
-    def get_vector_store(cls) -> VectorStoreService:
-        """벡터 스토어 인스턴스를 안전하게 가져오거나 생성"""
-        if cls._vector_store is None:
-            try:
-                print("벡터 스토어 초기화 시작...")
-                cls._vector_store = VectorStoreService()
-                print("VectorStoreService 객체 생성:", cls._vector_store)
-                
-                # 멀티 콜렉션 벡터 DB 초기화
-                stores = cls._vector_store.initialize_vector_db()
-                print("멀티 콜렉션 벡터 DB 초기화 완료:", stores)
-                
-                # stores 확인
-                if not stores or not any(stores.values()):
-                    print("경고: 모든 콜렉션 초기화가 실패했습니다.")
-                else:
-                    for collection_type, store in stores.items():
-                        if store:
-                            count = cls._get_document_count(store)
-                            print(f"{collection_type} 콜렉션 설정 완료. 문서 수: {count}")
-                        else:
-                            print(f"{collection_type} 콜렉션 초기화 실패")
-                    
-            except Exception as e:
-                print(f"벡터 스토어 초기화 중 오류 발생: {e}")
-                import traceback
-                print(f"상세 오류 정보: {traceback.format_exc()}")
-                # 초기화 실패 시 None으로 설정하여 다음에 다시 시도할 수 있도록 함
-                cls._vector_store = None
-                return None
-        else:
-            print("이미 초기화된 벡터 스토어 사용")
-            
-        return cls._vector_store
+    def get_vector_store(cls, timeout: float = None) -> VectorStoreService:
+        """
+        프로세스 전역 벡터 스토어 가져오기
+        준비 중이면 최대 timeout초 대기 후 None 반환 (기록 기반 답변으로 대체)
+        """
+        if timeout is None:
+            timeout = Config.VECTOR_WARMUP_WAIT_SECONDS
+        vector_store = VectorStoreRegistry.get(timeout=timeout)
+        if vector_store is None:
+            print(f"벡터 스토어 준비 중입니다: {VectorStoreRegistry.status()}")
+        return vector_store
 
     @classmethod
     def _get_document_count(cls, store) -> int:
         """벡터 스토어의 문서 수를 안전하게 가져오기"""
         try:
-            if hasattr(store, '_collection') and store._collection:
-                return store._collection.count()
+            if hasattr(store, 'count'):
+                return store.count()
             elif hasattr(store, 'similarity_search'):
                 # 간단한 테스트 검색으로 스토어가 작동하는지 확인
                 test_results = store.similarity_search("test", k=1)
@@ -93,12 +78,21 @@ class CareChatbotService:
     @staticmethod 
     def _create_enhanced_query(query: str, pet_records: dict = None) -> str:
         """
-        반려동물 정보를 포함한 향상된 검색 쿼리 생성
+        반려동물 정보를 포함한 향상된 검색 쿼리 생성 (질문 + 프로필 문자열)
+        """
+        pet_context = CareChatbotService._create_pet_context(pet_records)
+        return f"{query} {pet_context}" if pet_context else query
+
+    @staticmethod
+    def _create_pet_context(pet_records: dict = None) -> str:
+        """
+        반려동물 프로필 문자열 (종/품종/나이/성별/중성화/체중/알러지/질병/복용약물)
+        - 질문과 따로 임베딩해 반려동물별로 캐시 (기록이 바뀌면 문자열이 달라져 다시 임베딩)
         """
         if not pet_records:
-            return query
+            return ""
             
-        pet_info = pet_records.get("pet", {})
+        pet_info = pet_records.get("pet") or {}
         
         # 반려동물 기본 정보 추출
         pet_context_parts = []
@@ -156,168 +150,15 @@ class CareChatbotService:
             if med_names:
                 pet_context_parts.append(f"복용약물: {', '.join(med_names)}")
         
-        # 향상된 쿼리 생성
-        if pet_context_parts:
-            pet_context = " ".join(pet_context_parts)
-            enhanced_query = f"{query} {pet_context}"
-        else:
-            enhanced_query = query
-            
-        return enhanced_query
+        return " ".join(pet_context_parts)
 
     @staticmethod
     def _create_metadata_filter(pet_records: dict = None, query: str = "") -> dict:
         """
-        반려동물 정보와 질문 내용 기반 메타데이터 필터 생성 (더 엄격한 필터링)
+        반려동물 종과 질문 내용 기반 메타데이터 필터 생성 (QueryAnalyzer 필터 규칙)
+        (수집 시 부여한 평면 태그에 대한 동등 비교만 사용 → 인덱스 필터로 처리)
         """
-        if not pet_records:
-            return {}
-        
-        pet_info = pet_records.get("pet", {})
-        filters = []
-        
-        # 1. 동물 종류별 엄격한 필터링
-        species_filter = None
-        if pet_info.get('species_name'):
-            species = pet_info['species_name']
-            if '강아지' in species or '개' in species or 'dog' in species.lower():
-                # 강아지면 고양이 관련 문서는 완전 제외
-                species_filter = {
-                    "$and": [
-                        # 포함할 조건
-                        {
-                            "$or": [
-                                {"categories": {"$in": ["반려견건강", "강아지", "예방접종", "종합건강관리"]}},
-                                {"keywords": {"$in": ["강아지", "개", "dog", "반려견", "견"]}},
-                                {"data_type": {"$ne": "medication"}},  # 의약품이 아니거나
-                                {
-                                    "$and": [
-                                        {"data_type": "medication"},
-                                        {
-                                            "$or": [
-                                                {"text": {"$contains": "강아지"}},
-                                                {"text": {"$contains": "개"}},
-                                                {"text": {"$contains": "dog"}},
-                                                {"text": {"$contains": "반려견"}}
-                                            ]
-                                        }
-                                    ]
-                                }
-                            ]
-                        },
-                        # 제외할 조건 (고양이 관련)
-                        {
-                            "$not": {
-                                "$or": [
-                                    {"categories": {"$in": ["반려묘건강", "고양이"]}},
-                                    {"keywords": {"$in": ["고양이", "냥이", "cat", "반려묘"]}},
-                                    {"text": {"$contains": "고양이"}},
-                                    {"text": {"$contains": "cat"}}
-                                ]
-                            }
-                        }
-                    ]
-                }
-            elif '고양이' in species or '냥이' in species or 'cat' in species.lower():
-                # 고양이면 강아지 관련 문서는 완전 제외
-                species_filter = {
-                    "$and": [
-                        # 포함할 조건
-                        {
-                            "$or": [
-                                {"categories": {"$in": ["반려묘건강", "고양이", "예방접종", "종합건강관리"]}},
-                                {"keywords": {"$in": ["고양이", "냥이", "cat", "반려묘"]}},
-                                {"data_type": {"$ne": "medication"}},  # 의약품이 아니거나
-                                {
-                                    "$and": [
-                                        {"data_type": "medication"},
-                                        {
-                                            "$or": [
-                                                {"text": {"$contains": "고양이"}},
-                                                {"text": {"$contains": "cat"}},
-                                                {"text": {"$contains": "냥이"}},
-                                                {"text": {"$contains": "반려묘"}}
-                                            ]
-                                        }
-                                    ]
-                                }
-                            ]
-                        },
-                        # 제외할 조건 (강아지 관련)
-                        {
-                            "$not": {
-                                "$or": [
-                                    {"categories": {"$in": ["반려견건강", "강아지"]}},
-                                    {"keywords": {"$in": ["강아지", "개", "dog", "반려견"]}},
-                                    {"text": {"$contains": "강아지"}},
-                                    {"text": {"$contains": "dog"}}
-                                ]
-                            }
-                        }
-                    ]
-                }
-        
-        if species_filter:
-            filters.append(species_filter)
-        
-        # 2. 질문 내용에 따른 추가 필터링
-        if query:
-            query_lower = query.lower()
-            
-            # 예방접종 관련 질문이면 의약품 데이터 제한
-            if any(word in query_lower for word in ['예방접종', '백신', '접종', 'vaccine']):
-                filters.append({
-                    "$or": [
-                        {"data_type": {"$ne": "medication"}},  # 의약품이 아니거나
-                        {
-                            "$and": [
-                                {"data_type": "medication"},
-                                {
-                                    "$or": [
-                                        {"text": {"$contains": "백신"}},
-                                        {"text": {"$contains": "vaccine"}},
-                                        {"text": {"$contains": "예방접종"}}
-                                    ]
-                                }
-                            ]
-                        }
-                    ]
-                })
-            
-            # 건강관리, 사료, 운동 관련이면 의약품 우선순위 낮춤
-            elif any(word in query_lower for word in ['건강관리', '사료', '운동', '산책', '관리', '키우기']):
-                filters.append({
-                    "$or": [
-                        {"data_type": {"$ne": "medication"}},  # 의약품이 아닌 문서 우선
-                        {"categories": {"$in": ["종합건강관리", "사료관리", "기본관리"]}}
-                    ]
-                })
-        
-        # 3. 의약품 데이터 비중 줄이기 (전체적으로)
-        # 질병/약물 관련 질문이 아니면 의약품 데이터 제한
-        disease_related = any(word in query.lower() for word in ['약', '치료', '병', '질병', '아파', 'medication', 'treatment'])
-        
-        if not disease_related:
-            # 질병 관련이 아니면 일반 가이드 문서 우선
-            filters.append({
-                "$or": [
-                    {"data_type": {"$ne": "medication"}},
-                    {
-                        "$and": [
-                            {"data_type": "medication"},
-                            {"item_index": {"$lt": 50}}  # 의약품 중에서도 앞쪽 50개만
-                        ]
-                    }
-                ]
-            })
-        
-        # 최종 필터 조합 (AND 조건: 모든 조건을 만족해야 함)
-        if len(filters) == 1:
-            return filters[0]
-        elif len(filters) > 1:
-            return {"$and": filters}
-        
-        return {}
+        return analyze_query(query, pet_records).where
 
     @staticmethod
     def _debug_vector_metadata(vector_store):
@@ -330,52 +171,23 @@ class CareChatbotService:
         print("메타데이터 필터는 멀티 콜렉션에서 사용되지 않습니다.")
 
     @staticmethod
-    def _debug_multi_collection_metadata(vector_store, collections_to_search):
-        """멀티 콜렉션 메타데이터 디버깅"""
-        try:
-            print("\n=== 멀티 콜렉션 메타데이터 샘플 확인 ===")
-            
-            for collection_type in collections_to_search:
-                if collection_type in vector_store.stores and vector_store.stores[collection_type]:
-                    print(f"\n--- {collection_type} 콜렉션 ---")
-                    store = vector_store.stores[collection_type]
-                    sample_docs = store.similarity_search("강아지", k=3)
-                    
-                    for i, doc in enumerate(sample_docs):
-                        print(f"  {i+1}. {doc.page_content[:80]}...")
-                        print(f"     collection_type: {doc.metadata.get('collection_type', 'None')}")
-                        print(f"     data_type: {doc.metadata.get('data_type', 'None')}")
-                else:
-                    print(f"{collection_type} 콜렉션이 초기화되지 않음")
-                    
-            print("=== 멀티 콜렉션 샘플 확인 완료 ===\n")
-            
-        except Exception as e:
-            print(f"멀티 콜렉션 디버깅 중 오류: {e}")
-
-    @staticmethod
-    def search_knowledge_base(query: str, pet_records: dict = None, k: int = 5, search_type: str = "hybrid") -> str:
+    def search_knowledge_base(query: str, pet_records: dict = None, k: int = 5, search_type: str = "hybrid",
+                              analysis: QueryAnalysis = None) -> str:
         """
         지식 베이스에서 관련 문서 검색
         search_type: "vector", "keyword", "hybrid"
+        analysis: 미리 만든 질문 분석 (없으면 여기서 한 번 생성)
         """
         try:
             if not query or not query.strip():
                 print("검색어가 비어있습니다.")
                 return ""
 
-            # 반려동물 정보를 포함한 향상된 쿼리 생성
-            enhanced_query = CareChatbotService._create_enhanced_query(query, pet_records)
+            # 반려동물 프로필은 질문과 따로 임베딩 (검색 벡터 = 질문 벡터와 프로필 벡터의 가중합)
+            pet_context = CareChatbotService._create_pet_context(pet_records)
             print(f"원본 쿼리: {query}")
-            print(f"향상된 쿼리: {enhanced_query}")
+            print(f"반려동물 프로필: {pet_context or '없음'}")
             
-            # 메타데이터 필터 생성
-            metadata_filter = CareChatbotService._create_metadata_filter(pet_records, query)
-            if metadata_filter:
-                print(f"메타데이터 필터: {metadata_filter}")
-            else:
-                print("메타데이터 필터: 없음")
-
             vector_store = CareChatbotService.get_vector_store()
             if not vector_store:
                 print("벡터 스토어 서비스를 가져올 수 없습니다.")
@@ -384,24 +196,60 @@ class CareChatbotService:
             if not hasattr(vector_store, "stores") or not any(vector_store.stores.values()):
                 print("멀티 콜렉션 벡터 스토어가 초기화되지 않았습니다.")
                 return ""
-            
-            # 질문 유형에 따른 콜렉션 선택
-            collections_to_search = vector_store.get_collection_by_query_type(query, pet_records)
+
+            # 질문 분석 1회 (의도 → 콜렉션 라우팅 / 메타데이터 필터 / 종별 파티션 / 언급된 제품명)
+            if analysis is None:
+                analysis = vector_store.analyze_query(query, pet_records)
+            metadata_filter = analysis.where
+            partitions = analysis.partitions
+            collections_to_search = analysis.collections
+            print(f"질문 의도: {sorted(analysis.intents)}")
+            print(f"메타데이터 필터: {metadata_filter or '없음'}")
+            print(f"검색할 파티션: {partitions}")
             print(f"검색할 콜렉션: {collections_to_search}")
+
+            try:
+                pet_info = (pet_records or {}).get("pet") or {}
+                query_embedding = vector_store.query_vectors.combine(query, pet_info.get('pet_id'), pet_context)
+            except Exception as e:
+                print(f"검색 벡터 생성 실패 - 키워드 결과만 사용합니다: {e}")
+                query_embedding = None
             
-            # 벡터DB 메타데이터 샘플 확인
-            CareChatbotService._debug_multi_collection_metadata(vector_store, collections_to_search)
+            # 질문에 제품명이 있으면 해당 제품 청크를 먼저 직접 조회 (질문 분석에서 찾은 제품명 - 복용약물명은 제외)
+            product_docs = vector_store.find_product_documents(
+                query, k=k, where=metadata_filter, partitions=partitions, matches=analysis.product_matches
+            )
+            if product_docs:
+                print(f"제품명 직접 조회: {[doc.metadata.get('product_name') for doc in product_docs]}")
 
             # 멀티 콜렉션에서 검색
             try:
                 print(f"실행할 검색 타입: {search_type}")
                 
-                # 멀티 콜렉션 검색 (현재는 벡터 검색만 지원)
-                if search_type in ["vector", "hybrid"]:
+                # 멀티 콜렉션 검색 (제품 청크로 채우고 남은 자리만)
+                if len(product_docs) >= k:
+                    search_results = []
+                    print("제품 청크로 검색 결과를 모두 채워 벡터 검색을 건너뜁니다.")
+
+                elif search_type == "hybrid":
+                    search_results = vector_store.hybrid_search_multi_collections(
+                        query,
+                        collections_to_search,
+                        k=k,
+                        where=metadata_filter,
+                        partitions=partitions,
+                        query_embedding=query_embedding
+                    )
+                    print(f"멀티 콜렉션 하이브리드 검색 완료")
+
+                elif search_type == "vector":
                     search_results = vector_store.search_multi_collections(
-                        enhanced_query, 
+                        query, 
                         collections_to_search, 
-                        k=k
+                        k=k,
+                        where=metadata_filter,
+                        partitions=partitions,
+                        query_embedding=query_embedding
                     )
                     print(f"멀티 콜렉션 벡터 검색 완료")
                     
@@ -409,7 +257,7 @@ class CareChatbotService:
                     # 키워드 검색은 첫 번째 콜렉션에서만
                     if collections_to_search and vector_store.stores.get(collections_to_search[0]):
                         first_collection = collections_to_search[0]
-                        keyword_results = vector_store.keyword_search(enhanced_query, k=k, collection_type=first_collection)
+                        keyword_results = vector_store.keyword_search(query, k=k, collection_type=first_collection, where=metadata_filter)
                         search_results = [doc for doc, _ in keyword_results]
                         print(f"{first_collection}에서 키워드 검색 완료")
                         # 키워드 검색 점수 출력
@@ -422,9 +270,10 @@ class CareChatbotService:
                 else:
                     print(f"지원하지 않는 검색 타입: {search_type}")
                     search_results = vector_store.search_multi_collections(
-                        enhanced_query, 
+                        query, 
                         collections_to_search, 
-                        k=k
+                        k=k,
+                        query_embedding=query_embedding
                     )
                     
                 print(f"최종 검색 결과 수: {len(search_results) if search_results else 0}")
@@ -456,7 +305,12 @@ class CareChatbotService:
                     )
                     print("멀티 콜렉션 벡터 검색으로 폴백 완료")
                 except:
-                    return ""
+                    search_results = []
+
+            if product_docs:
+                product_ids = {doc.id for doc in product_docs}
+                fill = [doc for doc in (search_results or []) if doc.id not in product_ids]
+                search_results = product_docs + fill[:k - len(product_docs)]
 
             if not search_results or not isinstance(search_results, list):
                 print("검색 결과가 없습니다 또는 예상치 못한 타입입니다.")
@@ -511,17 +365,36 @@ class CareChatbotService:
     # 반려동물 기록 관련
     # -----------------------------
     @staticmethod
-    def get_pet_records(pet_id: int):
+    def _record_loaders() -> dict:
         return {
-            'pet': PetService.get_pet(pet_id),
-            'health': HealthCareService.get_health_records_by_pet(pet_id),
-            'allergy': MedicalCareService.get_allergy_pet(pet_id),
-            'disease': MedicalCareService.get_disease_pet(pet_id),
-            'medication': MedicalCareService.get_medications_by_pet(pet_id),
-            'surgery': MedicalCareService.get_surgery_pet(pet_id),
-            'vaccination': MedicalCareService.get_vaccination_pet(pet_id),
+            'pet': PetService.get_pet,
+            'health': HealthCareService.get_health_records_by_pet,
+            'allergy': MedicalCareService.get_allergy_pet,
+            'disease': MedicalCareService.get_disease_pet,
+            'medication': MedicalCareService.get_medications_by_pet,
+            'surgery': MedicalCareService.get_surgery_pet,
+            'vaccination': MedicalCareService.get_vaccination_pet,
         }
 
+    @staticmethod
+    def get_pet_records(pet_id: int):
+        return {name: loader(pet_id) for name, loader in CareChatbotService._record_loaders().items()}
+
+    @staticmethod
+    def submit_pet_records(pet_id: int) -> dict:
+        """
+        기록 조회 7건을 스레드 풀에서 동시에 시작 (이름 → Future)
+        - 각 작업은 자기 앱 컨텍스트(=자기 DB 세션)에서 실행, 컬럼 값만 쓰므로 세션 종료 후에도 사용 가능
+        """
+        flask_app = app._get_current_object()
+
+        def load(loader):
+            with flask_app.app_context():
+                return loader(pet_id)
+
+        executor = CareChatbotService._pipeline_executor
+        return {name: executor.submit(load, loader) for name, loader in CareChatbotService._record_loaders().items()}
+
     @staticmethod
     def summarize_record_list(records, record_type: str, limit: int = 3) -> list:
         if not records:
@@ -553,14 +426,44 @@ class CareChatbotService:
         """
 
     @staticmethod
-    def build_enhanced_prompt(user_input: str, records_summary: str, knowledge_context: str) -> str:
+    def find_allergy_conflicts(records: dict, user_input: str = "") -> list:
+        """
+        반려동물 알러지원과 성분이 겹치는 의약품 (복용 중인 약 + 질문에 언급된 제품)
+        - 의약품 성분 역색인의 집합 교집합으로만 판단 (LLM/벡터 검색 없음)
+        """
+        allergens = [a.allergen for a in records.get('allergy', []) or [] if getattr(a, 'allergen', None)]
+        if not allergens:
+            return []
+        try:
+            index = get_medication_index()
+            medication_names = [getattr(m, 'medication_name', None) for m in records.get('medication', []) or []]
+            product_ids = index.resolve_products(medication_names + [user_input])
+            return index.check_allergies(allergens, product_ids) if product_ids else []
+        except Exception as e:
+            print(f"알러지 성분 확인 실패: {e}")
+            return []
+
+    @staticmethod
+    def summarize_allergy_conflicts(conflicts: list) -> str:
+        return "\n".join(
+            f"- {c.product_name}: {c.allergen} 알러지 (겹치는 성분: {', '.join(c.ingredients) or '-'})"
+            for c in conflicts
+        )
+
+    @staticmethod
+    def build_enhanced_prompt(user_input: str, records_summary: str, knowledge_context: str,
+                              allergy_warnings: str = "") -> str:
+        allergy_section = f"""
+        == 알러지 주의 (기록된 알러지원과 성분이 겹치는 제품) ==
+        {allergy_warnings}
+""" if allergy_warnings else ""
         return f"""
         너는 전문적인 반려동물 건강 상담 챗봇이야.
         아래 정보들을 참고해서 정확하고 도움이 되는 답변을 해줘.
 
         == 반려동물 기록 ==
         {records_summary}
-
+{allergy_section}
         == 전문 지식 자료 ==
         {knowledge_context}
 
@@ -570,24 +473,68 @@ class CareChatbotService:
 
     @staticmethod
     def chatbot_with_records(user_input: str, pet_id: int, user_id: int, 
-                           use_vector_search: bool = True, search_type: str = "hybrid") -> str:
+                           use_vector_search: bool = True, search_type: str = "hybrid",
+                           timings: StageTimings = None) -> str:
         """
         반려동물 기록과 지식 베이스를 활용한 챗봇 응답
         search_type: "vector", "keyword", "hybrid" 중 선택
+        - 기록 조회(스레드 풀)와 벡터 스토어 대기/질문 임베딩(요청 스레드)을 겹쳐 실행
+        - 알러지 확인(스레드 풀)과 지식 검색(요청 스레드)을 겹쳐 실행
+        - timings: 단계별 소요 시간(ms)을 기록할 객체 (없으면 내부에서 생성, 최근 요청 통계에 누적)
         """
+        timings = timings if timings is not None else StageTimings()
+        executor = CareChatbotService._pipeline_executor
+
         with app.app_context():
-            records = CareChatbotService.get_pet_records(pet_id)
+            # 1단계: 기록 조회 시작 → 기다리는 동안 벡터 스토어 준비 확인 + 질문 임베딩(반려동물과 무관, 캐시)
+            records_started = time.perf_counter()
+            record_futures = CareChatbotService.submit_pet_records(pet_id) if executor else None
+
+            vector_store = None
+            if use_vector_search:
+                with timings.stage("vector_store_wait"):
+                    vector_store = CareChatbotService.get_vector_store()
+                if vector_store is None:
+                    print("벡터 스토어 준비 중 - 반려동물 기록만으로 답변합니다.")
+                    use_vector_search = False
+                else:
+                    try:
+                        with timings.stage("question_embedding"):
+                            vector_store.query_vectors.question_vector(user_input)
+                    except Exception as e:
+                        print(f"질문 임베딩 실패: {e}")
+
+            if record_futures is not None:
+                records = {name: future.result() for name, future in record_futures.items()}
+            else:
+                records = CareChatbotService.get_pet_records(pet_id)
+            timings.record("records", (time.perf_counter() - records_started) * 1000)
             records_summary = CareChatbotService.summarize_pet_records(records)
 
+            # 2단계: 알러지 확인(성분 색인) ∥ 질문 분석 + 지식 검색
+            allergy_started = time.perf_counter()
+            if executor:
+                allergy_future = executor.submit(CareChatbotService.find_allergy_conflicts, records, user_input)
+            else:
+                allergy_conflicts = CareChatbotService.find_allergy_conflicts(records, user_input)
+
+            knowledge_context = ""
             if use_vector_search:
                 print(f"\n=== 검색 시작 ===")
                 print(f"검색어: {user_input}")
                 print(f"검색 타입: {search_type}")
                 print(f"검색할 문서 수: 10")
-                
-                knowledge_context = CareChatbotService.search_knowledge_base(
-                    user_input, pet_records=records, k=10, search_type=search_type
-                )
+
+                try:
+                    with timings.stage("analysis"):
+                        analysis = vector_store.analyze_query(user_input, records)
+                except Exception as e:
+                    print(f"질문 분석 실패 - 검색 단계에서 다시 분석합니다: {e}")
+                    analysis = None
+                with timings.stage("retrieval"):
+                    knowledge_context = CareChatbotService.search_knowledge_base(
+                        user_input, pet_records=records, k=10, search_type=search_type, analysis=analysis
+                    )
                 
                 print(f"\n=== 검색 결과 ===")
                 if knowledge_context:
@@ -596,9 +543,16 @@ class CareChatbotService:
                     print(knowledge_context[:500] + "..." if len(knowledge_context) > 500 else knowledge_context)
                 else:
                     print("검색된 문서가 없습니다.")
-                
-                prompt = CareChatbotService.build_enhanced_prompt(user_input, records_summary, knowledge_context)
-                
+
+            if executor:
+                allergy_conflicts = allergy_future.result()
+            timings.record("allergy_check", (time.perf_counter() - allergy_started) * 1000)
+            allergy_warnings = CareChatbotService.summarize_allergy_conflicts(allergy_conflicts)
+
+            if use_vector_search:
+                prompt = CareChatbotService.build_enhanced_prompt(
+                    user_input, records_summary, knowledge_context, allergy_warnings
+                )
                 print(f"\n=== 최종 프롬프트 ===")
                 print("프롬프트 길이:", len(prompt), "글자")
                 print("프롬프트 내용:")
@@ -607,9 +561,18 @@ class CareChatbotService:
                 
             else:
                 prompt = f"사용자 질문: {user_input}\n\n반려동물 기록:\n{records_summary}"
+                if allergy_warnings:
+                    prompt += f"\n\n알러지 주의 (기록된 알러지원과 성분이 겹치는 제품):\n{allergy_warnings}"
 
             prompt = CareChatbotService.pretty_format(prompt)
-            return get_gpt_response(prompt)
+
+            # 3단계: 답변 생성
+            with timings.stage("llm"):
+                answer = get_gpt_response(prompt)
+
+        care_chatbot_latency.add(timings.finish())
+        print(f"케어 챗봇 단계별 소요 시간: {timings}")
+        return answer
 
     @staticmethod
     def pretty_format(text: str) -> str:
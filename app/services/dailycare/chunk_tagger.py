@@ -0,0 +1,74 @@
+import re
+from typing import Dict, Any, Optional
+
+
+# 종(species) 판별 패턴
+# '개'는 단독 단어/합성어 접두(개질병, 개 부루셀라병)만 인정하고 개월·개선·3개 등은 제외
+DOG_PATTERN = re.compile(
+    r"강아지|반려견|애견|견종|노령견|소형견|중형견|대형견|성견|자견|퍼피|"
+    r"(?<![가-힣0-9])개(?![월선요체인발방최수념정별시소복구봉략편])|"
+    r"(?<![a-z])(?:dogs?|canine|pupp(?:y|ies))(?![a-z])",
+    re.IGNORECASE,
+)
+CAT_PATTERN = re.compile(
+    r"고양이|반려묘|냥이|자묘|성묘|노령묘|묘종|(?<![a-z])(?:cats?|feline|kittens?)(?![a-z])",
+    re.IGNORECASE,
+)
+
+# 주제 태그 → 키워드 (부분 문자열로 비교하므로 한 글자 키워드는 쓰지 않음 - 예: '귀'는 귀엽다/귀가/귀하에도 걸림)
+TOPIC_KEYWORDS = {
+    "topic_vaccine": ["예방접종", "백신", "접종", "vaccine", "항체"],
+    "topic_nutrition": ["사료", "영양", "급여", "식이", "간식", "먹이", "비만"],
+    "topic_exercise": ["산책", "운동", "활동량"],
+    "topic_parasite": ["구충", "기생충", "진드기", "벼룩", "심장사상충", "회충", "촌충", "외부구충", "내부구충"],
+    "topic_skin": ["피부", "피부염", "탈모", "가려움", "습진", "외이염", "외이도", "귓병", "귀 가려움", "귀지", "귀 청소"],
+    "topic_dental": ["치아", "치석", "치주", "구강", "양치"],
+    "topic_behavior": ["행동", "훈련", "짖", "분리불안", "공격성", "사회화"],
+    "topic_disease": ["질병", "질환", "증상", "감염", "전염병", "치료", "진단", "염증"],
+    "topic_emergency": ["응급", "중독", "출혈", "골절", "쇼크", "심폐소생"],
+}
+
+SPECIES_DOG = "dog"
+SPECIES_CAT = "cat"
+SPECIES_COMMON = "common"
+
+
+def detect_species(text: str) -> Optional[str]:
+    """텍스트에 언급된 종 (둘 다/없음이면 common/None)"""
+    dog = bool(DOG_PATTERN.search(text))
+    cat = bool(CAT_PATTERN.search(text))
+    if dog and cat:
+        return SPECIES_COMMON
+    if dog:
+        return SPECIES_DOG
+    if cat:
+        return SPECIES_CAT
+    return None
+
+
+def tag_chunk(text: str, metadata: Dict[str, Any], collection_type: str) -> Dict[str, Any]:
+    """
+    청크별 평면 태그 생성 (Chroma에서 동등 비교로 필터링)
+    - species: dog / cat / common, species_dog / species_cat: 해당 종 문서 여부
+    - topic_*: 주제 여부
+    - is_medication: 의약품 청크 여부
+    헤더/카테고리/키워드/제품명에서 먼저 판단하고, 없으면 본문에서 판단
+    """
+    context = " ".join(
+        str(metadata.get(key) or "")
+        for key in ("title", "subtitle", "categories", "keywords", "product_name", "english_name", "file_path")
+    )
+    normalized_text = text.replace("\\n", " ")
+
+    species = detect_species(context) or detect_species(normalized_text) or SPECIES_COMMON
+    tags: Dict[str, Any] = {
+        "species": species,
+        "species_dog": species in (SPECIES_DOG, SPECIES_COMMON),
+        "species_cat": species in (SPECIES_CAT, SPECIES_COMMON),
+        "is_medication": collection_type == "medication" or metadata.get("data_type") == "medication",
+    }
+
+    haystack = f"{context} {normalized_text}".lower()
+    for tag, keywords in TOPIC_KEYWORDS.items():
+        tags[tag] = any(keyword in haystack for keyword in keywords)
+    return tags
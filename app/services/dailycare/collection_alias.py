@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from app.services.dailycare.index_manifest import write_json_atomic
+
+
+logger = logging.getLogger(__name__)
+
+# Chroma 콜렉션 이름은 [a-zA-Z0-9._-]만 허용하므로 '@' 대신 '__v' 사용
+VERSION_SEPARATOR = "__v"
+
+
+def versioned_name(base_name: str, version: int) -> str:
+    return f"{base_name}{VERSION_SEPARATOR}{version}"
+
+
+class ReadWriteLock:
+    """다수 reader / 단일 writer 락 (writer 대기 중에는 새 reader 진입 보류)"""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        # 같은 스레드의 중첩 read는 대기 없이 통과 (writer 대기 중 교착 방지)
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            with self._cond:
+                while self._writer or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                with self._cond:
+                    self._readers -= 1
+                    if self._readers == 0:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class CollectionAliases:
+    """논리 콜렉션 → 실제(버전) 콜렉션 포인터 파일
+
+    {"medications": {"version": 7, "collection": "mypetsvoice_medications__v7"}}
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._aliases: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[float] = None
+
+    def load(self) -> "CollectionAliases":
+        try:
+            if self.path.exists():
+                self._mtime = self.path.stat().st_mtime
+                self._aliases = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"콜렉션 alias 파일 로드 실패 ({self.path}): {e}")
+        return self
+
+    def changed_on_disk(self) -> bool:
+        """다른 프로세스가 alias를 바꿨는지 확인"""
+        try:
+            mtime = self.path.stat().st_mtime if self.path.exists() else None
+        except OSError:
+            return False
+        return mtime != self._mtime
+
+    def resolve(self, collection_type: str) -> Optional[str]:
+        return self._aliases.get(collection_type, {}).get("collection")
+
+    def version(self, collection_type: str) -> int:
+        return int(self._aliases.get(collection_type, {}).get("version", 0))
+
+    def set(self, collection_type: str, version: int, collection_name: str):
+        aliases = dict(self._aliases)
+        aliases[collection_type] = {"version": version, "collection": collection_name}
+        write_json_atomic(self.path, aliases)
+        self._aliases = aliases
+        self._mtime = self.path.stat().st_mtime
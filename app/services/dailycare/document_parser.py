@@ -0,0 +1,234 @@
+import re
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Callable
+
+from langchain_text_splitters import MarkdownHeaderTextSplitter
+from langchain_core.documents import Document
+
+from app.services.dailycare.chunk_tagger import tag_chunk
+from app.services.dailycare.json_stream import iter_json_file
+from app.services.dailycare.index_manifest import chunk_content_hash
+from app.services.dailycare.token_chunker import TokenChunker, make_token_counter
+
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentParser:
+    """
+    원본 파일(.md / .json) → 청크 변환 (상태 없음)
+    - VectorStoreService가 상속해 사용하고, 프로세스 풀 작업자는 parse_file_task로 호출
+    """
+
+    COLLECTION_TYPE_LABELS = {
+        'general_guides': 'general_guide',
+        'medications': 'medication',
+    }
+    # 청크 상한/겹침 (cl100k_base 토큰 수)
+    chunk_max_tokens = 1000
+    chunk_overlap_tokens = 100
+
+    def _load_source_file(self, collection_type: str, path: Path) -> Iterator[Document]:
+        """원본 파일 하나를 청크 Document 스트림으로 변환"""
+        docs = self.load_markdown(path) if collection_type == 'general_guides' else self.load_json(path)
+        # 메타데이터에 컬렉션 타입 + 종/주제 태그 추가 (필터는 태그 동등 비교로 처리)
+        for doc in docs:
+            doc.metadata['collection_type'] = self.COLLECTION_TYPE_LABELS[collection_type]
+            doc.metadata.update(tag_chunk(doc.page_content, doc.metadata, doc.metadata['collection_type']))
+            yield doc
+
+    def parse_file(self, collection_type: str, path: Path, rel_path: str) -> List[Dict[str, Any]]:
+        """파일 하나를 (id, text, metadata, hash) 청크 목록으로 변환 (토큰 수는 metadata["token_count"]에 기록)"""
+        chunks: List[Dict[str, Any]] = []
+        seen_ids = set()
+        for doc in self._load_source_file(collection_type, path):
+            chunk_id = self._chunk_id(rel_path, doc)
+            suffix = 1
+            while chunk_id in seen_ids:
+                chunk_id = self._chunk_id(rel_path, doc, suffix)
+                suffix += 1
+            seen_ids.add(chunk_id)
+            if "token_count" not in doc.metadata:
+                doc.metadata["token_count"] = self._count_tokens(doc.page_content)
+            chunks.append({
+                "id": chunk_id,
+                "text": doc.page_content,
+                "metadata": doc.metadata,
+                "hash": chunk_content_hash(doc.page_content, doc.metadata),
+            })
+        return chunks
+
+    def _count_tokens(self, text: str) -> int:
+        counter: Optional[Callable[[str], int]] = getattr(self, "_token_counter", None)
+        if counter is None:
+            counter = self._token_counter = make_token_counter()
+        return counter(text)
+
+    def _chunker(self) -> TokenChunker:
+        chunker: Optional[TokenChunker] = getattr(self, "_token_chunker", None)
+        if chunker is None or (chunker.max_tokens, chunker.overlap_tokens) != (self.chunk_max_tokens, self.chunk_overlap_tokens):
+            chunker = self._token_chunker = TokenChunker(self.chunk_max_tokens, self.chunk_overlap_tokens, self._count_tokens)
+        return chunker
+
+    def _chunk_documents(self, content: str, metadata: Dict[str, Any]) -> Iterator[Document]:
+        """토큰 기준으로 나눈 청크마다 chunk_index / total_chunks / token_count를 붙인 Document"""
+        chunks = self._chunker().split(content)
+        for c_i, (chunk, token_count) in enumerate(chunks):
+            meta_copy = dict(metadata)
+            meta_copy.update({"chunk_index": c_i, "total_chunks": len(chunks), "token_count": token_count})
+            yield Document(page_content=chunk, metadata=self._sanitize_metadata(meta_copy))
+
+    @staticmethod
+    def _chunk_id(rel_path: str, doc: Document, suffix: int = 0) -> str:
+        """원본 위치 기반 안정적인 청크 ID (의약품은 항목 id, 가이드는 섹션 순번 기준)"""
+        meta = doc.metadata
+        key = meta.get("document_id", meta.get("item_index", meta.get("section_index", "")))
+        raw = f"{rel_path}|{key}|{meta.get('chunk_index', 0)}|{suffix}"
+        return hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+    # -------------------------
+    # Markdown loader
+    # -------------------------
+    def load_markdown(self, file_path: Path) -> List[Document]:
+        try:
+            text = file_path.read_text(encoding="utf-8")
+        except Exception as e:
+            logger.warning(f"Markdown 파일 읽기 실패 ({file_path}): {e}")
+            return []
+
+        meta = self.extract_document_metadata(text)
+        splitter = MarkdownHeaderTextSplitter([("#", "title"), ("##", "subtitle")])
+
+        try:
+            sections = splitter.split_text(text)
+        except Exception as e:
+            logger.warning(f"Markdown 분할 실패({file_path}), 전체를 하나로 처리: {e}")
+            sections = [text]
+
+        docs: List[Document] = []
+        for i, sec in enumerate(sections):
+            if isinstance(sec, Document):
+                content = sec.page_content
+                sec_meta = sec.metadata or {}
+            else:
+                content = str(sec)
+                sec_meta = {}
+
+            clean = self.remove_metadata_blocks(content)
+            if not clean.strip():
+                continue
+
+            metadata = {**meta, **sec_meta, "source_file": file_path.name, "file_path": str(file_path), "section_index": i}
+            # 긴 섹션은 여러 청크로 나뉘므로 헤더 경로를 메타데이터로 보존
+            headers = [sec_meta[key] for key in ("title", "subtitle") if sec_meta.get(key)]
+            if headers:
+                metadata["breadcrumb"] = " > ".join(headers)
+            docs.extend(self._chunk_documents(clean, metadata))
+
+        return docs
+
+    # -------------------------
+    # JSON loader (robust)
+    # -------------------------
+    def load_json(self, file_path: Path) -> Iterator[Document]:
+        """JSON 파일을 청크 Document로 스트리밍 변환 (배열은 항목 단위로 파싱)"""
+        try:
+            for idx, item in iter_json_file(file_path):
+                try:
+                    yield from self._json_item_documents(file_path, idx, item)
+                except Exception as item_e:
+                    logger.warning(f"JSON item 처리 실패 ({file_path}, index={idx}): {item_e}")
+        except Exception as e:
+            logger.warning(f"JSON 파일 읽기 실패 ({file_path}): {e}")
+
+    def _json_item_documents(self, file_path: Path, idx: Optional[int], item: Any) -> Iterator[Document]:
+        if idx is None:
+            # single JSON object (or scalar): serialize and chunk
+            content = json.dumps(item, ensure_ascii=False, indent=2) if isinstance(item, dict) else str(item)
+            metadata = {"file_path": str(file_path), "data_type": "medication"}
+        elif isinstance(item, dict):
+            # prefer 'text' if present and non-empty
+            content = item.get("text") if isinstance(item.get("text"), str) and item.get("text").strip() else None
+            if content is None:
+                # fallback: serialize entire item
+                content = json.dumps(item, ensure_ascii=False, indent=2)
+            metadata = {
+                "file_path": str(file_path),
+                "data_type": "medication",
+                "item_index": idx,
+            }
+            # merge item metadata if present
+            if "metadata" in item and isinstance(item["metadata"], dict):
+                metadata.update(item["metadata"])
+            if "id" in item:
+                metadata["document_id"] = item["id"]
+        else:
+            # non-dict item -> stringify
+            content = json.dumps(item, ensure_ascii=False)
+            metadata = {"file_path": str(file_path), "data_type": "medication", "item_index": idx}
+
+        yield from self._chunk_documents(content, metadata)
+
+    # -------------------------
+    # Utilities
+    # -------------------------
+    def extract_document_metadata(self, content: str) -> Dict[str, Any]:
+        metadata: Dict[str, Any] = {}
+        yaml_pattern = r"^---\s*\nmetadata:\s*\n(.*?)\n---"
+        match = re.search(yaml_pattern, content, flags=re.MULTILINE | re.DOTALL)
+        if not match:
+            return metadata
+
+        yaml_content = match.group(1)
+        for line in yaml_content.splitlines():
+            line = line.strip()
+            if ":" in line and not line.startswith("-"):
+                key, val = line.split(":", 1)
+                key = key.strip()
+                value = val.strip().strip('"\'')
+                if key == "categories":
+                    metadata[key] = self.parse_yaml_list(value)
+                else:
+                    metadata[key] = value
+        return metadata
+
+    def parse_yaml_list(self, value: Any) -> List[str]:
+        if isinstance(value, list):
+            return [str(v).strip().strip('"\'') for v in value]
+        if isinstance(value, str) and value.startswith("[") and value.endswith("]"):
+            items = value[1:-1].split(",")
+            return [item.strip().strip('"\'') for item in items]
+        return [str(value).strip().strip('"\'')]
+
+    def remove_metadata_blocks(self, content: str) -> str:
+        yaml_pattern = r"^---\s*\nmetadata:\s*\n.*?\n---\s*\n"
+        cleaned = re.sub(yaml_pattern, "", content, flags=re.MULTILINE | re.DOTALL)
+        cleaned = re.sub(r"\n\s*\n\s*\n", "\n\n", cleaned)
+        return cleaned.strip()
+
+    def _sanitize_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert metadata values to primitives (str/int/float/bool). Lists/dicts -> JSON string.
+        """
+        safe: Dict[str, Any] = {}
+        for k, v in (metadata or {}).items():
+            if isinstance(v, (str, int, float, bool)) or v is None:
+                safe[k] = v
+            else:
+                try:
+                    safe[k] = json.dumps(v, ensure_ascii=False) if not isinstance(v, (str, int, float, bool)) else v
+                except Exception:
+                    safe[k] = str(v)
+        return safe
+
+
+_parser = DocumentParser()
+
+
+def parse_file_task(collection_type: str, path: Path, rel_path: str, chunk_max_tokens: int, chunk_overlap_tokens: int) -> List[Dict[str, Any]]:
+    """프로세스 풀 작업 단위 (모듈 수준 함수여야 pickle 가능)"""
+    _parser.chunk_max_tokens, _parser.chunk_overlap_tokens = chunk_max_tokens, chunk_overlap_tokens
+    return _parser.parse_file(collection_type, path, rel_path)
@@ -0,0 +1,322 @@
+import time
+import queue
+import random
+import logging
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+
+from app.services.dailycare.token_chunker import make_token_counter
+
+
+logger = logging.getLogger(__name__)
+
+# (chunk_id, text, metadata)
+Chunk = Tuple[str, str, Dict[str, Any]]
+# writer(ids, texts, metadatas, embeddings)
+ChunkWriter = Callable[[List[str], List[str], List[Dict[str, Any]], List[List[float]]], None]
+
+
+class EmbeddingBatchError(Exception):
+    """배치 재시도를 모두 소진한 경우"""
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """OpenAI 429 응답 여부 판별"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    name = type(error).__name__
+    message = str(error).lower()
+    return name == "RateLimitError" or "429" in message or "rate limit" in message
+
+
+class TokenBucket:
+    """분당 용량 기반 토큰 버킷 (연속 충전)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float, scale: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate * scale)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float, scale: float) -> float:
+        """amount 만큼 꺼내는 데 필요한 대기 시간 (0이면 즉시 차감)"""
+        self._refill(now, scale)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / (self.rate * scale)
+
+
+class AdaptiveRateLimiter:
+    """RPM/TPM 토큰 버킷 + 429 응답 시 속도를 줄이는 적응형 제한기 (AIMD)"""
+
+    MIN_SCALE = 0.1
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.scale = 1.0
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, token_count: int):
+        """요청 1건 + token_count 토큰을 쓸 수 있을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self.paused_until - now
+                if wait <= 0:
+                    wait = self.requests.wait_time(1, now, self.scale)
+                    if wait <= 0:
+                        wait = self.tokens.wait_time(token_count, now, self.scale)
+                        if wait > 0:
+                            # 요청 버킷 차감분 반환
+                            self.requests.tokens += 1
+                    if wait <= 0:
+                        return
+            time.sleep(min(wait, 5.0))
+
+    def on_success(self):
+        with self._lock:
+            self.scale = min(1.0, self.scale + 0.05)
+
+    def on_rate_limited(self, retry_after: float):
+        """429 수신 시 전체 작업자 일시 정지 + 처리 속도 절반으로 감소"""
+        with self._lock:
+            self.scale = max(self.MIN_SCALE, self.scale / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        logger.warning(f"임베딩 API rate limit - {retry_after:.1f}초 대기, 속도 배율 {self.scale:.2f}")
+
+
+class _EndOfStream:
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+def prefetch(items: Iterable, maxsize: int) -> Iterator:
+    """
+    items를 별도 스레드에서 미리 꺼내 bounded queue로 전달 (생산 측 파싱과 소비 측 임베딩을 겹침)
+    큐 크기가 메모리 상한, 생산 측 예외는 소비 측에서 다시 발생
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_EndOfStream(e))
+        else:
+            put(_EndOfStream())
+
+    producer = threading.Thread(target=produce, name="chunk-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, _EndOfStream):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+    finally:
+        # 소비 측이 먼저 끝나도 생산 스레드가 큐에서 멈춰 있지 않도록 정리
+        stop.set()
+        producer.join()
+
+
+@dataclass
+class IngestionResult:
+    total_chunks: int = 0
+    written_chunks: int = 0
+    total_tokens: int = 0
+    failed_ids: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    # 시작부터 첫 배치를 임베딩 작업자에 넘기기까지 걸린 시간
+    first_batch_seconds: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_failed(self, ids: Iterable[str]):
+        with self._lock:
+            self.failed_ids.extend(ids)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed_ids and self.written_chunks == self.total_chunks
+
+
+class EmbeddingIngestionPipeline:
+    """배치 구성 → 동시 임베딩(제한기 적용, 재시도) → 단일 writer 저장 파이프라인"""
+
+    def __init__(
+        self,
+        embedding,
+        writer: ChunkWriter,
+        max_workers: int = 4,
+        requests_per_minute: float = 3000,
+        tokens_per_minute: float = 1_000_000,
+        batch_size: int = 50,
+        max_tokens_per_batch: int = 50_000,
+        max_retries: int = 5,
+        base_backoff: float = 2.0,
+        token_counter: Optional[Callable[[str], int]] = None,
+        prefetch_chunks: int = 1000,
+    ):
+        self.embedding = embedding
+        self.writer = writer
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.limiter = AdaptiveRateLimiter(requests_per_minute, tokens_per_minute)
+        self.token_counter = token_counter or make_token_counter()
+        self.prefetch_chunks = prefetch_chunks
+
+    # -------------------------
+    # Stage 1: 배치 구성
+    # -------------------------
+    def _iter_batches(self, chunks: Iterable[Chunk], result: IngestionResult):
+        batch: List[Chunk] = []
+        batch_tokens = 0
+        for chunk in chunks:
+            chunk_id, text, metadata = chunk
+            text_tokens = metadata.get("token_count") or self.token_counter(text)
+            result.total_chunks += 1
+            result.total_tokens += text_tokens
+
+            if batch and (batch_tokens + text_tokens > self.max_tokens_per_batch or len(batch) >= self.batch_size):
+                yield batch, batch_tokens
+                batch, batch_tokens = [], 0
+
+            batch.append(chunk)
+            batch_tokens += text_tokens
+
+        if batch:
+            yield batch, batch_tokens
+
+    # -------------------------
+    # Stage 2: 임베딩 (작업자 스레드)
+    # -------------------------
+    def _embed_batch(self, batch: List[Chunk], batch_tokens: int) -> List[List[float]]:
+        texts = [text for _, text, _ in batch]
+        for attempt in range(1, self.max_retries + 1):
+            self.limiter.acquire(batch_tokens)
+            try:
+                embeddings = self.embedding.embed_documents(texts)
+                self.limiter.on_success()
+                return embeddings
+            except Exception as e:
+                backoff = self.base_backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25)
+                if is_rate_limit_error(e):
+                    self.limiter.on_rate_limited(backoff)
+                elif attempt < self.max_retries:
+                    logger.warning(f"임베딩 배치 실패 (시도 {attempt}/{self.max_retries}): {e}")
+                    time.sleep(backoff)
+                if attempt == self.max_retries:
+                    raise EmbeddingBatchError(f"배치 임베딩 재시도 초과: {e}") from e
+        return []
+
+    # -------------------------
+    # Stage 3: 저장 (단일 writer 스레드)
+    # -------------------------
+    def _writer_loop(self, write_queue: "queue.Queue", result: IngestionResult,
+                     progress: Optional[Callable[[IngestionResult], None]], errors: List[BaseException]):
+        while True:
+            item = write_queue.get()
+            if item is None:
+                break
+            batch, embeddings = item
+            ids = [chunk_id for chunk_id, _, _ in batch]
+            if errors:
+                # writer 오류 이후 배치는 저장하지 않고 큐만 비움 (작업자가 put에서 멈추지 않도록)
+                result.add_failed(ids)
+                continue
+            try:
+                for attempt in range(1, self.max_retries + 1):
+                    try:
+                        self.writer(ids, [text for _, text, _ in batch], [meta for _, _, meta in batch], embeddings)
+                        result.written_chunks += len(batch)
+                        break
+                    except Exception as e:
+                        logger.warning(f"벡터 DB 저장 실패 (시도 {attempt}/{self.max_retries}): {e}")
+                        if attempt == self.max_retries:
+                            result.add_failed(ids)
+                        else:
+                            time.sleep(self.base_backoff)
+            except BaseException as e:
+                logger.error(f"writer 스레드 오류 - 이후 배치는 저장하지 않습니다: {e!r}")
+                errors.append(e)
+                result.add_failed(ids)
+                continue
+            if progress:
+                try:
+                    progress(result)
+                except Exception as e:
+                    logger.warning(f"진행 상황 콜백 실패 (저장은 계속 진행): {e}")
+
+    def run(self, chunks: Iterable[Chunk], progress: Optional[Callable[[IngestionResult], None]] = None) -> IngestionResult:
+        result = IngestionResult()
+        start = time.time()
+
+        write_queue: "queue.Queue" = queue.Queue(maxsize=self.max_workers * 2)
+        writer_errors: List[BaseException] = []
+        writer_thread = threading.Thread(
+            target=self._writer_loop, args=(write_queue, result, progress, writer_errors), daemon=True
+        )
+        writer_thread.start()
+
+        # 동시에 진행 중인 배치 수 제한 (메모리 상한)
+        in_flight = threading.BoundedSemaphore(self.max_workers * 2)
+
+        def embed_and_enqueue(batch: List[Chunk], batch_tokens: int):
+            try:
+                embeddings = self._embed_batch(batch, batch_tokens)
+                write_queue.put((batch, embeddings))
+            except Exception as e:
+                logger.error(f"임베딩 배치 최종 실패 ({len(batch)}개 청크): {e}")
+                result.add_failed(chunk_id for chunk_id, _, _ in batch)
+            finally:
+                in_flight.release()
+
+        prefetched = prefetch(chunks, self.prefetch_chunks) if self.prefetch_chunks else None
+        if prefetched is not None:
+            chunks = prefetched
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embed") as executor:
+                for batch, batch_tokens in self._iter_batches(chunks, result):
+                    if writer_errors:
+                        break
+                    in_flight.acquire()
+                    if result.first_batch_seconds is None:
+                        result.first_batch_seconds = time.time() - start
+                    executor.submit(embed_and_enqueue, batch, batch_tokens)
+        finally:
+            if prefetched is not None:
+                prefetched.close()
+            write_queue.put(None)
+            writer_thread.join()
+
+        if writer_errors:
+            raise writer_errors[0]
+        result.elapsed = time.time() - start
+        return result
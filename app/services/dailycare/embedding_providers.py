@@ -0,0 +1,122 @@
+import zlib
+from abc import abstractmethod
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+# 모델별 기본 차원 (dimensions 미지정 시)
+OPENAI_MODEL_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+# 네임스페이스 도입 전 캐시 키(md5(text))를 그대로 쓰는 기본 모델
+LEGACY_CACHE_NAMESPACE = "openai:text-embedding-ada-002:1536"
+# 임베딩 정보가 기록되기 전에 만들어진 콜렉션의 모델
+LEGACY_SIGNATURE = {"provider": "openai", "model": "text-embedding-ada-002", "dimensions": 1536}
+
+
+class EmbeddingProvider(Embeddings):
+    """임베딩 제공자 공통 인터페이스 (캐시 래퍼 아래에 위치)"""
+
+    provider_name: str = ""
+
+    @property
+    @abstractmethod
+    def model_name(self) -> str:
+        ...
+
+    @property
+    @abstractmethod
+    def dimensions(self) -> int:
+        ...
+
+    @property
+    def cache_namespace(self) -> str:
+        """캐시 키 네임스페이스 (모델/차원이 다르면 캐시를 공유하지 않음)"""
+        return f"{self.provider_name}:{self.model_name}:{self.dimensions}"
+
+    def signature(self) -> Dict[str, Any]:
+        """콜렉션 매니페스트에 기록하는 임베딩 정보 (다르면 같은 콜렉션에 섞지 않음)"""
+        return {"provider": self.provider_name, "model": self.model_name, "dimensions": self.dimensions}
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """langchain OpenAIEmbeddings 래퍼"""
+
+    provider_name = "openai"
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        if getattr(embeddings, "dimensions", None) and self.model_name == "text-embedding-ada-002":
+            raise ValueError("text-embedding-ada-002는 차원 축소(EMBEDDING_DIMENSIONS)를 지원하지 않습니다.")
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.embeddings, "model", None) or "text-embedding-ada-002"
+
+    @property
+    def dimensions(self) -> int:
+        return getattr(self.embeddings, "dimensions", None) or OPENAI_MODEL_DIMENSIONS.get(self.model_name, 1536)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+
+class HashedNgramEmbeddingProvider(EmbeddingProvider):
+    """
+    로컬 결정적 임베딩: 문자 n-gram을 고정 차원으로 해싱한 TF 벡터 (NumPy)
+    - 네트워크/다운로드 없음, 프로세스와 무관하게 같은 입력 → 같은 벡터
+    - IDF는 코퍼스 통계 대신 n-gram 길이 가중치로 대체 (코퍼스가 바뀌어도 기존 벡터 유효)
+    - 부호 해싱으로 버킷 충돌 편향 완화, sublinear TF, L2 정규화
+    """
+
+    provider_name = "local"
+
+    def __init__(self, dimensions: int = 512, ngram_range: Tuple[int, int] = (2, 4)):
+        self._dimensions = dimensions
+        self.ngram_range = ngram_range
+        # 긴 n-gram일수록 희소하고 변별력이 높으므로 가중
+        self._ngram_weights = {n: 1.0 + 0.5 * (n - ngram_range[0]) for n in range(ngram_range[0], ngram_range[1] + 1)}
+
+    @property
+    def model_name(self) -> str:
+        return f"hashed-char-ngram-{self.ngram_range[0]}-{self.ngram_range[1]}"
+
+    @property
+    def dimensions(self) -> int:
+        return self._dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        normalized = " ".join(text.lower().replace("\\n", " ").split())
+        buckets: List[int] = []
+        weights: List[float] = []
+        for n, weight in self._ngram_weights.items():
+            for i in range(len(normalized) - n + 1):
+                gram = normalized[i:i + n]
+                if gram.isspace():
+                    continue
+                h = zlib.crc32(gram.encode("utf-8"))
+                buckets.append(h % self._dimensions)
+                weights.append(weight if (h >> 31) & 1 else -weight)
+
+        if not buckets:
+            return [0.0] * self._dimensions
+
+        vector = np.bincount(np.array(buckets), weights=np.array(weights), minlength=self._dimensions)
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        return vector.astype(np.float32).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,223 @@
+import os
+import time
+import pickle
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Iterable
+
+import numpy as np
+
+from app.services.dailycare.quantization import QUANTIZATION_INT8, quantize_int8, dequantize_int8
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """SQLite 단일 파일 임베딩 저장소 (다건 조회/저장, LRU 용량 제한)
+
+    - 벡터는 float32 BLOB으로 저장 (quantization="int8"이면 scale/offset + int8 코드, 약 1/4 크기)
+    - 읽을 때는 BLOB 길이로 형식을 구분하므로 두 형식이 섞여 있어도 됨
+    - last_access 기준으로 오래된 항목부터 정리
+    - 조회는 쓰기 잠금을 잡지 않음: last_access는 touch_interval(기본 하루)보다 오래된 항목만 메모리에 모았다가
+      저장/정리 트랜잭션에서 함께 갱신 (LRU는 touch_interval 단위 근사)
+    - WAL 모드로 여러 프로세스가 동시에 읽고 쓸 수 있음
+    - 저장할 때마다 COUNT(*)를 세지 않음: 열 때 센 행 수에 저장 건수를 더한 추정치(덮어쓰기도 +1로 계산해 실제보다 크거나 같음)가
+      상한을 넘을 때만 다시 세어 정리 (다른 프로세스가 추가한 행은 다음 재계산 때 반영)
+    """
+
+    SQLITE_BATCH = 500          # IN (...) 절 하나에 넣을 최대 키 수
+    EVICT_SLACK = 0.1           # 상한을 10% 넘으면 정리
+    TOUCH_FLUSH_SIZE = 1000     # 모인 last_access 갱신이 이만큼이면 저장을 기다리지 않고 반영
+
+    def __init__(self, db_path: str, max_entries: int = 200_000, quantization: str = None,
+                 touch_interval: float = 86400):
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.quantize = quantization == QUANTIZATION_INT8
+        self.touch_interval = touch_interval
+        # 아직 반영하지 않은 last_access 갱신 (키 → 시각)
+        self._pending_touches: Dict[str, float] = {}
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        # 행 수 추정치 (정리 판단용)
+        self._estimated_count = self._count_rows()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count_rows()
+
+    def _count_rows(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
+
+    # -------------------------
+    # 조회 / 저장
+    # -------------------------
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """키 목록에 대해 캐시된 임베딩만 반환 (없는 키는 결과에서 제외)"""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        if not keys:
+            return found
+
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), self.SQLITE_BATCH):
+                batch = keys[i:i + self.SQLITE_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, dim, vector, last_access FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, dim, blob, last_access in rows:
+                    found[key] = self._decode(dim, blob).tolist()
+                    if now - last_access >= self.touch_interval:
+                        self._pending_touches[key] = now
+
+            if len(self._pending_touches) >= self.TOUCH_FLUSH_SIZE:
+                self._flush_touches()
+                self._conn.commit()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """여러 임베딩을 한 트랜잭션으로 저장"""
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+        for key, embedding in items.items():
+            vector = np.asarray(embedding, dtype=np.float32)
+            rows.append((key, int(vector.shape[0]), self._encode(vector), now))
+
+        with self._lock:
+            self._flush_touches()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+            self._estimated_count += len(rows)
+            if self._estimated_count > self.max_entries * (1 + self.EVICT_SLACK):
+                self._estimated_count = self._count_rows()
+                if self._estimated_count > self.max_entries * (1 + self.EVICT_SLACK):
+                    self._evict(self._estimated_count - self.max_entries)
+
+    def _encode(self, vector: np.ndarray) -> bytes:
+        if not self.quantize:
+            return vector.tobytes()
+        codes, scales, offsets = quantize_int8(vector)
+        return np.array([scales[0], offsets[0]], dtype=np.float32).tobytes() + codes.tobytes()
+
+    def round_trip(self, embedding: List[float]) -> List[float]:
+        """저장 후 다시 읽었을 때의 값 (양자화하지 않으면 그대로)"""
+        if not self.quantize:
+            return embedding
+        vector = np.asarray(embedding, dtype=np.float32)
+        return self._decode(len(vector), self._encode(vector)).tolist()
+
+    @staticmethod
+    def _decode(dim: int, blob: bytes) -> np.ndarray:
+        """float32(4*dim 바이트) / int8(8 + dim 바이트) BLOB 복원"""
+        if len(blob) == 4 * dim:
+            return np.frombuffer(blob, dtype=np.float32)
+        scale, offset = np.frombuffer(blob[:8], dtype=np.float32)
+        codes = np.frombuffer(blob[8:], dtype=np.int8)
+        return dequantize_int8(codes, np.array([scale]), np.array([offset]))[0]
+
+    # -------------------------
+    # 용량 관리
+    # -------------------------
+    def _flush_touches(self):
+        """모아 둔 last_access 갱신을 현재 트랜잭션에 추가 (lock 보유 상태에서 호출, commit은 호출한 쪽에서)"""
+        if not self._pending_touches:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET last_access = ? WHERE key = ? AND last_access < ?",
+            [(at, key, at) for key, at in self._pending_touches.items()],
+        )
+        self._pending_touches.clear()
+
+    def _evict(self, n: int):
+        """가장 오래 사용되지 않은 n개 삭제 (lock 보유 상태에서 호출)"""
+        if n <= 0:
+            return
+        self._flush_touches()
+        deleted = self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (n,),
+        ).rowcount
+        self._conn.commit()
+        self._estimated_count = max(0, self._estimated_count - deleted)
+        logger.info(f"임베딩 캐시 LRU 정리: {n}개 삭제")
+
+    def compact(self):
+        """상한 초과분 정리 후 파일 크기 축소 (VACUUM)"""
+        with self._lock:
+            self._estimated_count = self._count_rows()
+            self._evict(self._estimated_count - self.max_entries)
+            self._conn.execute("VACUUM")
+
+    # -------------------------
+    # 기존 pickle 캐시 이관
+    # -------------------------
+    def import_pickle_dir(self, cache_dir: str, batch_size: int = 1000) -> int:
+        """`<md5>.pkl` 파일 캐시를 가져오기 (파일명이 곧 캐시 키)"""
+        if not os.path.isdir(cache_dir):
+            return 0
+
+        imported = 0
+        batch: Dict[str, List[float]] = {}
+        for entry in os.scandir(cache_dir):
+            if not entry.is_file() or not entry.name.endswith(".pkl"):
+                continue
+            try:
+                with open(entry.path, "rb") as f:
+                    batch[entry.name[:-4]] = pickle.load(f)
+            except Exception as e:
+                logger.warning(f"pickle 캐시 이관 실패 ({entry.name}): {e}")
+                continue
+
+            if len(batch) >= batch_size:
+                self.put_many(batch)
+                imported += len(batch)
+                batch = {}
+
+        if batch:
+            self.put_many(batch)
+            imported += len(batch)
+
+        logger.info(f"pickle 임베딩 캐시 {imported}개 이관 완료 ({cache_dir})")
+        return imported
+
+    def get_meta(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
@@ -0,0 +1,272 @@
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+try:
+    import fcntl
+except ImportError:  # Windows: 잠금 없이 동작
+    fcntl = None
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# 청크 생성 방식(파싱/청킹/메타데이터)이 바뀌면 올려서 전체 재색인을 유도
+INGESTION_SCHEMA_VERSION = 5
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_content_hash(text: str, metadata: Dict[str, Any]) -> str:
+    """청크 본문 + 메타데이터 해시 (메타데이터만 바뀌어도 upsert 대상)"""
+    payload = text + "\x00" + json.dumps(metadata, sort_keys=True, ensure_ascii=False)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def write_json_atomic(path: Path, data: Any):
+    """임시 파일에 쓴 뒤 os.replace로 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class EmbeddingMismatchError(Exception):
+    """콜렉션을 만든 임베딩 모델/차원과 현재 설정이 다름 (재색인 마이그레이션 필요)"""
+
+    def __init__(self, collection_name: str, recorded: Dict[str, Any], current: Dict[str, Any]):
+        self.collection_name = collection_name
+        self.recorded = recorded
+        self.current = current
+        super().__init__(
+            f"{collection_name}: 콜렉션 임베딩 {recorded.get('model')}({recorded.get('dimensions')}차원)과 "
+            f"현재 설정 {current.get('model')}({current.get('dimensions')}차원)이 다릅니다."
+        )
+
+
+@dataclass
+class CollectionSyncResult:
+    """sync 1회의 변경 내역"""
+    store: Any = None
+    reset: bool = False
+    deleted_ids: List[str] = field(default_factory=list)
+    upserted: List[Tuple[str, str, Dict[str, Any]]] = field(default_factory=list)
+    failed_ids: List[str] = field(default_factory=list)
+    expected_count: int = 0
+    # 중단된 이전 빌드의 체크포인트로 건너뛴 청크 수
+    resumed: int = 0
+
+    @property
+    def written(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        failed = set(self.failed_ids)
+        return [chunk for chunk in self.upserted if chunk[0] not in failed]
+
+
+class IndexManifest:
+    """콜렉션별 원본 파일 해시/mtime과 청크 ID → 내용 해시 기록
+
+    {
+      "schema_version": <INGESTION_SCHEMA_VERSION>,
+      "embedding": {"provider": "openai", "model": "...", "dimensions": 1536},
+      "settings": {"chunk_max_tokens": 1000, "chunk_overlap_tokens": 100,
+                   "dedup_threshold": 0.85, "dedup_window": 256, "dedup_version": <COLLAPSE_VERSION>},
+      "files": {
+        "<상대경로>": {"sha256": "...", "mtime": 0.0, "size": 0, "chunks": {"<chunk_id>": "<content_hash>"}}
+      }
+    }
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.schema_version: Optional[int] = None
+        self.embedding: Optional[Dict[str, Any]] = None
+        self.settings: Optional[Dict[str, Any]] = None
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    @property
+    def is_current(self) -> bool:
+        return self.schema_version == INGESTION_SCHEMA_VERSION
+
+    def load(self) -> "IndexManifest":
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self.files = data.get("files", {})
+                self.schema_version = data.get("schema_version")
+                self.embedding = data.get("embedding")
+                self.settings = data.get("settings")
+            except Exception as e:
+                logger.warning(f"매니페스트 로드 실패, 새로 작성합니다 ({self.path}): {e}")
+                self.files, self.schema_version, self.embedding, self.settings = {}, None, None, None
+        return self
+
+    def save(self):
+        self.schema_version = INGESTION_SCHEMA_VERSION
+        data = {"schema_version": self.schema_version, "files": self.files}
+        if self.embedding:
+            data["embedding"] = self.embedding
+        if self.settings:
+            data["settings"] = self.settings
+        write_json_atomic(self.path, data)
+
+    def reset(self):
+        self.files = {}
+        self.schema_version = None
+        self.embedding = None
+        self.settings = None
+
+    def is_unchanged(self, rel_path: str, stat: os.stat_result) -> bool:
+        """mtime/크기가 같으면 해시 계산 없이 변경 없음으로 판단"""
+        entry = self.files.get(rel_path)
+        return bool(entry) and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size
+
+    def chunk_hashes(self, rel_path: str) -> Dict[str, str]:
+        return dict(self.files.get(rel_path, {}).get("chunks", {}))
+
+    def all_chunk_ids(self) -> List[str]:
+        return [chunk_id for entry in self.files.values() for chunk_id in entry.get("chunks", {})]
+
+    def record_file(self, rel_path: str, sha256: str, stat: os.stat_result, chunks: Dict[str, str]):
+        self.files[rel_path] = {"sha256": sha256, "mtime": stat.st_mtime, "size": stat.st_size, "chunks": chunks}
+
+    def touch_file(self, rel_path: str, stat: os.stat_result):
+        """내용은 같고 mtime만 바뀐 파일"""
+        self.files[rel_path]["mtime"] = stat.st_mtime
+        self.files[rel_path]["size"] = stat.st_size
+
+    def remove_file(self, rel_path: str):
+        self.files.pop(rel_path, None)
+
+
+class ParsedChunkCache:
+    """파일 해시별 파싱 결과 캐시 (같은 내용의 파일은 다시 파싱하지 않음)"""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, sha256: str) -> Path:
+        return self.cache_dir / f"{sha256}_v{INGESTION_SCHEMA_VERSION}.json"
+
+    def get(self, sha256: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._path(sha256)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"파싱 캐시 로드 실패 ({path.name}): {e}")
+            return None
+
+    def put(self, sha256: str, chunks: List[Dict[str, Any]]):
+        try:
+            write_json_atomic(self._path(sha256), chunks)
+        except Exception as e:
+            logger.warning(f"파싱 캐시 저장 실패: {e}")
+
+
+class BuildCheckpoint:
+    """
+    진행 중인 빌드에서 저장이 끝난 청크 ID → 내용 해시 기록 (한 줄에 "id\thash", 추가만 함)
+    - 매니페스트는 동기화가 끝나야 저장되므로, 중간에 중단되면 이 기록으로 이미 저장된 청크를 건너뜀
+    - 매니페스트 저장 후 삭제
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.chunks: Dict[str, str] = {}
+        self._tracked: Dict[str, str] = {}
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def load(self) -> "BuildCheckpoint":
+        self.chunks = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    chunk_id, _, chunk_hash = line.rstrip("\n").partition("\t")
+                    # 중단 시점에 반쯤 쓰인 마지막 줄은 무시
+                    if chunk_id and len(chunk_hash) == 32:
+                        self.chunks[chunk_id] = chunk_hash
+        return self
+
+    def track(self, chunk_id: str, chunk_hash: str):
+        """저장 예정 청크의 내용 해시 (commit 시 함께 기록)"""
+        self._tracked[chunk_id] = chunk_hash
+
+    def commit(self, chunk_ids: List[str]):
+        """저장소에 반영(flush)된 청크 기록"""
+        lines = [f"{chunk_id}\t{self._tracked.pop(chunk_id)}\n" for chunk_id in chunk_ids if chunk_id in self._tracked]
+        if not lines:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        self.chunks = {}
+        self._tracked = {}
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class BuildLock:
+    """
+    콜렉션 빌드 배타 잠금 (manifests/<콜렉션>.lock 파일에 flock)
+    - 웹 프로세스의 백그라운드 준비와 CLI 빌드가 같은 콜렉션/매니페스트/체크포인트를 동시에 쓰지 않도록
+    - 프로세스가 죽으면 OS가 잠금을 풀어 줌
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a")
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if not blocking:
+                self._file.close()
+                self._file = None
+                return False
+        logger.info(f"다른 프로세스가 빌드 중입니다. 끝날 때까지 대기합니다: {self.path.name}")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "BuildLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple, TextIO
+
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class _Reader:
+    """텍스트 스트림을 조금씩 읽어 버퍼에 붙이는 커서 (소비한 앞부분은 주기적으로 잘라냄)"""
+
+    def __init__(self, fp: TextIO, read_size: int):
+        self.fp = fp
+        self.read_size = read_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """더 읽은 내용이 있으면 True"""
+        if self.eof:
+            return False
+        data = self.fp.read(self.read_size)
+        if not data:
+            self.eof = True
+            return False
+        if self.pos > self.read_size:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        self.buf += data
+        return True
+
+    def peek(self) -> Optional[str]:
+        """공백을 건너뛴 다음 문자 (끝이면 None)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return None
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+
+def iter_json_items(fp: TextIO, read_size: int = 1 << 16) -> Iterator[Tuple[Optional[int], Any]]:
+    """
+    최상위가 배열이면 (index, item)을 하나씩 파싱해 반환 (파일 전체를 메모리에 올리지 않음)
+    배열이 아니면 전체를 파싱해 (None, value) 하나만 반환
+    형식 오류는 json.JSONDecodeError
+    """
+    reader = _Reader(fp, read_size)
+    if reader.peek() != "[":
+        rest = reader.buf[reader.pos:] + fp.read()
+        yield None, json.loads(rest)
+        return
+
+    decoder = json.JSONDecoder()
+    reader.pos += 1
+    if reader.peek() == "]":
+        return
+
+    index = 0
+    while True:
+        if reader.peek() is None:
+            raise reader.error("배열이 닫히지 않았습니다")
+        try:
+            item, end = decoder.raw_decode(reader.buf, reader.pos)
+        except json.JSONDecodeError:
+            # 항목이 버퍼 경계에 걸린 경우 더 읽고 재시도
+            if reader.fill():
+                continue
+            raise
+        if not reader.eof and (end == len(reader.buf) or reader.buf[end] in _NUMBER_CHARS):
+            # 숫자가 버퍼 경계에서 잘렸을 수 있으므로 뒤를 더 읽고 다시 파싱
+            reader.fill()
+            continue
+
+        reader.pos = end
+        yield index, item
+        index += 1
+
+        separator = reader.peek()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise reader.error("배열 항목 구분자(,)가 필요합니다")
+        reader.pos += 1
+
+
+def iter_json_file(path: Path, read_size: int = 1 << 16) -> Iterator[Tuple[Optional[int], Any]]:
+    with open(path, encoding="utf-8") as fp:
+        yield from iter_json_items(fp, read_size)
@@ -0,0 +1,218 @@
+import re
+import math
+import heapq
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+from langchain_core.documents import Document
+
+
+# 한국어 조사/어미 (긴 것부터 매칭)
+KOREAN_PARTICLES = sorted({
+    '으로써', '으로서', '에서는', '에게서', '이라고', '이라는', '에서도', '까지는', '부터는',
+    '에서', '에게', '한테', '까지', '부터', '으로', '이나', '이랑', '처럼', '보다', '만큼',
+    '하고', '에는', '에도', '으론', '이며', '이고', '라고', '라는', '인데', '은요', '는요',
+    '은', '는', '이', '가', '을', '를', '에', '의', '와', '과', '도', '로', '만', '나', '요',
+}, key=len, reverse=True)
+
+STOP_WORDS = {
+    '은', '는', '이', '가', '을', '를', '에', '의', '와', '과', '도', '로', '으로',
+    '알려줘', '알려주세요', '어떻게', '무엇', '뭐야', '뭔가요', '있나요', '있어', '좋아',
+    '해야', '하나요', '할까요', '되나요', '주세요', '그리고', '또는',
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+}
+
+# '이'로 시작하는 조사 (받침 있는 말 뒤에만 붙음)
+_I_PARTICLES = {p for p in KOREAN_PARTICLES if p.startswith('이')}
+
+# 받침 있는 글자 + '이'로 끝나는 명사 (끝의 '이'를 조사로 떼지 않음)
+NOUNS_ENDING_IN_I = {
+    '고양이', '먹이', '놀이', '털갈이', '길이', '높이', '깊이', '넓이', '물갈이', '목걸이',
+    '젖먹이',
+}
+
+_HANGUL_RE = re.compile(r'[가-힣]')
+_NON_WORD_RE = re.compile(r'[^\w\s가-힣]')
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Chroma where 필터(동등 비교 + $and/$or/$eq/$ne/$in)를 메타데이터에 적용"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def _has_final_consonant(char: str) -> bool:
+    """한글 음절의 받침 여부"""
+    return '가' <= char <= '힣' and (ord(char) - ord('가')) % 28 != 0
+
+
+class KoreanTokenizer:
+    """조사 제거 + 문자 n-gram 기반 한국어 토크나이저"""
+
+    def __init__(self, ngram_size: int = 2, min_ngram_word_len: int = 3):
+        self.ngram_size = ngram_size
+        self.min_ngram_word_len = min_ngram_word_len
+
+    def strip_particle(self, word: str) -> str:
+        """
+        어절 끝의 조사를 하나 제거 (남는 어간이 2글자 이상일 때만)
+        - '이'로 시작하는 조사는 받침 있는 어간 뒤에서만, '고양이'처럼 '이'로 끝나는 명사는 제외
+        """
+        if not _HANGUL_RE.search(word[-1:]):
+            return word
+        for particle in KOREAN_PARTICLES:
+            if not word.endswith(particle) or len(word) - len(particle) < 2:
+                continue
+            stem = word[:-len(particle)]
+            if particle in _I_PARTICLES and (not _has_final_consonant(stem[-1]) or stem + '이' in NOUNS_ENDING_IN_I):
+                continue
+            return stem
+        return word
+
+    def tokenize(self, text: str) -> List[str]:
+        if not text:
+            return []
+
+        # 소문자 변환 및 특수문자 제거 (이스케이프된 줄바꿈 포함)
+        text = _NON_WORD_RE.sub(' ', text.replace('\\n', ' ').lower())
+
+        tokens: List[str] = []
+        for word in text.split():
+            # 불용어는 조사 제거 전/후 모두 확인 ('알려주세요'가 '알려주세'로 남지 않도록)
+            if word in STOP_WORDS:
+                continue
+            word = self.strip_particle(word)
+            if len(word) < 2 or word in STOP_WORDS:
+                continue
+            tokens.append(word)
+
+            # 한글 어절은 n-gram을 추가해 복합어/띄어쓰기 차이를 흡수
+            if len(word) >= self.min_ngram_word_len and _HANGUL_RE.search(word):
+                n = self.ngram_size
+                tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+        return tokens
+
+
+class BM25Index:
+    """콜렉션 단위 인메모리 BM25 역색인"""
+
+    def __init__(self, tokenizer: Optional[KoreanTokenizer] = None, k1: float = 1.5, b: float = 0.75):
+        self.tokenizer = tokenizer or KoreanTokenizer()
+        self.k1 = k1
+        self.b = b
+
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_ids: List[Optional[str]] = []
+        self._docs: List[Optional[Document]] = []
+        self._doc_lengths: List[int] = []
+        self._id_to_slot: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._id_to_slot)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._id_to_slot
+
+    @property
+    def avg_doc_length(self) -> float:
+        return self._total_length / len(self) if len(self) else 0.0
+
+    def add_documents(self, ids: Iterable[str], documents: Iterable[Document]):
+        """문서 추가 (같은 ID가 있으면 교체)"""
+        with self._lock:
+            for doc_id, doc in zip(ids, documents):
+                if doc_id in self._id_to_slot:
+                    self._remove_slot(self._id_to_slot[doc_id])
+
+                term_freqs = Counter(self.tokenizer.tokenize(doc.page_content))
+                slot = len(self._doc_ids)
+                self._doc_ids.append(doc_id)
+                self._docs.append(doc)
+                length = sum(term_freqs.values())
+                self._doc_lengths.append(length)
+                self._id_to_slot[doc_id] = slot
+                self._total_length += length
+
+                for term, tf in term_freqs.items():
+                    self._postings.setdefault(term, {})[slot] = tf
+
+    def remove_documents(self, ids: Iterable[str]):
+        with self._lock:
+            for doc_id in ids:
+                slot = self._id_to_slot.get(doc_id)
+                if slot is not None:
+                    self._remove_slot(slot)
+
+    def _remove_slot(self, slot: int):
+        doc = self._docs[slot]
+        for term in set(self.tokenizer.tokenize(doc.page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[term]
+
+        self._total_length -= self._doc_lengths[slot]
+        del self._id_to_slot[self._doc_ids[slot]]
+        self._doc_ids[slot] = None
+        self._docs[slot] = None
+        self._doc_lengths[slot] = 0
+
+    def get(self, doc_id: str) -> Optional[Document]:
+        slot = self._id_to_slot.get(doc_id)
+        return self._docs[slot] if slot is not None else None
+
+    def items(self) -> List[Tuple[str, Document]]:
+        """색인된 (doc_id, Document) 전체"""
+        with self._lock:
+            return [(doc_id, self._docs[slot]) for doc_id, slot in self._id_to_slot.items()]
+
+    def search(self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, Document, float]]:
+        """BM25 점수 상위 k개 (doc_id, Document, score) 반환 (where: 메타데이터 필터)"""
+        query_terms = set(self.tokenizer.tokenize(query))
+        if not query_terms:
+            return []
+
+        with self._lock:
+            n_docs = len(self)
+            if n_docs == 0:
+                return []
+            avgdl = self.avg_doc_length or 1.0
+
+            scores: Dict[int, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for slot, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[slot] / avgdl)
+                    scores[slot] = scores.get(slot, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            if where:
+                scores = {slot: score for slot, score in scores.items() if matches_where(self._docs[slot].metadata, where)}
+            top = heapq.nlargest(k, scores.items(), key=lambda x: x[1])
+            return [(self._doc_ids[slot], self._docs[slot], score) for slot, score in top]
@@ -0,0 +1,314 @@
+import re
+import time
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+
+from langchain_core.documents import Document
+
+from config import Config
+from app.services.dailycare.json_stream import iter_json_file
+from app.services.dailycare.keyword_index import KoreanTokenizer
+from app.services.dailycare.product_name_index import ProductNameIndex, normalize_name
+
+
+logger = logging.getLogger(__name__)
+
+# 원본 JSON은 줄바꿈이 \n 문자열로 이스케이프되어 있어 실제 줄바꿈으로 바꿔서 파싱
+_INGREDIENT_BLOCK = re.compile(r"(?:^|\n)\s*(?:주요 원료약품|주성분|성분)\s*:\s*\n(.*?)(?=\n\s*\n|$)", re.DOTALL)
+_INGREDIENT_LINE = re.compile(r"^\s*[•\-*]\s*(.+?)(?::\s*[^:]*)?$")
+_INDICATION_BLOCK = re.compile(r"(?:효능효과|효능 및 효과)\s*:\s*(.*?)(?=\n\s*\n|$)", re.DOTALL)
+# "(세팔렉신으로서 250mg)" 같은 주성분 표기
+_ACTIVE_AS = re.compile(r"([가-힣A-Za-z]{2,})\s*으로서")
+# 백신 항원 표기 (바이러스/균주/사독 등) - "닭 전염성기관지염바이러스", "A/Chicken/Korea/..."의 동물 이름은 숙주/분리주라 알러지원이 아님
+_ANTIGEN_DESCRIPTOR = re.compile(
+    r"바이러스|virus|불활화|사독|생독|사균|생균|약독|항원|antigen|톡소이드|toxoid|독소|배양액|백신|vaccine|serotype|균주|\d\s*주|/",
+    re.IGNORECASE,
+)
+_NOT_INGREDIENTS = {"제품", "본제", "본품", "성분", "주성분"}
+# 효능효과 색인에서 뺄 일반 단어
+INDICATION_STOP_WORDS = {
+    "치료", "예방", "효과", "개선", "도움", "대상동물", "사용", "경우", "증상", "질병", "감염",
+    "고양이", "강아지", "반려견", "반려묘", "애견", "동물", "있음", "보조치료",
+}
+
+# 알러지 입력에서 떼어 낼 접미어 ("소고기 알러지" → 소)
+ALLERGEN_SUFFIXES = ("알러지", "알레르기", "성분", "고기")
+
+# 알러지원 → 성분 표기 (한글/영문 이름이 다른 흔한 알러지원)
+ALLERGEN_SYNONYMS: Dict[str, List[str]] = {
+    "닭": ["닭고기", "chicken", "치킨", "계육"],
+    "소": ["소고기", "쇠고기", "beef", "우육", "bovine"],
+    "돼지": ["돼지고기", "pork", "돈육", "porcine"],
+    "우유": ["milk", "유당", "lactose", "카제인", "casein"],
+    "계란": ["달걀", "egg", "난황", "난백"],
+    "대두": ["콩", "soy", "soybean"],
+    "밀": ["wheat", "글루텐", "gluten"],
+    "생선": ["fish", "어유"],
+    "페니실린": ["penicillin", "아목시실린", "amoxicillin", "amoxycillin", "암피실린", "ampicillin"],
+    "세팔로스포린": ["cephalosporin", "세팔렉신", "cephalexin", "세프퀴놈", "cefquinome", "세프티오퍼", "ceftiofur"],
+    "설파제": ["sulfa", "설파", "sulfonamide"],
+    "이버멕틴": ["ivermectin"],
+    "아세트아미노펜": ["acetaminophen", "paracetamol"],
+    "요오드": ["iodine", "포비돈요오드", "povidone"],
+}
+
+
+def _section_text(text: str) -> str:
+    return (text or "").replace("\\n", "\n")
+
+
+def parse_ingredients(text: str) -> List[str]:
+    """
+    성분 표기 목록 (원문 표기, 중복 제거)
+    - "주요 원료약품:"/"성분:" 목록, 본문의 "○○으로서"
+    - 제품명 괄호 안은 향/대상/약어 표기가 섞여 있어 쓰지 않음 (성분 표기가 없는 제품은 빈 목록)
+    """
+    text = _section_text(text)
+    names: List[str] = []
+    block = _INGREDIENT_BLOCK.search(text)
+    if block:
+        for line in block.group(1).splitlines():
+            match = _INGREDIENT_LINE.match(line)
+            if match:
+                names.append(match.group(1).strip())
+    names.extend(_ACTIVE_AS.findall(text))
+    return list(dict.fromkeys(name for name in names if name and name not in _NOT_INGREDIENTS))
+
+
+def is_antigen(name: str) -> bool:
+    """백신 항원(바이러스/균주) 표기인지 - 알러지 비교에서 제외"""
+    return bool(_ANTIGEN_DESCRIPTOR.search(name))
+
+
+def allergen_terms(allergen: str) -> Set[str]:
+    """
+    알러지원 하나를 성분과 비교할 정규화 표기 집합
+    - 접미어("알러지", "고기" 등)를 반복해서 떼고, 떼기 전/후 표기 중 하나라도 동의어 묶음에 있으면 묶음 전체 포함
+    """
+    forms = [normalize_name(allergen)]
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in ALLERGEN_SUFFIXES:
+            if forms[-1].endswith(suffix) and len(forms[-1]) > len(suffix):
+                forms.append(forms[-1][:-len(suffix)])
+                stripped = True
+                break
+    terms = {forms[-1]} if forms[-1] else set()
+    for key, synonyms in ALLERGEN_SYNONYMS.items():
+        group = {normalize_name(key), *(normalize_name(s) for s in synonyms)}
+        if group.intersection(forms):
+            terms |= group
+    return terms
+
+
+@dataclass
+class MedicationProduct:
+    document_id: str
+    product_name: str
+    company: Optional[str] = None
+    ingredients: List[str] = field(default_factory=list)
+
+
+@dataclass
+class AllergyConflict:
+    allergen: str
+    product_name: str
+    document_id: str
+    ingredients: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "allergen": self.allergen, "product_name": self.product_name,
+            "document_id": self.document_id, "ingredients": self.ingredients,
+        }
+
+
+class _TermIndex:
+    """단어 → 제품 ID 역색인 + 부분 일치 조회용 글자 1/2-gram → 단어 색인 (조회 시 어휘 전체를 훑지 않음)"""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def _query_grams(term: str) -> Set[str]:
+        return {term} if len(term) == 1 else {term[i:i + 2] for i in range(len(term) - 1)}
+
+    def add(self, term: str, document_id: str):
+        products = self.postings.get(term)
+        if products is None:
+            products = self.postings[term] = set()
+            for gram in set(term) | self._query_grams(term):
+                self._grams.setdefault(gram, set()).add(term)
+        products.add(document_id)
+
+    def exact(self, term: str) -> Set[str]:
+        return set(self.postings.get(term, ()))
+
+    def containing(self, term: str) -> Set[str]:
+        """term을 부분 문자열로 포함하는 단어들의 제품 ID (2-gram 후보 교집합 후 확인)"""
+        candidates: Optional[Set[str]] = None
+        for gram in sorted(self._query_grams(term), key=lambda g: len(self._grams.get(g, ()))):
+            terms = self._grams.get(gram)
+            if not terms:
+                return set()
+            candidates = set(terms) if candidates is None else candidates & terms
+            if not candidates:
+                return set()
+        products: Set[str] = set()
+        for candidate in candidates or ():
+            if term in candidate:
+                products |= self.postings[candidate]
+        return products
+
+
+class MedicationIngredientIndex:
+    """
+    의약품 성분/효능효과 역색인 (processed_medications JSON 기준, 인메모리)
+    - 성분 토큰 → 제품, 효능효과 단어 → 제품
+    - 알러지 확인은 알러지원 표기 집합과 제품 성분 토큰 집합의 교집합 (LLM/벡터 검색 없음)
+    - 제품명(질문/복용약 기록) → 제품은 ProductNameIndex로 찾음
+    """
+
+    def __init__(self):
+        self.products: Dict[str, MedicationProduct] = {}
+        self._ingredient_index = _TermIndex()
+        self._indication_index = _TermIndex()
+        # 성분 표기 → 정규화 토큰 (항원 표기는 제외, 알러지 확인 때 다시 나누지 않도록 색인 시 한 번만 계산)
+        self._name_tokens: Dict[str, Set[str]] = {}
+        self._tokenizer = KoreanTokenizer(min_ngram_word_len=1000)
+        self.names = ProductNameIndex()
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def add_item(self, item: Dict[str, Any]):
+        """JSON 항목 하나 ({"id", "text", "metadata"}) 추가"""
+        metadata = item.get("metadata") or {}
+        product_name = metadata.get("product_name")
+        document_id = item.get("id")
+        if not product_name or not document_id:
+            return
+        text = item.get("text") or ""
+
+        ingredients = parse_ingredients(text)
+        self.products[document_id] = MedicationProduct(document_id, product_name, metadata.get("company"), ingredients)
+
+        tokens: Set[str] = set()
+        for name in ingredients:
+            if name not in self._name_tokens and not is_antigen(name):
+                self._name_tokens[name] = self._ingredient_name_tokens(name)
+            tokens |= self._name_tokens.get(name, set())
+        for token in tokens:
+            self._ingredient_index.add(token, document_id)
+
+        indication = _INDICATION_BLOCK.search(_section_text(text))
+        if indication:
+            for term in set(self._tokenizer.tokenize(indication.group(1))) - INDICATION_STOP_WORDS:
+                self._indication_index.add(term, document_id)
+
+        self.names.add_documents([document_id], [Document(page_content=text, metadata={"product_name": product_name})])
+
+    @staticmethod
+    def _ingredient_name_tokens(name: str) -> Set[str]:
+        """성분 표기 전체 + 단어별 정규화 토큰 (예: "닭 전염성기관지염바이러스" → 닭, 전염성기관지염바이러스, ...)"""
+        tokens = {normalize_name(name)}
+        tokens.update(normalize_name(word) for word in re.split(r"[\s,/()\[\]·+-]+", name))
+        return {token for token in tokens if token}
+
+    def products_with_ingredient(self, allergen: str) -> Set[str]:
+        """알러지원과 겹치는 성분을 가진 제품 ID (짧은 표기는 토큰 완전 일치, 2글자 이상은 부분 일치)"""
+        matched: Set[str] = set()
+        for term in allergen_terms(allergen):
+            matched |= self._ingredient_index.exact(term)
+            if len(term) >= 2:
+                matched |= self._ingredient_index.containing(term)
+        return matched
+
+    def products_for_indication(self, query: str) -> Set[str]:
+        """효능효과에 질문 단어(부분 일치 포함)가 모두 있는 제품 ID"""
+        terms = [term for term in self._tokenizer.tokenize(query) if term not in INDICATION_STOP_WORDS]
+        result: Optional[Set[str]] = None
+        for term in terms:
+            products = self._indication_index.containing(term)
+            result = products if result is None else result & products
+        return result or set()
+
+    def resolve_products(self, texts: Iterable[str]) -> Set[str]:
+        """제품명이 언급된 텍스트(질문, 복용약 기록 이름)에서 제품 ID"""
+        product_ids: Set[str] = set()
+        for text in texts:
+            if text:
+                for match in self.names.match(text):
+                    product_ids.update(match.chunk_ids)
+        return product_ids
+
+    def check_allergies(self, allergens: Iterable[str], product_ids: Optional[Iterable[str]] = None) -> List[AllergyConflict]:
+        """알러지원과 성분이 겹치는 제품 (product_ids가 없으면 전체 제품 대상)"""
+        candidates = set(product_ids) if product_ids is not None else None
+        conflicts: List[AllergyConflict] = []
+        for allergen in dict.fromkeys(a.strip() for a in allergens if a and a.strip()):
+            matched = self.products_with_ingredient(allergen)
+            if candidates is not None:
+                matched &= candidates
+            terms = allergen_terms(allergen)
+            for document_id in sorted(matched):
+                product = self.products[document_id]
+                ingredients = [
+                    name for name in product.ingredients
+                    if any(term in token for term in terms for token in self._name_tokens.get(name, ()))
+                ]
+                conflicts.append(AllergyConflict(allergen, product.product_name, document_id, ingredients))
+        return conflicts
+
+    @classmethod
+    def from_files(cls, paths: Iterable[Path]) -> "MedicationIngredientIndex":
+        index = cls()
+        for path in paths:
+            try:
+                for _, item in iter_json_file(path):
+                    if isinstance(item, dict):
+                        index.add_item(item)
+            except Exception as e:
+                logger.warning(f"의약품 성분 색인 - 파일 처리 실패 ({path}): {e}")
+        index.names.build()
+        return index
+
+
+_index_lock = threading.Lock()
+# (원본 경로, 파일 서명, 마지막 확인 시각, 색인)
+_cached: Optional[Tuple[str, Tuple, float, MedicationIngredientIndex]] = None
+
+
+def _files_signature(paths: List[Path]) -> Tuple:
+    signature = []
+    for path in paths:
+        stat = path.stat()
+        signature.append((str(path), stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def get_medication_index(documents_path: Optional[str] = None) -> MedicationIngredientIndex:
+    """의약품 성분 색인 (원본 JSON의 경로/크기/mtime이 바뀌면 다시 생성)
+
+    파일 목록/stat 확인은 MEDICATION_INDEX_CHECK_SECONDS 간격으로만 수행 (그 사이 요청은 캐시된 색인 사용)
+    """
+    global _cached
+    root = str(documents_path or Config.DOCUMENTS_PATH)
+    with _index_lock:
+        now = time.monotonic()
+        if _cached is not None and _cached[0] == root and now - _cached[2] < Config.MEDICATION_INDEX_CHECK_SECONDS:
+            return _cached[3]
+        paths = sorted(Path(root).glob("**/*.json"))
+        signature = _files_signature(paths)
+        if _cached is not None and _cached[0] == root and _cached[1] == signature:
+            index = _cached[3]
+        else:
+            index = MedicationIngredientIndex.from_files(paths)
+            logger.info(f"의약품 성분 색인 생성 완료 (제품 수: {len(index)})")
+        _cached = (root, signature, now, index)
+        return index
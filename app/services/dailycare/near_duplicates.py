@@ -0,0 +1,227 @@
+import json
+import zlib
+import logging
+from collections import defaultdict, deque
+from typing import List, Dict, Any, Set, Hashable, Sequence, Iterable, Iterator, Tuple
+
+import numpy as np
+
+from app.services.dailycare.chunk_tagger import SPECIES_COMMON
+
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+# 묶는 기준(block key, 대표 메타데이터 병합)이 바뀌면 올려서 청크를 다시 계산 (매니페스트 설정에 기록)
+COLLAPSE_VERSION = 3
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """공백 정규화 후 문자 size-gram 집합"""
+    normalized = " ".join(text.lower().split())
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class NearDuplicateDetector:
+    """
+    MinHash + LSH 기반 준중복 텍스트 묶음 탐지
+    - 후보: 시그니처를 bands개 구간으로 나눠 한 구간이라도 같으면 후보 쌍
+    - 확정: 후보 쌍의 실제 shingle Jaccard가 threshold 이상
+    - block_keys가 다른 항목(제조사 등)은 묶지 않음
+    """
+
+    def __init__(self, threshold: float = 0.85, shingle_size: int = 5, num_perm: int = 128, bands: int = 16, seed: int = 0):
+        if num_perm % bands:
+            raise ValueError("num_perm은 bands의 배수여야 합니다.")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: Set[str]) -> np.ndarray:
+        if not shingle_set:
+            return np.full(len(self._a), _MERSENNE_PRIME, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) % _MERSENNE_PRIME for s in shingle_set),
+            dtype=np.uint64, count=len(shingle_set),
+        )
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+    def bucket_keys(self, shingle_set: Set[str], block_key: Hashable = None) -> List[Tuple[Hashable, int, bytes]]:
+        """LSH 버킷 키 (block key, 구간 번호, 구간 시그니처) - 하나라도 같으면 후보"""
+        signature = self.signature(shingle_set)
+        return [
+            (block_key, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def clusters(self, texts: Sequence[str], block_keys: Sequence[Hashable] = None) -> List[List[int]]:
+        """2개 이상으로 이루어진 묶음 목록 (각 묶음과 묶음 목록은 입력 순서대로 정렬)"""
+        shingle_sets = [shingles(text, self.shingle_size) for text in texts]
+        block_keys = block_keys or [None] * len(texts)
+
+        buckets: Dict[Any, List[int]] = defaultdict(list)
+        for i, shingle_set in enumerate(shingle_sets):
+            for bucket_key in self.bucket_keys(shingle_set, block_keys[i]):
+                buckets[bucket_key].append(i)
+
+        parent = list(range(len(texts)))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        checked = set()
+        for members in buckets.values():
+            for pos, i in enumerate(members):
+                for j in members[pos + 1:]:
+                    root_i, root_j = find(i), find(j)
+                    if root_i == root_j or (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(texts)):
+            groups[find(i)].append(i)
+        return sorted((members for members in groups.values() if len(members) > 1), key=lambda m: m[0])
+
+
+def merge_species(metadata: Dict[str, Any], variants: List[Dict[str, Any]]):
+    """
+    묶음의 종 태그를 대표 메타데이터에 합침 (metadata를 직접 수정)
+    - 강아지용/고양이용처럼 종만 다른 제품이 섞이면 species는 common, species_dog/species_cat은 하나라도 해당하면 True
+    """
+    species = {v["metadata"].get("species") for v in variants if v["metadata"].get("species")}
+    if len(species) > 1:
+        metadata["species"] = SPECIES_COMMON
+    for flag in ("species_dog", "species_cat"):
+        if any(flag in v["metadata"] for v in variants):
+            metadata[flag] = any(v["metadata"].get(flag) for v in variants)
+
+
+def _merge_group(variants: List[Dict[str, Any]], hash_chunk) -> Dict[str, Any]:
+    """묶음 → 대표 청크 (첫 청크 기준, 다른 제품명/ID와 종 태그를 합침)"""
+    canonical = variants[0]
+    names = list(dict.fromkeys(
+        v["metadata"].get("product_name") for v in variants if v["metadata"].get("product_name")
+    ))
+    metadata = dict(canonical["metadata"])
+    metadata["variant_document_ids"] = json.dumps(
+        [v["metadata"].get("document_id", v["id"]) for v in variants], ensure_ascii=False
+    )
+    metadata["variant_product_names"] = json.dumps(names, ensure_ascii=False)
+    metadata["variant_count"] = len(variants)
+    merge_species(metadata, variants)
+
+    text = canonical["text"]
+    other_names = [name for name in names if name != canonical["metadata"].get("product_name")]
+    if other_names:
+        text = f"{text}\n\n유사 제품: {', '.join(other_names)}"
+    return {"id": canonical["id"], "text": text, "metadata": metadata, "hash": hash_chunk(text, metadata)}
+
+
+def collapse_near_duplicate_stream(
+    files: Iterable[Tuple[Hashable, List[Dict[str, Any]]]], detector: NearDuplicateDetector, hash_chunk, window: int,
+) -> Iterator[Tuple[Hashable, List[Dict[str, Any]]]]:
+    """
+    파일 순서대로 들어오는 청크를 LSH 버킷에서 바로 비교해 준중복을 대표 청크 1개로 합치고 파일 단위로 흘려보냄
+    - 대표는 먼저 들어온 청크, 대표 뒤 window개 청크 안에 들어온 준중복만 묶음 (열린 묶음/버킷 메모리 상한)
+    - 파일은 그 파일의 대표 청크 묶음이 모두 닫히면 내보냄 → 전체 파싱을 기다리지 않고 임베딩 시작
+    - 대표 메타데이터: variant_document_ids / variant_product_names (JSON 문자열), variant_count
+    - 대표 본문 끝에 다른 제품명을 붙여 제품명으로도 검색되게 함
+    - 제조사/청크 순번이 다르면 합치지 않음, 종이 다른 변형(강아지용/고양이용)은 합치고 종 태그를 병합
+    files: (키, {"id", "text", "metadata", "hash"} 목록), hash_chunk(text, metadata) → 내용 해시
+    """
+    # 대표 위치 → (멤버 청크 목록, 버킷 키 집합) (열린 묶음), open_order: 열린 묶음의 대표 위치 (오름차순)
+    open_groups: Dict[int, Tuple[List[Dict[str, Any]], Set[Any]]] = {}
+    open_order: deque = deque()
+    # 버킷 키 → [(대표 위치, 멤버 shingle 집합)] (묶음의 모든 멤버를 넣어 전이적으로 묶음)
+    buckets: Dict[Any, List[Tuple[int, Set[str]]]] = defaultdict(list)
+    # 대표 위치 → 최종 청크 (닫힌 묶음)
+    closed: Dict[int, Dict[str, Any]] = {}
+    # (키, 대표 위치 목록, 마지막 대표 위치) - 입력 순서
+    pending: deque = deque()
+    position = 0
+    collapsed = groups = 0
+
+    def close_before(limit: int):
+        nonlocal collapsed, groups
+        while open_order and open_order[0] < limit:
+            canonical = open_order.popleft()
+            members, bucket_keys = open_groups.pop(canonical)
+            for bucket_key in bucket_keys:
+                entries = [entry for entry in buckets[bucket_key] if entry[0] != canonical]
+                if entries:
+                    buckets[bucket_key] = entries
+                else:
+                    del buckets[bucket_key]
+            if len(members) > 1:
+                closed[canonical] = _merge_group(members, hash_chunk)
+                collapsed += len(members) - 1
+                groups += 1
+            else:
+                closed[canonical] = members[0]
+
+    def ready_files(limit: int):
+        while pending and pending[0][2] < limit:
+            key, canonicals, _ = pending.popleft()
+            yield key, [closed.pop(p) for p in canonicals]
+
+    for key, chunks in files:
+        canonicals = []
+        for chunk in chunks:
+            metadata = chunk["metadata"]
+            shingle_set = shingles(chunk["text"], detector.shingle_size)
+            bucket_keys = detector.bucket_keys(shingle_set, (metadata.get("company"), metadata.get("chunk_index")))
+
+            candidates = sorted({entry for bucket_key in bucket_keys for entry in buckets.get(bucket_key, ())},
+                                key=lambda entry: entry[0])
+            group = next(
+                (canonical for canonical, members in candidates
+                 if canonical in open_groups and jaccard(shingle_set, members) >= detector.threshold),
+                None,
+            )
+            if group is None:
+                group = position
+                open_groups[group] = ([], set())
+                open_order.append(group)
+                canonicals.append(group)
+            open_groups[group][0].append(chunk)
+            open_groups[group][1].update(bucket_keys)
+            for bucket_key in bucket_keys:
+                buckets[bucket_key].append((group, frozenset(shingle_set)))
+
+            position += 1
+            close_before(position - window)
+        pending.append((key, canonicals, canonicals[-1] if canonicals else -1))
+        yield from ready_files(position - window)
+
+    close_before(position)
+    yield from ready_files(position)
+    if groups:
+        logger.info(f"준중복 청크 {collapsed}개를 {groups}개 대표 청크로 통합")
+
+
+def collapse_near_duplicate_chunks(chunks: List[Dict[str, Any]], detector: NearDuplicateDetector, hash_chunk) -> List[Dict[str, Any]]:
+    """청크 목록 전체를 한 번에 통합 (window 제한 없음, 규칙은 collapse_near_duplicate_stream과 같음)"""
+    return [
+        chunk
+        for _, file_chunks in collapse_near_duplicate_stream([(None, chunks)], detector, hash_chunk, window=len(chunks))
+        for chunk in file_chunks
+    ]
@@ -0,0 +1,111 @@
+import logging
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple
+
+from langchain_core.documents import Document
+
+from app.services.dailycare.chunk_tagger import SPECIES_DOG, SPECIES_CAT, SPECIES_COMMON
+
+
+logger = logging.getLogger(__name__)
+
+# 종별 물리 파티션 (청크의 species 태그 기준)
+PARTITIONS = (SPECIES_DOG, SPECIES_CAT, SPECIES_COMMON)
+
+
+def partition_name(collection_name: str, partition: str) -> str:
+    return f"{collection_name}_{partition}"
+
+
+def partitions_for_species(species: Optional[str]) -> Tuple[str, ...]:
+    """반려동물 종에 해당하는 파티션 (공통 문서 포함, 종을 모르면 전체)"""
+    if species in (SPECIES_DOG, SPECIES_CAT):
+        return (species, SPECIES_COMMON)
+    return PARTITIONS
+
+
+class PartitionedCollection:
+    """논리 콜렉션 1개 = 종별 물리 콜렉션 묶음 (dog / cat / common)
+
+    검색은 필요한 파티션만 조회하므로 인덱스가 작아지고 조회 범위가 줄어듦
+    물리 콜렉션은 vector_backends의 ChromaCollection / NumpyCollection
+    """
+
+    def __init__(self, name: str, open_store: Callable[[str], Any]):
+        self.name = name
+        self.partitions: Dict[str, Any] = {
+            partition: open_store(partition_name(name, partition)) for partition in PARTITIONS
+        }
+
+    @staticmethod
+    def partition_of(metadata: Dict[str, Any]) -> str:
+        partition = (metadata or {}).get("species")
+        return partition if partition in PARTITIONS else SPECIES_COMMON
+
+    def stores(self, partitions: Optional[Iterable[str]] = None) -> List[Tuple[str, Any]]:
+        return [(p, self.partitions[p]) for p in (partitions or PARTITIONS) if p in self.partitions]
+
+    def count(self, partitions: Optional[Iterable[str]] = None) -> int:
+        return sum(store.count() for _, store in self.stores(partitions))
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]]):
+        """species 태그에 맞는 파티션에 저장 (태그가 바뀐 청크는 다른 파티션에서 제거)"""
+        grouped: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            grouped.setdefault(self.partition_of(metadata), []).append(i)
+
+        for partition, store in self.partitions.items():
+            indexes = grouped.get(partition)
+            if indexes:
+                store.upsert(
+                    [ids[i] for i in indexes],
+                    [documents[i] for i in indexes],
+                    [metadatas[i] for i in indexes],
+                    [embeddings[i] for i in indexes],
+                )
+            moved = [ids[i] for p, group in grouped.items() if p != partition for i in group]
+            if moved and store.count():
+                store.delete(moved)
+
+    def delete(self, ids: List[str]):
+        for store in self.partitions.values():
+            store.delete(ids)
+
+    def delete_collection(self):
+        for store in self.partitions.values():
+            store.delete_collection()
+
+    def flush(self):
+        """메모리에 모아 둔 쓰기를 영속화 (매니페스트 저장 전에 호출)"""
+        for store in self.partitions.values():
+            store.flush()
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None,
+        partitions: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """파티션별 결과를 거리순으로 병합"""
+        results: List[Tuple[Document, float]] = []
+        for _, store in self.stores(partitions):
+            if store.count():
+                results.extend(store.similarity_search_by_vector_with_relevance_scores(embedding, k, filter))
+        results.sort(key=lambda x: x[1])
+        return results[:k]
+
+    def similarity_search(self, query: str, k: int = 4, partitions: Optional[Iterable[str]] = None) -> List[Document]:
+        embedding = self.partitions[SPECIES_COMMON].embeddings.embed_query(query)
+        return [doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, partitions=partitions)]
+
+    def iter_documents(self, page_size: int = 1000):
+        """전체 파티션의 문서를 (ids, documents) 페이지 단위로 순회"""
+        for _, store in self.stores():
+            offset = 0
+            while True:
+                ids, contents, metadatas = store.get_page(page_size, offset)
+                if not ids:
+                    break
+                docs = [
+                    Document(id=doc_id, page_content=content or "", metadata=metadata or {})
+                    for doc_id, content, metadata in zip(ids, contents, metadatas)
+                ]
+                yield ids, docs
+                offset += len(ids)
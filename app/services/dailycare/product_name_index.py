@@ -0,0 +1,169 @@
+import re
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+
+from langchain_core.documents import Document
+
+from app.services.dailycare.aho_corasick import AhoCorasick
+
+
+_NON_NAME_CHARS = re.compile(r"[^0-9a-z가-힣]")
+_NAME_CHAR = re.compile(r"[0-9a-z가-힣]")
+_ASCII_ALNUM = re.compile(r"[0-9a-z]")
+_PARENTHESES = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+# 청크 본문의 "영문명: ..." 필드 (원본 JSON은 줄바꿈이 \n 문자열로 이스케이프되어 있음)
+_ENGLISH_NAME = re.compile(r"영문명:\s*(.+?)\s*(?:\\n|\n|\||$)")
+
+# 제품명 끝의 제형 표기 (제거한 이름도 색인)
+DOSAGE_FORM_SUFFIXES = ("주사액", "현탁액", "캡슐", "연고", "정", "주", "액", "산")
+# 제품명 첫 단어라도 브랜드로 보지 않는 일반 단어
+GENERIC_NAME_WORDS = {
+    "수출용", "수산용", "동물용", "애견용", "애묘용", "강아지", "고양이", "반려견", "반려묘", "반려동물",
+    "프리미엄", "내추럴", "오리지널", "프로페셔널", "샴푸", "컨디셔너", "스프레이", "린스", "백신",
+    "구충제", "영양제", "주사액", "미스트", "화이트닝", "데일리", "올인원", "베이비",
+    "shampoo", "spray", "premium", "natural", "organic", "original", "professional", "daily", "baby",
+    "puppy", "kitty", "dogs", "cats", "super", "pure", "fresh", "gold", "mist", "vaccine",
+}
+
+
+def normalize_name(text: str) -> str:
+    """소문자 + 한글/영문/숫자만 남김 (띄어쓰기/기호 차이 무시)"""
+    return _NON_NAME_CHARS.sub("", (text or "").lower())
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """normalize_name 결과와 각 글자의 원문 위치"""
+    lowered = (text or "").lower()
+    offsets = [i for i, ch in enumerate(lowered) if _NAME_CHAR.match(ch)]
+    return "".join(lowered[i] for i in offsets), offsets
+
+
+def name_keys(name: str, min_length: int = 3) -> Set[str]:
+    """제품명 하나의 색인 키: 전체 이름, 괄호/제형 표기를 뺀 이름, 브랜드(첫 단어)"""
+    keys = {normalize_name(name)}
+    base = _PARENTHESES.sub(" ", name or "").strip()
+    keys.add(normalize_name(base))
+    for suffix in DOSAGE_FORM_SUFFIXES:
+        if base.endswith(suffix):
+            keys.add(normalize_name(base[:-len(suffix)]))
+            break
+    words = base.split()
+    if len(words) > 1:
+        keys.add(normalize_name(words[0]))
+    return {key for key in keys if len(key) >= min_length and key not in GENERIC_NAME_WORDS}
+
+
+@dataclass
+class ProductMatch:
+    """질문에서 찾은 제품명 언급 하나"""
+    mention: str
+    products: List[str]
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+class ProductNameIndex:
+    """
+    의약품 제품명/영문명 → 청크 ID 색인 (질문 속 제품명을 질문 길이에 비례하는 시간에 탐지)
+    - 키: 제품명/영문명을 정규화한 전체 이름, 괄호·제형을 뺀 이름, 브랜드(첫 단어)
+    - 한 키가 max_products개보다 많은 제품에 걸리면(브랜드 등) 모호한 언급으로 보고 무시
+    - 준중복 통합 청크는 variant_product_names의 제품명으로도 찾음
+    - 청크 추가/삭제 후 첫 검색 때 자동자(automaton)를 다시 만듦
+    """
+
+    def __init__(self, max_products: int = 3, min_key_length: int = 3):
+        self.max_products = max_products
+        self.min_key_length = min_key_length
+        self._lock = threading.RLock()
+        # 청크 ID → (제품명 목록, 영문명, chunk_index)
+        self._chunks: Dict[str, Tuple[List[str], Optional[str], int]] = {}
+        self._automaton: Optional[AhoCorasick] = None
+        self._product_chunks: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def add_documents(self, ids: Iterable[str], documents: Iterable[Document]):
+        with self._lock:
+            for chunk_id, doc in zip(ids, documents):
+                names = self._product_names(doc.metadata)
+                if not names:
+                    self._chunks.pop(chunk_id, None)
+                    continue
+                match = _ENGLISH_NAME.search(doc.page_content or "")
+                english = match.group(1) if match else None
+                self._chunks[chunk_id] = (names, english, doc.metadata.get("chunk_index") or 0)
+            self._automaton = None
+
+    def remove_documents(self, ids: Iterable[str]):
+        with self._lock:
+            for chunk_id in ids:
+                self._chunks.pop(chunk_id, None)
+            self._automaton = None
+
+    def match(self, query: str) -> List[ProductMatch]:
+        """질문에 언급된 제품 (언급 순, 같은 제품은 한 번) - 청크 ID는 chunk_index 순"""
+        with self._lock:
+            automaton = self._automaton or self.build()
+            product_chunks = self._product_chunks
+
+        normalized, offsets = normalize_with_offsets(query)
+        lowered = query.lower()
+
+        def at_word_boundary(start: int, end: int) -> bool:
+            # 영문/숫자로 시작하거나 끝나는 키는 원문에서 영문/숫자 단어 중간이면 무시 (dhp ⊂ dhppl)
+            before = offsets[start] - 1
+            after = offsets[end - 1] + 1
+            if _ASCII_ALNUM.match(normalized[start]) and before >= 0 and _ASCII_ALNUM.match(lowered[before]):
+                return False
+            if _ASCII_ALNUM.match(normalized[end - 1]) and after < len(lowered) and _ASCII_ALNUM.match(lowered[after]):
+                return False
+            return True
+
+        matches: List[ProductMatch] = []
+        seen: Set[str] = set()
+        for start, end, values in automaton.longest_matches(normalized, at_word_boundary):
+            products = [product for product in values[0] if product not in seen]
+            if not products:
+                continue
+            seen.update(products)
+            chunk_ids = list(dict.fromkeys(chunk_id for product in products for chunk_id in product_chunks[product]))
+            matches.append(ProductMatch(mention=query[offsets[start]:offsets[end - 1] + 1], products=products, chunk_ids=chunk_ids))
+        return matches
+
+    def build(self) -> AhoCorasick:
+        """현재 청크로 자동자 생성 (match()가 필요할 때 호출하므로 미리 만들어 둘 때만 사용)"""
+        with self._lock:
+            key_products: Dict[str, Set[str]] = {}
+            product_chunks: Dict[str, List[Tuple[int, str]]] = {}
+            for chunk_id, (names, english, chunk_index) in self._chunks.items():
+                for i, name in enumerate(names):
+                    product_chunks.setdefault(name, []).append((chunk_index, chunk_id))
+                    keys = name_keys(name, self.min_key_length)
+                    # 영문명은 대표 제품(첫 이름)의 것 (영문 브랜드는 한 글자당 정보가 적어 4글자 이상만)
+                    if i == 0 and english:
+                        keys |= {key for key in name_keys(english, self.min_key_length) if len(key) >= 4}
+                    for key in keys:
+                        key_products.setdefault(key, set()).add(name)
+
+            automaton = AhoCorasick()
+            for key, products in key_products.items():
+                if len(products) <= self.max_products:
+                    automaton.add(key, sorted(products))
+            self._automaton = automaton.build()
+            self._product_chunks = {
+                name: [chunk_id for _, chunk_id in sorted(chunks)] for name, chunks in product_chunks.items()
+            }
+            return self._automaton
+
+    @staticmethod
+    def _product_names(metadata: Dict[str, Any]) -> List[str]:
+        names = [metadata.get("product_name")] if metadata.get("product_name") else []
+        variants = metadata.get("variant_product_names")
+        if variants:
+            try:
+                names.extend(json.loads(variants) if isinstance(variants, str) else variants)
+            except (TypeError, ValueError):
+                pass
+        return list(dict.fromkeys(name for name in names if isinstance(name, str) and name.strip()))
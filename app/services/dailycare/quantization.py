@@ -0,0 +1,49 @@
+from typing import Tuple
+
+import numpy as np
+
+
+# VECTOR_QUANTIZATION / EMBEDDING_CACHE_QUANTIZATION 설정값
+QUANTIZATION_NONE = "none"
+QUANTIZATION_INT8 = "int8"
+
+# 코드 범위 [-128, 127] ↔ 원래 값 offset + (code + 128) * scale
+_LEVELS = 255
+_CODE_SHIFT = 128
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    벡터별 min/max 기준 int8 스칼라 양자화
+    반환: (codes [N, D] int8, scales [N] float32, offsets [N] float32)
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if not vectors.size:
+        return (
+            np.empty(vectors.shape, dtype=np.int8),
+            np.empty(len(vectors), dtype=np.float32),
+            np.empty(len(vectors), dtype=np.float32),
+        )
+    offsets = vectors.min(axis=1)
+    scales = (vectors.max(axis=1) - offsets) / _LEVELS
+    scales[scales == 0] = 1.0
+    codes = np.rint((vectors - offsets[:, None]) / scales[:, None]) - _CODE_SHIFT
+    return np.clip(codes, -128, 127).astype(np.int8), scales.astype(np.float32), offsets.astype(np.float32)
+
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    codes = np.atleast_2d(codes)
+    return ((codes.astype(np.float32) + _CODE_SHIFT) * scales[:, None] + offsets[:, None]).astype(np.float32)
+
+
+def approximate_dot(codes: np.ndarray, scales: np.ndarray, offsets: np.ndarray, query: np.ndarray, block_rows: int = 2048) -> np.ndarray:
+    """
+    양자화된 행렬과 float32 쿼리의 내적 근사
+    q·x ≈ scale * (q·code) + (offset + 128 * scale) * sum(q)
+    int8 → float32 변환은 블록 단위로 해 임시 메모리를 작게 유지
+    """
+    dots = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), block_rows):
+        block = codes[start:start + block_rows]
+        dots[start:start + len(block)] = block.astype(np.float32) @ query
+    return scales * dots + (offsets + _CODE_SHIFT * scales) * float(query.sum())
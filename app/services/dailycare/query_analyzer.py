@@ -0,0 +1,149 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from app.services.dailycare.aho_corasick import AhoCorasick
+from app.services.dailycare.chunk_tagger import TOPIC_KEYWORDS, detect_species, SPECIES_DOG, SPECIES_CAT
+from app.services.dailycare.partitioned_store import partitions_for_species
+from app.services.dailycare.product_name_index import ProductMatch, ProductNameIndex, normalize_name
+
+
+# 의도 → 어휘 (부분 문자열 일치, 띄어쓰기/대소문자 무시)
+INTENT_LEXICONS: Dict[str, List[str]] = {
+    "medication": ['약', '치료', '병', '질병', '아파', '증상', '부작용', 'medication', 'treatment', '처방'],
+    "general": ['건강관리', '사료', '운동', '산책', '관리', '키우기', '예방접종', '백신', '목욕', '훈련'],
+    "vaccine": ['예방접종', '백신', '접종', 'vaccine'],
+    # 수집 시 청크 주제 태그와 같은 어휘
+    **TOPIC_KEYWORDS,
+}
+
+# 콜렉션 라우팅 규칙 (위에서부터 처음 맞는 규칙)
+# - products: 질문에서 제품명을 찾았는지 / intents: 질문에 하나라도 있어야 하는 의도
+# - medical_history: 질병·복용약 기록 여부 / unless: 있으면 안 되는 의도
+ROUTING_RULES: List[Dict[str, Any]] = [
+    # 제품명을 물으면 의도 어휘가 없어도 의약품 콜렉션 포함
+    {"products": True, "collections": ['medications', 'general_guides']},
+    {"intents": {"medication"}, "collections": ['medications', 'general_guides']},
+    {"medical_history": True, "unless": {"general"}, "collections": ['medications', 'general_guides']},
+]
+DEFAULT_COLLECTIONS = ['general_guides']
+
+# 의도별 메타데이터 필터 (수집 시 부여한 평면 태그에 대한 동등 비교)
+INTENT_FILTERS: Dict[str, Dict[str, Any]] = {
+    # 예방접종 질문이면 의약품은 백신 관련 청크만
+    "vaccine": {"$or": [{"is_medication": False}, {"topic_vaccine": True}]},
+}
+
+
+@dataclass
+class QueryAnalysis:
+    """질문 1개의 분석 결과 (요청당 한 번 만들어 라우팅/필터/제품 조회가 함께 사용)"""
+    query: str
+    normalized: str
+    intents: Set[str] = field(default_factory=set)
+    # 의도 → 질문에서 찾은 어휘
+    matched_terms: Dict[str, List[str]] = field(default_factory=dict)
+    species: Optional[str] = None
+    has_medical_history: bool = False
+    collections: List[str] = field(default_factory=list)
+    filters: List[Dict[str, Any]] = field(default_factory=list)
+    partitions: List[str] = field(default_factory=list)
+    product_matches: List[ProductMatch] = field(default_factory=list)
+
+    @property
+    def where(self) -> Dict[str, Any]:
+        """filters를 Chroma where 형식으로 (없으면 빈 dict)"""
+        if len(self.filters) == 1:
+            return self.filters[0]
+        if len(self.filters) > 1:
+            return {"$and": list(self.filters)}
+        return {}
+
+    @property
+    def product_names(self) -> List[str]:
+        return [product for match in self.product_matches for product in match.products]
+
+
+class QueryAnalyzer:
+    """
+    의도 어휘 전체를 하나의 Aho-Corasick 자동자로 만들어 질문을 한 번만 훑어 분석
+    - 질문/어휘 모두 normalize_name(소문자, 한글·영문·숫자만)으로 정규화 → 띄어쓰기 차이 무시
+    - 라우팅/필터는 ROUTING_RULES / INTENT_FILTERS 데이터로 결정
+    - 제품명은 product_index가 있으면 함께 찾음
+    """
+
+    def __init__(self, lexicons: Optional[Dict[str, List[str]]] = None,
+                 routing_rules: Optional[List[Dict[str, Any]]] = None,
+                 intent_filters: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.lexicons = INTENT_LEXICONS if lexicons is None else lexicons
+        self.routing_rules = ROUTING_RULES if routing_rules is None else routing_rules
+        self.intent_filters = INTENT_FILTERS if intent_filters is None else intent_filters
+        automaton = AhoCorasick()
+        for intent, terms in self.lexicons.items():
+            for term in terms:
+                automaton.add(normalize_name(term), (intent, term))
+        self._automaton = automaton.build()
+
+    def scan(self, query: str) -> Tuple[str, Dict[str, List[str]]]:
+        """(정규화한 질문, 의도 → 찾은 어휘)"""
+        normalized = normalize_name(query)
+        matched: Dict[str, List[str]] = {}
+        for _, _, (intent, term) in self._automaton.iter_matches(normalized):
+            terms = matched.setdefault(intent, [])
+            if term not in terms:
+                terms.append(term)
+        return normalized, matched
+
+    def analyze(self, query: str, pet_records: dict = None,
+                product_index: Optional[ProductNameIndex] = None) -> QueryAnalysis:
+        normalized, matched = self.scan(query or "")
+        pet_records = pet_records or {}
+        pet_info = pet_records.get("pet") or {}
+        species = detect_species(pet_info.get('species_name') or "")
+
+        analysis = QueryAnalysis(
+            query=query or "",
+            normalized=normalized,
+            intents=set(matched),
+            matched_terms=matched,
+            species=species,
+            has_medical_history=bool(pet_records.get("disease") or pet_records.get("medication")),
+            partitions=list(partitions_for_species(species)),
+        )
+        if product_index is not None and query:
+            analysis.product_matches = product_index.match(query)
+        analysis.collections = self.route(analysis)
+        analysis.filters = self.build_filters(analysis)
+        return analysis
+
+    def route(self, analysis: QueryAnalysis) -> List[str]:
+        for rule in self.routing_rules:
+            if "products" in rule and rule["products"] != bool(analysis.product_matches):
+                continue
+            if "intents" in rule and not rule["intents"] & analysis.intents:
+                continue
+            if "medical_history" in rule and rule["medical_history"] != analysis.has_medical_history:
+                continue
+            if rule.get("unless", set()) & analysis.intents:
+                continue
+            return list(rule["collections"])
+        return list(DEFAULT_COLLECTIONS)
+
+    def build_filters(self, analysis: QueryAnalysis) -> List[Dict[str, Any]]:
+        # 동물 종: 다른 종 전용 문서 제외 (공통 문서는 species_dog/species_cat 모두 True)
+        filters: List[Dict[str, Any]] = []
+        if analysis.species == SPECIES_DOG:
+            filters.append({"species_dog": True})
+        elif analysis.species == SPECIES_CAT:
+            filters.append({"species_cat": True})
+        for intent, predicate in self.intent_filters.items():
+            if intent in analysis.intents:
+                filters.append(predicate)
+        return filters
+
+
+query_analyzer = QueryAnalyzer()
+
+
+def analyze_query(query: str, pet_records: dict = None,
+                  product_index: Optional[ProductNameIndex] = None) -> QueryAnalysis:
+    return query_analyzer.analyze(query, pet_records, product_index)
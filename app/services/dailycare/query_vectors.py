@@ -0,0 +1,91 @@
+import re
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from config import Config
+
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.~…]+$")
+
+
+def normalize_question(text: str) -> str:
+    """질문 벡터 캐시 키 (유니코드 NFC, 소문자, 연속 공백/끝 문장부호 정리)"""
+    text = " ".join(unicodedata.normalize("NFC", text or "").lower().split())
+    return _TRAILING_PUNCTUATION.sub("", text) or text
+
+
+def _unit(vector: Any) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class QueryVectorCache:
+    """
+    질문 벡터와 반려동물 프로필 벡터를 따로 임베딩해 가중합으로 검색 벡터 생성
+    - 질문 벡터: 정규화한 질문별 LRU (같은/흔한 질문은 반려동물이 달라도 재사용)
+    - 프로필 벡터: 반려동물별 1개, 프로필 문자열 해시가 바뀌면(기록 변경) 다시 임베딩
+      (무효화는 해시 비교만으로 처리 - 프로필 수정/삭제 경로에서 따로 지울 필요 없음, 삭제된 반려동물은 LRU로 밀려남)
+    - 두 캐시 모두 놓치면 임베딩 래퍼의 영구 캐시를 거쳐 제공자를 호출
+    """
+
+    def __init__(self, embed_query: Callable[[str], List[float]], pet_weight: Optional[float] = None,
+                 max_questions: int = 4096, max_pets: int = 1024):
+        self.embed_query = embed_query
+        self.pet_weight = Config.PET_CONTEXT_WEIGHT if pet_weight is None else pet_weight
+        self.max_questions = max_questions
+        self.max_pets = max_pets
+        self._lock = threading.Lock()
+        self._questions: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # 반려동물 키 → (프로필 해시, 벡터)
+        self._pets: "OrderedDict[Hashable, Tuple[str, np.ndarray]]" = OrderedDict()
+
+    def question_vector(self, question: str) -> np.ndarray:
+        key = normalize_question(question)
+        with self._lock:
+            vector = self._questions.get(key)
+            if vector is not None:
+                self._questions.move_to_end(key)
+                return vector
+
+        vector = _unit(self.embed_query(key))
+        with self._lock:
+            self._questions[key] = vector
+            while len(self._questions) > self.max_questions:
+                self._questions.popitem(last=False)
+        return vector
+
+    def pet_vector(self, pet_key: Hashable, profile: str) -> Optional[np.ndarray]:
+        """반려동물 프로필 벡터 (프로필이 비어 있으면 None)"""
+        if not profile or not profile.strip():
+            return None
+        profile_hash = hashlib.md5(profile.encode("utf-8")).hexdigest()
+        key = profile_hash if pet_key is None else pet_key
+        with self._lock:
+            cached = self._pets.get(key)
+            if cached is not None and cached[0] == profile_hash:
+                self._pets.move_to_end(key)
+                return cached[1]
+
+        vector = _unit(self.embed_query(profile))
+        with self._lock:
+            self._pets[key] = (profile_hash, vector)
+            self._pets.move_to_end(key)
+            while len(self._pets) > self.max_pets:
+                self._pets.popitem(last=False)
+        return vector
+
+    def combine(self, question: str, pet_key: Hashable = None, profile: str = "",
+                weight: Optional[float] = None) -> List[float]:
+        """(1 - w) * 질문 + w * 프로필 (각각 단위 벡터, 결과도 단위 벡터) - 프로필이 없으면 질문 벡터"""
+        weight = self.pet_weight if weight is None else weight
+        vector = self.question_vector(question)
+        pet_vector = self.pet_vector(pet_key, profile) if weight > 0 else None
+        if pet_vector is not None:
+            vector = _unit((1.0 - weight) * vector + weight * pet_vector)
+        return vector.tolist()
@@ -0,0 +1,66 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator
+
+import numpy as np
+
+
+class StageTimings:
+    """요청 1건의 단계별 소요 시간(ms) - 단계가 겹쳐 실행되므로 합계가 아닌 total로 전체 시간을 봄"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name: str, elapsed_ms: float):
+        with self._lock:
+            self.stages[name] = round(elapsed_ms, 1)
+
+    def finish(self) -> Dict[str, float]:
+        self.record("total", (time.perf_counter() - self.started) * 1000)
+        return dict(self.stages)
+
+    def __str__(self) -> str:
+        return " ".join(f"{name}={ms:.0f}ms" for name, ms in self.stages.items())
+
+
+class LatencyStats:
+    """최근 window건의 단계별 지연시간 p50/p95/p99 (헬스체크에서 조회)"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def add(self, timings: Dict[str, float]):
+        with self._lock:
+            for name, elapsed_ms in timings.items():
+                self._samples.setdefault(name, deque(maxlen=self.window)).append(elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        return {
+            name: {
+                "count": len(values),
+                "p50": round(float(np.percentile(values, 50)), 1),
+                "p95": round(float(np.percentile(values, 95)), 1),
+                "p99": round(float(np.percentile(values, 99)), 1),
+            }
+            for name, values in samples.items() if values
+        }
+
+
+# 케어 챗봇 요청 단계별 지연시간
+care_chatbot_latency = LatencyStats()
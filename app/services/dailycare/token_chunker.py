@@ -0,0 +1,104 @@
+import re
+import logging
+from typing import List, Tuple, Callable, Optional
+
+import tiktoken
+
+
+logger = logging.getLogger(__name__)
+
+# 분할 단위: 문장(구두점/줄바꿈 뒤 공백) → 단어 → 글자 (뒤따르는 공백은 앞 조각에 붙여 원문 그대로 이어 붙일 수 있게)
+_SENTENCE = re.compile(r".+?(?:[.?!\n]\s+|$)", re.DOTALL)
+_WORD = re.compile(r"\S+\s*|\s+")
+
+
+def make_token_counter() -> Callable[[str], int]:
+    """cl100k_base 토큰 수 계산기 (인코딩은 처음 호출할 때 로드)"""
+    encoder = None
+
+    def count(text: str) -> int:
+        nonlocal encoder
+        if encoder is None:
+            try:
+                encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # 인코딩 파일을 받을 수 없는 오프라인 환경: 글자 수를 상한 추정치로 사용
+                logger.warning(f"tiktoken 인코딩 로드 실패, 글자 수로 토큰 수를 추정합니다: {e}")
+                encoder = False
+        return len(encoder.encode(text)) if encoder else len(text)
+    return count
+
+
+class TokenChunker:
+    """
+    토큰 수 기준 청크 분할
+    - 문장 경계 우선으로 max_tokens 이하 청크를 채우고, 앞 청크의 마지막 문장들을 overlap_tokens 이내로 겹침
+    - 한 문장이 max_tokens를 넘으면 단어, 그래도 넘으면 글자 단위로 자름
+    - 반환: (청크 텍스트, 토큰 수) 목록
+    """
+
+    def __init__(self, max_tokens: int = 1000, overlap_tokens: int = 100, token_counter: Optional[Callable[[str], int]] = None):
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens는 0 이상, max_tokens 미만이어야 합니다.")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count = token_counter or make_token_counter()
+
+    def split(self, text: str) -> List[Tuple[str, int]]:
+        text = (text or "").strip()
+        if not text:
+            return []
+        total = self.count(text)
+        if total <= self.max_tokens:
+            return [(text, total)]
+
+        chunks: List[Tuple[str, int]] = []
+        current: List[Tuple[str, int]] = []
+        current_tokens = 0
+        for piece, piece_tokens in self._pieces(text):
+            if current and current_tokens + piece_tokens > self.max_tokens:
+                chunks.append(self._join(current))
+                current = self._overlap(current)
+                current_tokens = sum(tokens for _, tokens in current)
+                # 겹침 + 새 조각이 상한을 넘으면 겹침을 앞에서부터 줄임
+                while current and current_tokens + piece_tokens > self.max_tokens:
+                    current_tokens -= current.pop(0)[1]
+            current.append((piece, piece_tokens))
+            current_tokens += piece_tokens
+        if current:
+            chunks.append(self._join(current))
+        return [chunk for chunk in chunks if chunk[0]]
+
+    def _pieces(self, text: str, level: int = 0) -> List[Tuple[str, int]]:
+        """max_tokens 이하가 될 때까지 문장 → 단어 → 글자 순으로 쪼갠 조각"""
+        tokens = self.count(text)
+        if tokens <= self.max_tokens:
+            return [(text, tokens)]
+        if level == 0:
+            parts = _SENTENCE.findall(text)
+        elif level == 1:
+            parts = _WORD.findall(text)
+        else:
+            # 글자 단위: 토큰 밀도로 길이를 어림잡아 자르고 넘치면 다시 자름
+            step = max(1, len(text) * self.max_tokens // tokens)
+            if step >= len(text):
+                step = max(1, len(text) // 2)
+            return [piece for i in range(0, len(text), step) for piece in self._pieces(text[i:i + step], level)]
+        if len(parts) <= 1:
+            return self._pieces(text, level + 1)
+        return [piece for part in parts if part for piece in self._pieces(part, level + 1)]
+
+    def _overlap(self, pieces: List[Tuple[str, int]]) -> List[Tuple[str, int]]:
+        carry: List[Tuple[str, int]] = []
+        carry_tokens = 0
+        for piece, tokens in reversed(pieces):
+            if carry_tokens + tokens > self.overlap_tokens:
+                break
+            carry.insert(0, (piece, tokens))
+            carry_tokens += tokens
+        # 겹침이 앞 청크 전체면 진행이 없으므로 제외
+        return carry if len(carry) < len(pieces) else carry[1:]
+
+    def _join(self, pieces: List[Tuple[str, int]]) -> Tuple[str, int]:
+        text = "".join(piece for piece, _ in pieces).strip()
+        return text, self.count(text)
@@ -0,0 +1,509 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from app.services.dailycare.index_manifest import write_json_atomic
+from app.services.dailycare.quantization import QUANTIZATION_INT8, QUANTIZATION_NONE, quantize_int8, approximate_dot
+
+
+logger = logging.getLogger(__name__)
+
+# VECTOR_BACKEND 설정값
+BACKEND_CHROMA = "chroma"
+BACKEND_NUMPY = "numpy"
+
+
+class ChromaCollection:
+    """Chroma 콜렉션 1개 어댑터 (PartitionedCollection이 쓰는 물리 콜렉션 인터페이스)"""
+
+    def __init__(self, store: Chroma):
+        self.store = store
+        self.embeddings = store.embeddings
+
+    def count(self) -> int:
+        return self.store._collection.count()
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]]):
+        self.store._collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, ids: List[str]):
+        self.store._collection.delete(ids=ids)
+
+    def delete_collection(self):
+        self.store.delete_collection()
+
+    def flush(self):
+        """Chroma는 쓰기 즉시 영속화"""
+
+    def get_page(self, limit: int, offset: int) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        data = self.store._collection.get(include=["documents", "metadatas"], limit=limit, offset=offset)
+        return data.get("ids") or [], data.get("documents") or [], data.get("metadatas") or []
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        return self.store.similarity_search_by_vector_with_relevance_scores(embedding, k, filter)
+
+
+def where_mask(columns: Dict[str, np.ndarray], where: Optional[Dict[str, Any]], size: int) -> np.ndarray:
+    """matches_where와 같은 의미의 where 필터를 컬럼 배열에 벡터 연산으로 적용"""
+    mask = np.ones(size, dtype=bool)
+    if not where:
+        return mask
+
+    for key, condition in where.items():
+        if key == "$and":
+            for clause in condition:
+                mask &= where_mask(columns, clause, size)
+        elif key == "$or":
+            any_mask = np.zeros(size, dtype=bool)
+            for clause in condition:
+                any_mask |= where_mask(columns, clause, size)
+            mask &= any_mask
+        else:
+            column = columns.get(key)
+            if column is None:
+                column = np.full(size, None, dtype=object)
+            operators = condition if isinstance(condition, dict) else {"$eq": condition}
+            for op, operand in operators.items():
+                if op == "$eq":
+                    mask &= _equals(column, operand)
+                elif op == "$ne":
+                    mask &= ~_equals(column, operand)
+                elif op == "$in":
+                    in_mask = np.zeros(size, dtype=bool)
+                    for value in operand:
+                        in_mask |= _equals(column, value)
+                    mask &= in_mask
+                else:
+                    raise ValueError(f"지원하지 않는 where 연산자: {op}")
+    return mask
+
+
+def _equals(column: np.ndarray, value: Any) -> np.ndarray:
+    if column.dtype == bool and not isinstance(value, bool):
+        return np.zeros(len(column), dtype=bool)
+    return np.asarray(column == value, dtype=bool)
+
+
+def _column_array(values: List[Any]) -> np.ndarray:
+    """메타데이터 컬럼 → 비교용 배열 (전부 bool이면 bool 배열, 그 외 object)"""
+    if values and all(isinstance(value, bool) for value in values):
+        return np.array(values, dtype=bool)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+@dataclass
+class _Segment:
+    """불변 스냅샷 (쓰기는 새 세그먼트를 만들어 참조만 교체 → 검색은 락 없이 진행)"""
+    ids: List[str] = field(default_factory=list)
+    documents: List[str] = field(default_factory=list)
+    raw_columns: Dict[str, List[Any]] = field(default_factory=dict)
+    matrix: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.float32))
+    index: Dict[str, int] = field(default_factory=dict)
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)
+    norms: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float32))
+    # int8 양자화 (None이면 float32 행렬로 직접 검색)
+    codes: Optional[np.ndarray] = None
+    scales: Optional[np.ndarray] = None
+    offsets: Optional[np.ndarray] = None
+    # 행 수 (ids/documents/raw_columns는 쓰기 버퍼와 공유하는 append-only 리스트일 수 있어 size까지만 유효)
+    size: int = 0
+
+    @classmethod
+    def build(
+        cls, ids: List[str], documents: List[str], raw_columns: Dict[str, List[Any]], matrix: np.ndarray,
+        quantize: bool = False, stats: Optional[np.ndarray] = None, codes: Optional[np.ndarray] = None,
+    ) -> "_Segment":
+        """stats([N, 3] = norm², scale, offset)와 codes가 있으면 그대로 사용, 없으면 matrix에서 계산"""
+        if stats is not None:
+            norms, scales, offsets = stats[:, 0], stats[:, 1], stats[:, 2]
+        else:
+            norms = np.einsum("ij,ij->i", matrix, matrix) if len(ids) else np.empty(0, dtype=np.float32)
+            scales = offsets = None
+        if quantize and (codes is None or scales is None):
+            codes, scales, offsets = quantize_int8(matrix) if len(ids) else (None, None, None)
+        return cls(
+            ids=ids,
+            documents=documents,
+            raw_columns=raw_columns,
+            matrix=matrix,
+            index={chunk_id: row for row, chunk_id in enumerate(ids)},
+            columns={key: _column_array(values) for key, values in raw_columns.items()},
+            norms=norms,
+            codes=codes if quantize else None,
+            scales=scales if quantize else None,
+            offsets=offsets if quantize else None,
+            size=len(ids),
+        )
+
+    def stats(self) -> np.ndarray:
+        stats = np.zeros((self.size, 3), dtype=np.float32)
+        stats[:, 0] = self.norms
+        if self.codes is not None:
+            stats[:, 1] = self.scales
+            stats[:, 2] = self.offsets
+        return stats
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        return {key: values[row] for key, values in self.raw_columns.items() if values[row] is not None}
+
+    def document(self, row: int) -> Document:
+        return Document(id=self.ids[row], page_content=self.documents[row], metadata=self.metadata(row))
+
+
+class _RowBuffer:
+    """
+    NumpyCollection 쓰기 버퍼
+    - 배열 용량을 2배씩 늘려 upsert 비용은 배치 크기에 비례 (기존 행 복사/재양자화 없음)
+    - 노름/int8 코드는 이번 배치에 쓴 행만 계산
+    - 스냅샷은 [:size] 뷰와 append-only 리스트를 공유 → 새 행 추가는 이전 스냅샷에 보이지 않음
+      (같은 ID 갱신은 그 행만 제자리 갱신)
+    """
+
+    MIN_CAPACITY = 64
+
+    def __init__(self, segment: _Segment, dimensions: int, quantize: bool):
+        size = segment.size
+        self.size = size
+        self.quantize = quantize
+        self.ids = list(segment.ids[:size])
+        self.documents = list(segment.documents[:size])
+        self.raw_columns = {key: list(values[:size]) for key, values in segment.raw_columns.items()}
+        self.index = dict(segment.index)
+
+        capacity = max(self.MIN_CAPACITY, size * 2)
+        self.matrix = np.empty((capacity, dimensions), dtype=np.float32)
+        self.norms = np.empty(capacity, dtype=np.float32)
+        self.codes = self.scales = self.offsets = None
+        if quantize:
+            self.codes = np.empty((capacity, dimensions), dtype=np.int8)
+            self.scales = np.empty(capacity, dtype=np.float32)
+            self.offsets = np.empty(capacity, dtype=np.float32)
+        self.columns: Dict[str, np.ndarray] = {}
+        for key, column in segment.columns.items():
+            self.columns[key] = np.empty(capacity, dtype=column.dtype)
+            self.columns[key][:size] = column[:size]
+        if not size:
+            return
+
+        # 기존 행은 버퍼를 만들 때 한 번만 복사 (mmap으로 연 세대도 여기서 메모리로 올라옴)
+        self.matrix[:size] = segment.matrix[:size]
+        self.norms[:size] = segment.norms[:size]
+        if quantize:
+            if segment.codes is not None:
+                codes, scales, offsets = segment.codes[:size], segment.scales[:size], segment.offsets[:size]
+            else:
+                codes, scales, offsets = quantize_int8(segment.matrix[:size])
+            self.codes[:size], self.scales[:size], self.offsets[:size] = codes, scales, offsets
+
+    @property
+    def capacity(self) -> int:
+        return len(self.norms)
+
+    def _reserve(self, size: int):
+        if size <= self.capacity:
+            return
+        capacity = max(size, self.capacity * 2)
+
+        def grow(array: Optional[np.ndarray]) -> Optional[np.ndarray]:
+            if array is None:
+                return None
+            grown = np.empty((capacity, *array.shape[1:]), dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            return grown
+
+        self.matrix, self.norms = grow(self.matrix), grow(self.norms)
+        self.codes, self.scales, self.offsets = grow(self.codes), grow(self.scales), grow(self.offsets)
+        self.columns = {key: grow(column) for key, column in self.columns.items()}
+
+    def _set_column(self, key: str, row: int, value: Any):
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = np.empty(self.capacity, dtype=object)
+        elif column.dtype == bool and not isinstance(value, bool):
+            # bool 컬럼에 다른 값(None 포함)이 들어오면 _column_array처럼 object 컬럼으로
+            column = self.columns[key] = column.astype(object)
+        column[row] = value
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], vectors: np.ndarray) -> _Segment:
+        # 행 → 입력 위치 (배치 안에서 같은 ID가 반복되면 마지막 값)
+        latest: Dict[int, int] = {}
+        for i, chunk_id in enumerate(ids):
+            row = self.index.get(chunk_id)
+            if row is None:
+                row = self.index[chunk_id] = len(self.ids)
+                self.ids.append(chunk_id)
+                self.documents.append(documents[i])
+                for values in self.raw_columns.values():
+                    values.append(None)
+            else:
+                self.documents[row] = documents[i]
+            latest[row] = i
+
+            metadata = metadatas[i] or {}
+            for key, values in self.raw_columns.items():
+                values[row] = metadata.get(key)
+            for key, value in metadata.items():
+                if key not in self.raw_columns:
+                    self.raw_columns[key] = [None] * len(self.ids)
+                    self.raw_columns[key][row] = value
+
+        self._reserve(len(self.ids))
+        rows = np.fromiter(latest.keys(), dtype=np.int64, count=len(latest))
+        written = vectors[list(latest.values())]
+        self.matrix[rows] = written
+        self.norms[rows] = np.einsum("ij,ij->i", written, written)
+        if self.quantize:
+            self.codes[rows], self.scales[rows], self.offsets[rows] = quantize_int8(written)
+        # 새 행은 모든 컬럼, 기존 행은 바뀐 값만 기록 (새 컬럼의 이전 행은 None)
+        for row in latest:
+            for key, values in self.raw_columns.items():
+                self._set_column(key, row, values[row])
+        for key in self.raw_columns:
+            if key not in self.columns:
+                self.columns[key] = np.empty(self.capacity, dtype=object)
+
+        self.size = len(self.ids)
+        return self.snapshot()
+
+    def snapshot(self) -> _Segment:
+        size = self.size
+        return _Segment(
+            ids=self.ids,
+            documents=self.documents,
+            raw_columns=self.raw_columns,
+            matrix=self.matrix[:size],
+            index=self.index,
+            columns={key: column[:size] for key, column in self.columns.items()},
+            norms=self.norms[:size],
+            codes=self.codes[:size] if self.quantize else None,
+            scales=self.scales[:size] if self.quantize else None,
+            offsets=self.offsets[:size] if self.quantize else None,
+            size=size,
+        )
+
+
+class NumpyCollection:
+    """
+    NumPy 기반 물리 콜렉션 (Chroma 대체)
+    - 임베딩: float32 행렬 .npy 파일을 mmap으로 열어 여러 워커 프로세스가 페이지 캐시 공유
+    - int8 양자화(기본): 후보 선정은 벡터별 scale/offset을 둔 int8 코드로 스캔하고,
+      상위 후보만 float32 행으로 정확히 재계산 (스캔 메모리 약 1/4, float32 페이지는 후보만 읽음)
+      float32 원본은 재계산용으로 디스크에 그대로 두므로 디스크 크기는 줄지 않고 int8 코드만큼 늘어남 (약 1.25배)
+    - 메타데이터: ids/documents/컬럼별 값 목록을 JSON 사이드카에 저장, 필터는 컬럼 배열의 boolean mask
+    - 검색: 행렬-벡터 곱 1회 + argpartition top-k (거리는 Chroma 기본값과 같은 제곱 L2)
+    - 쓰기는 메모리에 모아 두었다가 flush()에서 새 세대 .npy 작성 후 사이드카를 원자적으로 교체
+    """
+
+    META_FILE = "meta.json"
+    FORMAT_VERSION = 2
+    # 재계산할 후보 수 = max(k * RESCORE_FACTOR, RESCORE_MIN)
+    RESCORE_FACTOR = 4
+    RESCORE_MIN = 32
+
+    def __init__(self, directory: Path, embeddings=None, quantization: str = QUANTIZATION_INT8):
+        self.directory = Path(directory)
+        self.name = self.directory.name
+        self.embeddings = embeddings
+        self.quantize = quantization == QUANTIZATION_INT8
+        self._lock = threading.RLock()
+        self._segment = _Segment()
+        # 첫 upsert 때 현재 세그먼트에서 만드는 쓰기 버퍼 (로드/삭제 시 폐기)
+        self._rows: Optional[_RowBuffer] = None
+        self._stamp = None
+        self._dirty = False
+        self._load()
+
+    @property
+    def meta_path(self) -> Path:
+        return self.directory / self.META_FILE
+
+    def _file_stamp(self):
+        try:
+            stat = self.meta_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self, attempts: int = 3):
+        self._rows = None
+        for attempt in range(attempts):
+            stamp = self._file_stamp()
+            if stamp is None:
+                self._segment, self._stamp = _Segment(), None
+                return
+            try:
+                with open(self.meta_path, encoding="utf-8") as f:
+                    meta = json.load(f)
+                ids = meta.get("ids", [])
+                files = meta.get("files") or {"embeddings": meta.get("embeddings_file")}
+                stats = codes = None
+                if ids:
+                    matrix = np.load(self.directory / files["embeddings"], mmap_mode="r")
+                    if files.get("stats"):
+                        stats = np.load(self.directory / files["stats"])
+                    if self.quantize and files.get("codes"):
+                        codes = np.load(self.directory / files["codes"], mmap_mode="r")
+                else:
+                    matrix = np.empty((0, meta.get("dimensions") or 0), dtype=np.float32)
+            except FileNotFoundError:
+                # 읽는 도중 다른 프로세스가 새 세대로 교체함 → 다시 읽음
+                if attempt == attempts - 1:
+                    raise
+                continue
+            # 양자화 코드 없이 저장된 세대를 int8로 열 때는 원본에서 다시 계산
+            use_stats = stats is not None and (codes is not None or not self.quantize)
+            self._segment = _Segment.build(
+                ids, meta.get("documents", []), meta.get("metadata", {}), matrix,
+                quantize=self.quantize, stats=stats if use_stats else None, codes=codes,
+            )
+            self._stamp = stamp
+            return
+
+    def _current(self) -> _Segment:
+        """다른 프로세스가 flush한 경우 다시 로드"""
+        if not self._dirty and self._file_stamp() != self._stamp:
+            with self._lock:
+                if not self._dirty and self._file_stamp() != self._stamp:
+                    self._load()
+        return self._segment
+
+    def count(self) -> int:
+        return self._current().size
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], embeddings: List[List[float]]):
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            segment = self._current()
+            if segment.size and vectors.shape[1] != segment.matrix.shape[1]:
+                raise ValueError(
+                    f"{self.name}: 임베딩 차원 불일치 (기존 {segment.matrix.shape[1]}, 입력 {vectors.shape[1]})"
+                )
+            if self._rows is None:
+                self._rows = _RowBuffer(segment, vectors.shape[1], self.quantize)
+            self._segment = self._rows.upsert(ids, documents, metadatas, vectors)
+            self._dirty = True
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            segment = self._current()
+            rows = [segment.index[chunk_id] for chunk_id in ids if chunk_id in segment.index]
+            if not rows:
+                return
+            keep = np.ones(segment.size, dtype=bool)
+            keep[rows] = False
+            kept_rows = np.flatnonzero(keep)
+            quantized = segment.codes is not None
+            self._segment = _Segment.build(
+                [segment.ids[row] for row in kept_rows],
+                [segment.documents[row] for row in kept_rows],
+                {key: [values[row] for row in kept_rows] for key, values in segment.raw_columns.items()},
+                np.array(segment.matrix[keep], dtype=np.float32),
+                quantize=self.quantize,
+                stats=segment.stats()[keep] if quantized or not self.quantize else None,
+                codes=np.array(segment.codes[keep]) if quantized else None,
+            )
+            self._rows = None
+            self._dirty = True
+
+    def delete_collection(self):
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._segment, self._rows, self._stamp, self._dirty = _Segment(), None, None, False
+
+    def flush(self):
+        """변경분을 새 세대 .npy 파일들 + 사이드카로 기록 (사이드카 교체 시점이 커밋)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            segment = self._segment
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            generation = time.time_ns()
+            arrays = {
+                "embeddings": np.ascontiguousarray(segment.matrix, dtype=np.float32),
+                "stats": segment.stats(),
+            }
+            if segment.codes is not None:
+                arrays["codes"] = np.ascontiguousarray(segment.codes, dtype=np.int8)
+
+            files = {}
+            for kind, array in arrays.items():
+                files[kind] = f"{kind}.{generation}.npy"
+                tmp_path = self.directory / f".{files[kind]}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, array)
+                os.replace(tmp_path, self.directory / files[kind])
+
+            write_json_atomic(self.meta_path, {
+                "format_version": self.FORMAT_VERSION,
+                "quantization": QUANTIZATION_INT8 if segment.codes is not None else QUANTIZATION_NONE,
+                "files": files,
+                "dimensions": int(segment.matrix.shape[1]) if segment.matrix.ndim == 2 else 0,
+                "ids": segment.ids[:segment.size],
+                "documents": segment.documents[:segment.size],
+                "metadata": {key: values[:segment.size] for key, values in segment.raw_columns.items()},
+            })
+
+            # 이전 세대 파일 정리 (이미 mmap 중인 다른 프로세스는 열린 inode를 계속 사용)
+            current = set(files.values())
+            for path in self.directory.glob("*.npy"):
+                if path.name not in current:
+                    path.unlink(missing_ok=True)
+
+            self._dirty = False
+            self._load()
+
+    def get_page(self, limit: int, offset: int) -> Tuple[List[str], List[str], List[Dict[str, Any]]]:
+        segment = self._current()
+        rows = range(offset, min(offset + limit, segment.size))
+        return [segment.ids[row] for row in rows], [segment.documents[row] for row in rows], [segment.metadata(row) for row in rows]
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[Document, float]]:
+        segment = self._current()
+        size = segment.size
+        if not size or k <= 0:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query_norm = float(query @ query)
+        # ||x - q||² = ||x||² - 2x·q + ||q||²
+        if segment.codes is not None:
+            dots = approximate_dot(segment.codes, segment.scales, segment.offsets, query)
+        else:
+            dots = segment.matrix @ query
+        distances = segment.norms - 2.0 * dots + query_norm
+
+        rows = np.flatnonzero(where_mask(segment.columns, filter, size)) if filter else np.arange(size)
+        if not len(rows):
+            return []
+        distances = distances[rows]
+
+        if segment.codes is not None:
+            # 근사 거리로 후보를 넉넉히 고른 뒤 float32 원본으로 정확히 재계산
+            candidates = min(len(rows), max(k * self.RESCORE_FACTOR, self.RESCORE_MIN))
+            picked = np.argpartition(distances, candidates - 1)[:candidates]
+            rows = np.sort(rows[picked])
+            distances = segment.norms[rows] - 2.0 * (segment.matrix[rows] @ query) + query_norm
+
+        k = min(k, len(rows))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind="stable")]
+        return [(segment.document(int(rows[i])), max(float(distances[i]), 0.0)) for i in top]
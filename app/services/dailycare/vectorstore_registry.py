@@ -0,0 +1,109 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+from config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStoreRegistry:
+    """프로세스 전역 VectorStoreService 1개를 백그라운드에서 준비 (single-flight)
+
+    - start_warmup(): 준비 스레드를 한 번만 시작 (이미 진행 중/완료면 무시)
+    - get(timeout): 준비 완료까지 최대 timeout초 대기, 준비 전이면 None
+    """
+
+    STATE_IDLE = "idle"
+    STATE_WARMING = "warming"
+    STATE_READY = "ready"
+    STATE_FAILED = "failed"
+
+    _lock = threading.Lock()
+    _ready = threading.Event()
+    _service = None
+    _state = STATE_IDLE
+    _error: Optional[str] = None
+    _started_at: Optional[float] = None
+    _finished_at: Optional[float] = None
+
+    @classmethod
+    def start_warmup(cls) -> bool:
+        """준비 스레드 시작 (실제로 시작했으면 True)"""
+        with cls._lock:
+            if cls._state in (cls.STATE_WARMING, cls.STATE_READY):
+                return False
+            # 실패 직후에는 바로 재시도하지 않음
+            if cls._state == cls.STATE_FAILED and time.time() - (cls._finished_at or 0) < Config.VECTOR_WARMUP_RETRY_SECONDS:
+                return False
+            cls._state = cls.STATE_WARMING
+            cls._error = None
+            cls._started_at = time.time()
+            cls._finished_at = None
+
+        thread = threading.Thread(target=cls._warmup, name="vectorstore-warmup", daemon=True)
+        thread.start()
+        return True
+
+    @classmethod
+    def _warmup(cls):
+        logger.info("벡터 스토어 백그라운드 준비 시작...")
+        try:
+            from app.services.dailycare.vectorstore_service import VectorStoreService
+            service = VectorStoreService()
+            stores = service.initialize_vector_db()
+            if not stores or not any(stores.values()):
+                raise RuntimeError("모든 콜렉션 초기화에 실패했습니다.")
+
+            with cls._lock:
+                cls._service = service
+                cls._state = cls.STATE_READY
+                cls._finished_at = time.time()
+            cls._ready.set()
+            logger.info(f"벡터 스토어 준비 완료 ({cls._finished_at - cls._started_at:.1f}초)")
+
+        except Exception as e:
+            logger.error(f"벡터 스토어 준비 실패: {e}", exc_info=True)
+            with cls._lock:
+                cls._state = cls.STATE_FAILED
+                cls._error = str(e)
+                cls._finished_at = time.time()
+
+    @classmethod
+    def get(cls, timeout: float = 0.0):
+        """준비된 VectorStoreService 반환 (최대 timeout초 대기, 준비 전이면 None)"""
+        if cls._ready.is_set():
+            return cls._service
+
+        cls.start_warmup()
+        if timeout and timeout > 0 and cls._ready.wait(timeout):
+            return cls._service
+        return None
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        return cls._ready.is_set()
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """헬스체크용 준비 상태"""
+        with cls._lock:
+            status = {"state": cls._state}
+            if cls._started_at:
+                status["elapsed_seconds"] = round((cls._finished_at or time.time()) - cls._started_at, 1)
+            if cls._error:
+                status["error"] = cls._error
+            return status
+
+    @classmethod
+    def reset(cls):
+        """상태 초기화 (테스트용)"""
+        with cls._lock:
+            cls._service = None
+            cls._state = cls.STATE_IDLE
+            cls._error = None
+            cls._started_at = None
+            cls._finished_at = None
+            cls._ready.clear()
@@ -1,17 +1,19 @@
 import os
-import re
 import json
 import time
-import pickle
 import hashlib
 import logging
+import threading
+import multiprocessing
 from flask import current_app as app
 
 import shutil
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Callable
 
-from langchain_text_splitters import MarkdownHeaderTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_core.embeddings import Embeddings
 from langchain_chroma import Chroma
@@ -21,65 +23,100 @@ from collections import Counter
 import numpy as np
 
 from config import Config
+from app.services.dailycare.keyword_index import BM25Index, matches_where
+from app.services.dailycare.product_name_index import ProductMatch, ProductNameIndex
+from app.services.dailycare.embedding_store import EmbeddingStore
+from app.services.dailycare.embedding_pipeline import EmbeddingIngestionPipeline, IngestionResult
+from app.services.dailycare.index_manifest import (
+    IndexManifest, ParsedChunkCache, CollectionSyncResult, EmbeddingMismatchError, BuildCheckpoint, BuildLock,
+    file_sha256, chunk_content_hash,
+)
+from app.services.dailycare.document_parser import DocumentParser, parse_file_task
+from app.services.dailycare.near_duplicates import COLLAPSE_VERSION, NearDuplicateDetector, collapse_near_duplicate_stream
+from app.services.dailycare.embedding_providers import (
+    EmbeddingProvider, OpenAIEmbeddingProvider, HashedNgramEmbeddingProvider, LEGACY_CACHE_NAMESPACE, LEGACY_SIGNATURE,
+)
+from app.services.dailycare.vector_backends import ChromaCollection, NumpyCollection, BACKEND_NUMPY
+from app.services.dailycare.partitioned_store import PartitionedCollection
+from app.services.dailycare.query_vectors import QueryVectorCache
+from app.services.dailycare.query_analyzer import QueryAnalysis, analyze_query
+from app.services.dailycare.collection_alias import CollectionAliases, ReadWriteLock, versioned_name
 
 
 logger = logging.getLogger(__name__)
 
 class CachedOpenAIEmbeddings(Embeddings):
-    """캐시를 지원하는 OpenAI 임베딩 래퍼"""
+    """캐시를 지원하는 임베딩 래퍼 (SQLite 단일 파일 캐시, 제공자별 네임스페이스)"""
     
-    def __init__(self, openai_embeddings: OpenAIEmbeddings, cache_dir: str):
-        self.openai_embeddings = openai_embeddings
+    CACHE_FILE_NAME = "embeddings.sqlite3"
+    
+    def __init__(self, provider: EmbeddingProvider, cache_dir: str, max_entries: int = None):
+        self.provider = provider
         self.cache_dir = cache_dir
         os.makedirs(cache_dir, exist_ok=True)
+        self.store = EmbeddingStore(
+            os.path.join(cache_dir, self.CACHE_FILE_NAME),
+            max_entries=max_entries or Config.EMBEDDING_CACHE_MAX_ENTRIES,
+            quantization=Config.EMBEDDING_CACHE_QUANTIZATION,
+        )
+        self._import_legacy_cache()
+    
+    def _import_legacy_cache(self):
+        """기존 <md5>.pkl 파일 캐시가 있으면 최초 1회 이관"""
+        if self.store.get_meta("pickle_imported"):
+            return
+        try:
+            self.store.import_pickle_dir(self.cache_dir)
+            self.store.set_meta("pickle_imported", str(int(time.time())))
+        except Exception as e:
+            logger.warning(f"기존 임베딩 캐시 이관 실패: {e}")
     
     def get_cache_key(self, text: str) -> str:
-        return hashlib.md5(text.encode("utf-8")).hexdigest()
+        namespace = self.provider.cache_namespace
+        if namespace == LEGACY_CACHE_NAMESPACE:
+            return hashlib.md5(text.encode("utf-8")).hexdigest()
+        return hashlib.md5(f"{namespace}\x00{text}".encode("utf-8")).hexdigest()
     
     def load_cache(self, text: str) -> Optional[List[float]]:
-        cache_file = os.path.join(self.cache_dir, f"{self.get_cache_key(text)}.pkl")
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, "rb") as f:
-                    return pickle.load(f)
-            except Exception as e:
-                logger.warning(f"임베딩 캐시 로드 실패: {e}")
+        key = self.get_cache_key(text)
+        try:
+            return self.store.get_many([key]).get(key)
+        except Exception as e:
+            logger.warning(f"임베딩 캐시 로드 실패: {e}")
         return None
     
     def save_cache(self, text: str, embedding: List[float]):
-        cache_file = os.path.join(self.cache_dir, f"{self.get_cache_key(text)}.pkl")
         try:
-            with open(cache_file, "wb") as f:
-                pickle.dump(embedding, f)
+            self.store.put_many({self.get_cache_key(text): embedding})
         except Exception as e:
             logger.warning(f"임베딩 캐시 저장 실패: {e}")
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """문서들을 임베딩 (캐시 활용)"""
-        embeddings = []
-        uncached_texts = []
-        uncached_indices = []
+        """문서들을 임베딩 (캐시 활용, 다건 조회/저장)"""
+        keys = [self.get_cache_key(text) for text in texts]
+        try:
+            cached = self.store.get_many(keys)
+        except Exception as e:
+            logger.warning(f"임베딩 캐시 로드 실패: {e}")
+            cached = {}
         
-        # 캐시에서 로드 시도
-        for i, text in enumerate(texts):
-            cached_embedding = self.load_cache(text)
-            if cached_embedding is not None:
-                embeddings.append(cached_embedding)
-                logger.debug(f"캐시에서 임베딩 로드: {text[:50]}...")
-            else:
-                embeddings.append(None)  # 플레이스홀더
-                uncached_texts.append(text)
-                uncached_indices.append(i)
+        embeddings: List[Optional[List[float]]] = [cached.get(key) for key in keys]
+        uncached_indices = [i for i, embedding in enumerate(embeddings) if embedding is None]
         
-        # 캐시에 없는 텍스트들만 OpenAI API 호출
-        if uncached_texts:
-            logger.info(f"새로운 임베딩 생성: {len(uncached_texts)}개 텍스트")
-            new_embeddings = self.openai_embeddings.embed_documents(uncached_texts)
+        # 캐시에 없는 텍스트들만 임베딩 제공자 호출 (같은 텍스트는 한 번만)
+        if uncached_indices:
+            unique_texts = list(dict.fromkeys(texts[i] for i in uncached_indices))
+            logger.info(f"새로운 임베딩 생성: {len(unique_texts)}개 텍스트 (캐시 적중: {len(texts) - len(uncached_indices)}개)")
+            # 캐시가 양자화되어 있으면 캐시 적중 때와 같은 값을 반환하도록 저장 형식으로 맞춤
+            new_embeddings = dict(zip(unique_texts, map(self.store.round_trip, self.provider.embed_documents(unique_texts))))
+            
+            for idx in uncached_indices:
+                embeddings[idx] = new_embeddings[texts[idx]]
             
-            # 새 임베딩을 결과에 삽입하고 캐시에 저장
-            for idx, new_embedding in zip(uncached_indices, new_embeddings):
-                embeddings[idx] = new_embedding
-                self.save_cache(texts[idx], new_embedding)
+            try:
+                self.store.put_many({self.get_cache_key(text): emb for text, emb in new_embeddings.items()})
+            except Exception as e:
+                logger.warning(f"임베딩 캐시 저장 실패: {e}")
         
         return embeddings
     
@@ -91,15 +128,35 @@ class CachedOpenAIEmbeddings(Embeddings):
             return cached_embedding
         
         logger.debug(f"새 쿼리 임베딩 생성: {text[:50]}...")
-        embedding = self.openai_embeddings.embed_query(text)
+        embedding = self.store.round_trip(self.provider.embed_query(text))
         self.save_cache(text, embedding)
         return embedding
 
-class VectorStoreService:
-    def __init__(self, persist_directory: str = "./vector_db"):
+class VectorStoreService(DocumentParser):
+    # 콜렉션별 원본 파일 패턴
+    SOURCE_PATTERNS = {
+        'general_guides': "**/*.md",
+        'medications': "**/*.json",
+    }
+    # 빌드 체크포인트 기록 간격 (청크 수)
+    CHECKPOINT_EVERY = 500
+    # Reciprocal Rank Fusion 상수 (순위 차이 완화)
+    RRF_K = 60
+    # 새 버전 콜렉션 교체 전 검증용 쿼리
+    SMOKE_QUERIES = {
+        'general_guides': ["강아지 예방접종 시기", "고양이 사료 급여량"],
+        'medications': ["구충제 용법용량", "피부염 치료제"],
+    }
+
+    def __init__(self, persist_directory: str = "./vector_db", parallel_parse: bool = False):
+        """
+        parallel_parse: 변경 파일을 프로세스 풀로 파싱 (CLI/배포 스크립트처럼 빌드 전용 프로세스에서만 사용)
+        - 웹 프로세스는 여러 스레드가 도는 중에 fork하면 잠금 상태가 복제돼 교착될 수 있어 현재 프로세스에서 직렬 파싱
+        """
         self.documents_path = Path(Config.DOCUMENTS_PATH)
         self.vector_db = Path(Config.VECTOR_DB)
         self.persist_directory = persist_directory
+        self.parallel_parse = parallel_parse
         
         # 멀티 콜렉션 설정
         self.collections = {
@@ -108,24 +165,84 @@ class VectorStoreService:
         }
         
         # 각 콜렉션별 스토어
-        self.stores: Dict[str, Optional[Chroma]] = {
+        self.stores: Dict[str, Optional[PartitionedCollection]] = {
             'general_guides': None,
             'medications': None
         }
+
+        # 각 콜렉션별 BM25 키워드 색인 (콜렉션 로드/재생성 시 갱신)
+        self.keyword_indexes: Dict[str, Optional[BM25Index]] = {
+            'general_guides': None,
+            'medications': None
+        }
+        self._keyword_index_lock = threading.RLock()
+        # 의약품 제품명 색인 (만든 시점의 의약품 키워드 색인과 함께 보관 - 키워드 색인이 바뀌면 다시 생성)
+        self._product_index: Optional[Tuple[BM25Index, ProductNameIndex]] = None
         
         # 캐시를 지원하는 임베딩 래퍼 생성
-        openai_embeddings = OpenAIEmbeddings(api_key=Config.OPENAI_API_KEY)
         self.cache_dir = os.path.join(os.path.dirname(str(self.vector_db)), "embedding_cache")
-        self.embedding = CachedOpenAIEmbeddings(openai_embeddings, self.cache_dir)
+        self.embedding = CachedOpenAIEmbeddings(self._create_embedding_provider(), self.cache_dir)
+        # 질문/반려동물 프로필 벡터 캐시 (검색 벡터 = 두 벡터의 가중합)
+        self.query_vectors = QueryVectorCache(lambda text: self.embedding.embed_query(text))
+
+        # 논리 콜렉션 → 버전 콜렉션 alias (blue/green 재색인)
+        self.aliases = CollectionAliases(self.vector_db / "collection_aliases.json").load()
+        self._swap_lock = ReadWriteLock()
+        self._alias_checked_at = time.monotonic()
+        self._gc_timers: List[threading.Timer] = []
+
+        # 콜렉션별 검색을 동시에 수행하는 공용 스레드 풀
+        self._search_executor = ThreadPoolExecutor(max_workers=Config.VECTOR_SEARCH_WORKERS, thread_name_prefix="vector-search")
+
+        # 청크 상한/겹침 토큰 수 (DocumentParser)
+        self.chunk_max_tokens = Config.CHUNK_MAX_TOKENS
+        self.chunk_overlap_tokens = Config.CHUNK_OVERLAP_TOKENS
+
+        # 파일 해시별 파싱 결과 캐시 (증분 재색인용)
+        self.parsed_cache = ParsedChunkCache(os.path.join(os.path.dirname(str(self.vector_db)), "parsed_chunk_cache"))
 
         logger.info(f"VectorStoreService initialized. documents_path={self.documents_path}, vector_db={self.vector_db}")
 
+    @staticmethod
+    def _create_embedding_provider() -> EmbeddingProvider:
+        """EMBEDDING_PROVIDER 설정에 따른 임베딩 제공자 (local: 네트워크 없는 해싱 임베딩)"""
+        if Config.EMBEDDING_PROVIDER == 'local':
+            return HashedNgramEmbeddingProvider(dimensions=Config.LOCAL_EMBEDDING_DIMENSIONS)
+        return OpenAIEmbeddingProvider(OpenAIEmbeddings(
+            api_key=Config.OPENAI_API_KEY,
+            model=Config.EMBEDDING_MODEL,
+            dimensions=Config.EMBEDDING_DIMENSIONS or None,
+        ))
+
+    def _embedding_signature(self) -> Optional[Dict[str, Any]]:
+        provider = getattr(self.embedding, "provider", None)
+        return provider.signature() if isinstance(provider, EmbeddingProvider) else None
+
+    def _check_embedding(self, collection_name: str, manifest: IndexManifest, count: int):
+        """기존 콜렉션과 다른 임베딩 모델/차원으로는 쓰지 않음 (기록 전 콜렉션은 기본 모델로 간주)"""
+        current = self._embedding_signature()
+        recorded = manifest.embedding or (LEGACY_SIGNATURE if manifest.exists and count else None)
+        if current and recorded and recorded != current:
+            raise EmbeddingMismatchError(collection_name, recorded, current)
+
+    def pending_embedding_migrations(self) -> Dict[str, Dict[str, Any]]:
+        """현재 임베딩 설정과 다른 모델로 만들어진 콜렉션 {타입: 기록된 임베딩 정보}"""
+        pending = {}
+        for collection_type in self.collections:
+            collection_name = self._resolve_collection_name(collection_type)
+            manifest = self._manifest(collection_name).load()
+            try:
+                self._check_embedding(collection_name, manifest, self._open_store(collection_name).count())
+            except EmbeddingMismatchError as e:
+                pending[collection_type] = e.recorded
+        return pending
+
     # -------------------------
     # Public: initialize DB
     # -------------------------
-    def initialize_vector_db(self) -> Dict[str, Optional[Chroma]]:
+    def initialize_vector_db(self) -> Dict[str, Optional[PartitionedCollection]]:
         """
-        멀티 콜렉션 벡터 DB 초기화
+        멀티 콜렉션 벡터 DB 초기화 (매니페스트 기준 증분 동기화)
         """
         logger.info("멀티 콜렉션 벡터 스토어 초기화 시작...")
         logger.info(f"문서 경로: {self.documents_path}")
@@ -143,177 +260,587 @@ class VectorStoreService:
                 logger.info("벡터 DB 디렉토리 생성")
             
             # 각 콜렉션별 초기화
-            for collection_type, collection_name in self.collections.items():
+            for collection_type in self.collections:
                 logger.info(f"{collection_type} 콜렉션 초기화 중...")
                 
                 try:
-                    # 기존 콜렉션 로드 시도
-                    store = Chroma(
-                        collection_name=collection_name,
-                        embedding_function=self.embedding,
-                        persist_directory=str(self.vector_db),
-                    )
-                    
-                    # 건강 체크
-                    count = store._collection.count()
-                    if count == 0:
-                        logger.info(f"{collection_type} 콜렉션이 비어있어서 새로 생성합니다.")
-                        store = self.create_collection_vector_db(collection_type)
-                    else:
-                        logger.info(f"{collection_type} 콜렉션 로딩 성공 (문서 수: {count})")
-                    
-                    self.stores[collection_type] = store
+                    # 기존 콜렉션 로드 후 변경된 문서만 반영
+                    self.stores[collection_type] = self.sync_collection(collection_type)
                     
                 except Exception as e:
                     logger.warning(f"{collection_type} 콜렉션 로딩 실패: {e}")
                     logger.info(f"{collection_type} 콜렉션을 새로 생성합니다.")
                     self.stores[collection_type] = self.create_collection_vector_db(collection_type)
 
+                if self.keyword_indexes.get(collection_type) is None:
+                    self.build_keyword_index(collection_type)
+
+            self._get_product_index()
             return self.stores
 
         except Exception as e:
             logger.error(f"멀티 콜렉션 초기화 중 치명적 오류: {e}", exc_info=True)
             return self.stores
 
-    def create_collection_vector_db(self, collection_type: str) -> Optional[Chroma]:
+    def create_collection_vector_db(self, collection_type: str) -> Optional[PartitionedCollection]:
         """
-        특정 타입의 콜렉션을 생성
+        특정 타입의 콜렉션을 처음부터 다시 생성 (현재 alias가 가리키는 콜렉션을 제자리에서 재생성)
         """
         logger.info(f"{collection_type} 콜렉션 생성 시작...")
-        
-        if collection_type == 'general_guides':
-            documents = self.load_general_guide_documents()
-        elif collection_type == 'medications':
-            documents = self.load_medication_documents()
-        else:
+        if collection_type not in self.collections:
             logger.error(f"알 수 없는 콜렉션 타입: {collection_type}")
             return None
+
+        # 재생성되는 콜렉션의 키워드 색인/매니페스트는 무효화
+        self.keyword_indexes[collection_type] = None
+        collection_name = self._resolve_collection_name(collection_type)
+        self._manifest(collection_name).path.unlink(missing_ok=True)
+        store = self._reset_store(collection_name)
         
-        if not documents:
+        return self.sync_collection(collection_type, store)
+
+    # -------------------------
+    # Incremental re-index (manifest)
+    # -------------------------
+    def sync_collection(
+        self, collection_type: str, store: Optional[PartitionedCollection] = None,
+        progress: Optional[Callable[[IngestionResult], None]] = None,
+    ) -> Optional[PartitionedCollection]:
+        """
+        현재 서비스 중인 콜렉션을 매니페스트 기준으로 증분 재색인
+        progress: 임베딩 배치 저장마다 호출 (CLI 진행률 표시용)
+        """
+        collection_name = self._resolve_collection_name(collection_type)
+        try:
+            result = self._sync_physical_collection(collection_type, collection_name, store, progress)
+        except EmbeddingMismatchError as e:
+            # 제자리 재생성하지 않음: 검색 불가 상태로 두고 마이그레이션 안내
+            logger.error(f"{e} 'python deploy/scripts/init_vector_db.py --migrate-embeddings'로 새 콜렉션에 재색인하세요.")
+            return None
+
+        # 키워드 색인 증분 갱신 (아직 없으면 필요할 때 생성)
+        index = self.keyword_indexes.get(collection_type)
+        if result.reset:
+            self.keyword_indexes[collection_type] = None
+        elif index is not None:
+            index.remove_documents(result.deleted_ids)
+            self._add_to_keyword_index(index, result.written)
+            if self._product_index is not None and self._product_index[0] is index:
+                product_index = self._product_index[1]
+                product_index.remove_documents(result.deleted_ids)
+                product_index.add_documents(
+                    [chunk_id for chunk_id, _, _ in result.written],
+                    [Document(id=chunk_id, page_content=text, metadata=metadata) for chunk_id, text, metadata in result.written],
+                )
+
+        count = result.store.count()
+        if count == 0:
             logger.error(f"{collection_type}에 해당하는 문서가 없습니다.")
             return None
-        
-        return self._create_chroma_store(documents, self.collections[collection_type])
+        logger.info(f"{collection_type} 콜렉션 준비 완료 (문서 수: {count})")
+        return result.store
+
+    def _sync_physical_collection(
+        self, collection_type: str, collection_name: str, store: Optional[PartitionedCollection] = None,
+        progress: Optional[Callable[[IngestionResult], None]] = None,
+    ) -> CollectionSyncResult:
+        """빌드 잠금을 잡고 동기화 (잠금을 얻은 뒤 저장소를 열어 다른 프로세스가 쓴 내용부터 반영)"""
+        with self._build_lock(collection_name):
+            return self._sync_locked(collection_type, collection_name, store or self._open_store(collection_name), progress)
+
+    def _sync_locked(
+        self, collection_type: str, collection_name: str, store: PartitionedCollection,
+        progress: Optional[Callable[[IngestionResult], None]] = None,
+    ) -> CollectionSyncResult:
+        """
+        실제 콜렉션 하나를 매니페스트 기준으로 동기화 (빌드 잠금을 잡은 상태에서 호출)
+        - mtime/크기 → sha256 순으로 변경 파일만 골라 재파싱
+        - 내용 해시가 바뀐 청크만 안정적인 ID로 upsert
+        - 원본이 사라진 청크는 삭제
+        - 중단된 이전 동기화의 체크포인트에 같은 내용으로 기록된 청크는 다시 임베딩하지 않음
+        """
+        manifest = self._manifest(collection_name).load()
+        checkpoint = self._checkpoint(collection_name).load()
+        result = CollectionSyncResult(store=store)
+
+        count = store.count()
+        self._check_embedding(collection_name, manifest, count)
+        if count and not self._store_matches_manifest(count, manifest, checkpoint):
+            # 매니페스트 없이 만들어진(또는 어긋난) 콜렉션은 비우고 다시 채움 (임베딩은 캐시 재사용)
+            logger.info(f"{collection_name} 콜렉션이 매니페스트와 일치하지 않아 전체 재색인합니다.")
+            result.store = store = self._reset_store(collection_name)
+            result.reset = True
+            manifest.reset()
+            checkpoint.clear()
+        elif not count:
+            manifest.reset()
+            checkpoint.clear()
+        elif checkpoint.chunks:
+            logger.info(f"{collection_name} 중단된 빌드를 이어서 진행합니다 (저장 완료 {len(checkpoint.chunks)}개 청크)")
+        resuming = bool(checkpoint.chunks)
+
+        pending_files: Dict[str, Tuple[str, os.stat_result, Dict[str, str]]] = {}
+        changed: Dict[str, Tuple[Path, str, os.stat_result]] = {}
+        unchanged: Dict[str, Tuple[Path, os.stat_result]] = {}
+        seen_files = set()
+
+        # 청크 생성 설정(준중복 통합 등)이 바뀌면 모든 파일의 청크를 다시 계산 (파싱은 캐시 재사용)
+        settings = self._ingestion_settings(collection_type)
+        settings_changed = (manifest.settings or {}) != settings
+
+        for path in self._list_source_files(collection_type):
+            rel_path = self._relative_path(path)
+            seen_files.add(rel_path)
+            stat = path.stat()
+            if not settings_changed and manifest.is_unchanged(rel_path, stat):
+                unchanged[rel_path] = (path, stat)
+                continue
 
-    def load_general_guide_documents(self) -> List[Document]:
-        """일반 가이드 문서들만 로드 (.md 파일)"""
-        documents: List[Document] = []
-        
-        md_files = list(self.documents_path.glob("**/*.md"))
-        logger.info(f"일반 가이드 Markdown 파일 수: {len(md_files)}")
-        
-        for md_file in md_files:
-            try:
-                docs = self.load_markdown(md_file)
-                # 메타데이터에 컬렉션 타입 추가
-                for doc in docs:
-                    doc.metadata['collection_type'] = 'general_guide'
-                documents.extend(docs)
-            except Exception as e:
-                logger.warning(f"일반 가이드 파일 처리 실패 ({md_file}): {e}")
-        
-        logger.info(f"일반 가이드 총 {len(documents)}개 문서 청크 로딩 완료")
-        return documents
+            sha256 = file_sha256(path)
+            if not settings_changed and manifest.files.get(rel_path, {}).get("sha256") == sha256:
+                manifest.touch_file(rel_path, stat)
+                unchanged[rel_path] = (path, stat)
+                continue
 
-    def load_medication_documents(self) -> List[Document]:
-        """의약품 문서들만 로드 (.json 파일)"""
-        documents: List[Document] = []
-        
-        json_files = list(self.documents_path.glob("**/*.json"))
-        logger.info(f"의약품 JSON 파일 수: {len(json_files)}")
-        
-        for json_file in json_files:
-            try:
-                docs = self.load_json(json_file)
-                # 메타데이터에 컬렉션 타입 추가
-                for doc in docs:
-                    doc.metadata['collection_type'] = 'medication'
-                documents.extend(docs)
-            except Exception as e:
-                logger.warning(f"의약품 파일 처리 실패 ({json_file}): {e}")
-        
-        logger.info(f"의약품 총 {len(documents)}개 문서 청크 로딩 완료")
-        return documents
+            changed[rel_path] = (path, sha256, stat)
 
-    def _create_chroma_store(self, documents: List[Document], collection_name: str) -> Optional[Chroma]:
-        """공통 Chroma 스토어 생성 함수"""
-        texts = [doc.page_content for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
+        removed_files = [rel_path for rel_path in manifest.files if rel_path not in seen_files]
+        for rel_path in removed_files:
+            result.deleted_ids.extend(manifest.chunk_hashes(rel_path))
+            manifest.remove_file(rel_path)
 
-        BATCH_SIZE = 50   # 배치 크기 감소 (rate limiting 대응)
-        MAX_TOKENS_PER_BATCH = 50_000  # 토큰 수 감소
-        DELAY_BETWEEN_BATCHES = 2  # 배치 간 2초 대기
-        encoder = tiktoken.get_encoding("cl100k_base")
-
-        store = None
-        batch_texts, batch_metadatas = [], []
-        token_count = 0
+        if settings.get("dedup_threshold") and (changed or removed_files):
+            # 준중복 묶음은 파일을 넘나들므로 변경 없는 파일도 포함해 경로순으로 다시 묶음 (대표 청크가 매번 같도록)
+            for rel_path, (path, stat) in unchanged.items():
+                changed[rel_path] = (path, manifest.files[rel_path]["sha256"], stat)
+            changed = dict(sorted(changed.items()))
+            collapse_threshold = settings["dedup_threshold"]
+        else:
+            collapse_threshold = None
+
+        def iter_upserts(parsed_files: Iterator[Tuple[str, List[Dict[str, Any]]]]):
+            """파싱이 끝난 파일 순서대로 바뀐 청크를 흘려보냄 (파싱과 임베딩이 겹쳐 진행)"""
+            for rel_path, chunks in parsed_files:
+                path, sha256, stat = changed[rel_path]
+                old_hashes = manifest.chunk_hashes(rel_path)
+                new_hashes = {chunk["id"]: chunk["hash"] for chunk in chunks}
+
+                for chunk in chunks:
+                    if old_hashes.get(chunk["id"]) == chunk["hash"]:
+                        continue
+                    upsert = (chunk["id"], chunk["text"], chunk["metadata"])
+                    result.upserted.append(upsert)
+                    if checkpoint.chunks.get(chunk["id"]) == chunk["hash"]:
+                        result.resumed += 1
+                        continue
+                    checkpoint.track(chunk["id"], chunk["hash"])
+                    yield upsert
+                result.deleted_ids.extend(chunk_id for chunk_id in old_hashes if chunk_id not in new_hashes)
+                pending_files[rel_path] = (sha256, stat, new_hashes)
+
+        if changed:
+            logger.info(f"{collection_name} 증분 재색인: 변경 파일 {len(changed)}개 파싱/임베딩 시작")
+            workers = self._parse_workers(len(changed))
+            with self._parse_pool(workers) as pool:
+                parsed_files = self._iter_parsed_files(collection_type, changed, pool, lookahead=workers * 2)
+                if collapse_threshold is not None:
+                    parsed_files = self._collapse_near_duplicates(parsed_files, settings)
+                ingestion = self._ingest_chunks(store, iter_upserts(parsed_files), collection_name, checkpoint, progress)
+            result.failed_ids = list(ingestion.failed_ids)
+
+        # upsert와 삭제 대상 ID는 겹치지 않으므로 임베딩 후 삭제
+        if result.deleted_ids:
+            self._delete_chunks(store, result.deleted_ids)
+
+        logger.info(
+            f"{collection_name} 증분 재색인: 변경 파일 {len(pending_files)}개, "
+            f"upsert {len(result.upserted)}개, 삭제 {len(result.deleted_ids)}개 청크"
+        )
+
+        # 실패 청크가 있는 파일은 기록하지 않아 다음 동기화에서 다시 시도
+        failed_ids = set(result.failed_ids)
+        for rel_path, (sha256, stat, chunk_hashes) in pending_files.items():
+            if failed_ids.intersection(chunk_hashes):
+                logger.warning(f"{rel_path} 일부 청크 저장 실패 - 다음 재색인에서 다시 시도합니다.")
+                continue
+            manifest.record_file(rel_path, sha256, stat, chunk_hashes)
+        if resuming:
+            self._delete_stray_chunks(store, set(manifest.all_chunk_ids()))
+        store.flush()
+        manifest.embedding = self._embedding_signature() or manifest.embedding
+        manifest.settings = settings
+        manifest.save()
+        checkpoint.clear()
+
+        result.expected_count = len(manifest.all_chunk_ids())
+        return result
+
+    def plan_collection(self, collection_type: str) -> Dict[str, Any]:
+        """
+        동기화하면 새로 임베딩할 청크/토큰 수 추정 (저장소/매니페스트는 바꾸지 않음)
+        - total_chunks: 동기화 후 콜렉션 문서 수
+        - embed_chunks / embed_tokens: 매니페스트나 중단된 빌드 체크포인트에 같은 내용이 없는 청크
+        - resumed: 중단된 빌드에서 이미 저장되어 건너뛸 청크
+        """
+        collection_name = self._resolve_collection_name(collection_type)
+        manifest = self._manifest(collection_name).load()
+        checkpoint = self._checkpoint(collection_name).load()
+        settings = self._ingestion_settings(collection_type)
+        if not self._store_matches_manifest(self._open_store(collection_name).count(), manifest, checkpoint):
+            # 동기화 시 콜렉션을 비우고 전체 재색인하는 경우
+            manifest.reset()
+            checkpoint.chunks = {}
+
+        files = {
+            self._relative_path(path): (path, file_sha256(path), None)
+            for path in self._list_source_files(collection_type)
+        }
+        file_chunks = self._iter_parsed_files(collection_type, files)
+        if settings.get("dedup_threshold"):
+            file_chunks = self._collapse_near_duplicates(file_chunks, settings)
 
-        for i, (text, metadata) in enumerate(zip(texts, metadatas)):
-            text_tokens = len(encoder.encode(text))
-            
-            if token_count + text_tokens > MAX_TOKENS_PER_BATCH or len(batch_texts) >= BATCH_SIZE:
-                try:
-                    if store is None:
-                        logger.info(f"{collection_name} 첫 배치({i-len(batch_texts)}~{i})로 생성")
-                        store = Chroma.from_texts(
-                            texts=batch_texts,
-                            embedding=self.embedding,
-                            metadatas=batch_metadatas,
-                            persist_directory=str(self.vector_db),
-                            collection_name=collection_name
-                        )
-                    else:
-                        logger.info(f"{collection_name} 추가 배치({i-len(batch_texts)}~{i}) 저장")
-                        store.add_texts(
-                            texts=batch_texts,
-                            metadatas=batch_metadatas,
-                        )
-                    
-                    batch_texts, batch_metadatas = [], []
-                    token_count = 0
-                    
-                    # Rate limiting 대응을 위한 대기
-                    time.sleep(DELAY_BETWEEN_BATCHES)
-                    
-                except Exception as e:
-                    logger.error(f"{collection_name} 배치 {i//BATCH_SIZE} 임베딩 실패: {e}")
-                    batch_texts, batch_metadatas = [], []
-                    token_count = 0
+        plan = {
+            "collection": collection_name, "files": len(files), "total_chunks": 0,
+            "embed_chunks": 0, "embed_tokens": 0, "resumed": 0,
+        }
+        for rel_path, chunks in file_chunks:
+            old_hashes = manifest.chunk_hashes(rel_path)
+            for chunk in chunks:
+                plan["total_chunks"] += 1
+                if old_hashes.get(chunk["id"]) == chunk["hash"]:
                     continue
+                if checkpoint.chunks.get(chunk["id"]) == chunk["hash"]:
+                    plan["resumed"] += 1
+                    continue
+                plan["embed_chunks"] += 1
+                plan["embed_tokens"] += chunk["metadata"].get("token_count") or self._count_tokens(chunk["text"])
+        return plan
+
+    def _add_to_keyword_index(self, index: BM25Index, chunks: List[Tuple[str, str, Dict[str, Any]]]):
+        index.add_documents(
+            [chunk_id for chunk_id, _, _ in chunks],
+            [Document(id=chunk_id, page_content=text, metadata=metadata) for chunk_id, text, metadata in chunks],
+        )
+
+    def _ingestion_settings(self, collection_type: str) -> Dict[str, Any]:
+        """매니페스트에 기록하는 청크 생성 설정 (바뀌면 전체 청크 재계산)"""
+        settings = {"chunk_max_tokens": self.chunk_max_tokens, "chunk_overlap_tokens": self.chunk_overlap_tokens}
+        if collection_type == 'medications' and Config.MEDICATION_DEDUP_THRESHOLD:
+            settings["dedup_threshold"] = Config.MEDICATION_DEDUP_THRESHOLD
+            settings["dedup_window"] = Config.MEDICATION_DEDUP_WINDOW
+            settings["dedup_version"] = COLLAPSE_VERSION
+        return settings
+
+    def _collapse_near_duplicates(
+        self, parsed_files: Iterable[Tuple[str, List[Dict[str, Any]]]], settings: Dict[str, Any],
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        파싱된 파일 순서대로 준중복 청크를 대표 청크로 통합하며 흘려보냄 (대표는 먼저 나온 청크)
+        - dedup_window개 청크 안의 준중복만 묶어 대기 메모리를 제한하고 첫 배치가 전체 파싱을 기다리지 않게 함
+        """
+        return collapse_near_duplicate_stream(
+            parsed_files, NearDuplicateDetector(threshold=settings["dedup_threshold"]), chunk_content_hash,
+            window=settings["dedup_window"],
+        )
 
-            batch_texts.append(text)
-            batch_metadatas.append(metadata)
-            token_count += text_tokens
+    # -------------------------
+    # Blue/green rebuild (versioned collections + alias)
+    # -------------------------
+    def _resolve_collection_name(self, collection_type: str) -> str:
+        """alias가 가리키는 실제 콜렉션 이름 (alias가 없으면 기본 이름)"""
+        return self.aliases.resolve(collection_type) or self.collections[collection_type]
 
-        # 남은 배치 처리
-        if batch_texts:
+    def rebuild_collection_blue_green(self, collection_type: str, smoke_queries: Optional[List[str]] = None) -> bool:
+        """
+        새 버전 콜렉션을 별도로 만든 뒤 검증하고 alias를 원자적으로 교체
+        - 빌드 중에도 기존 버전으로 계속 검색 가능
+        - 검증(문서 수, 스모크 쿼리) 실패 시 새 버전 폐기
+        - 교체 후 이전 버전은 유예 시간 뒤 삭제 (다른 워커 프로세스가 alias를 다시 읽을 시간)
+        """
+        base_name = self.collections[collection_type]
+        old_name = self._resolve_collection_name(collection_type)
+        version = self.aliases.version(collection_type) + 1
+        new_name = versioned_name(base_name, version)
+        logger.info(f"{collection_type} blue/green 재색인 시작: {old_name} → {new_name}")
+
+        with self._build_lock(new_name):
+            self._manifest(new_name).path.unlink(missing_ok=True)
+            result = self._sync_locked(collection_type, new_name, self._reset_store(new_name))
+
+        if not self._validate_collection(collection_type, result, smoke_queries):
+            logger.error(f"{new_name} 검증 실패 - 새 버전을 폐기하고 {old_name}을 유지합니다.")
+            self._drop_collection(new_name)
+            return False
+
+        index = BM25Index()
+        self._add_to_keyword_index(index, result.written)
+
+        with self._swap_lock.write():
+            self.stores[collection_type] = result.store
+            self.keyword_indexes[collection_type] = index
+            self.aliases.set(collection_type, version, new_name)
+        logger.info(f"{collection_type} alias 교체 완료: {new_name} (문서 수: {result.expected_count})")
+
+        if old_name != new_name:
+            timer = threading.Timer(Config.VECTOR_GC_GRACE_SECONDS, self._drop_collection, args=(old_name,))
+            timer.daemon = True
+            timer.start()
+            self._gc_timers.append(timer)
+        return True
+
+    def wait_for_gc(self):
+        """예약된 이전 버전 삭제가 끝날 때까지 대기 (단발성 스크립트용)"""
+        for timer in self._gc_timers:
+            timer.join()
+        self._gc_timers.clear()
+
+    def start_background_rebuild(self, collection_type: str, smoke_queries: Optional[List[str]] = None) -> threading.Thread:
+        """blue/green 재색인을 백그라운드 스레드로 실행"""
+        thread = threading.Thread(
+            target=self.rebuild_collection_blue_green,
+            args=(collection_type, smoke_queries),
+            name=f"rebuild-{collection_type}",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _validate_collection(self, collection_type: str, result: CollectionSyncResult, smoke_queries: Optional[List[str]]) -> bool:
+        count = result.store.count()
+        if result.failed_ids or count == 0 or count != result.expected_count:
+            logger.error(f"문서 수 검증 실패: 저장 {count}개 / 기대 {result.expected_count}개, 실패 {len(result.failed_ids)}개")
+            return False
+
+        for query in smoke_queries or self.SMOKE_QUERIES.get(collection_type, []):
             try:
-                if store is None:
-                    logger.info(f"{collection_name} 마지막 배치로 생성")
-                    store = Chroma.from_texts(
-                        texts=batch_texts,
-                        embedding=self.embedding,
-                        metadatas=batch_metadatas,
-                        persist_directory=str(self.vector_db),
-                        collection_name=collection_name
-                    )
-                else:
-                    logger.info(f"{collection_name} 마지막 배치 저장")
-                    store.add_texts(
-                        texts=batch_texts,
-                        metadatas=batch_metadatas,
-                    )
-                    
+                hits = result.store.similarity_search_by_vector_with_relevance_scores(self.embedding.embed_query(query), 1)
+                if not hits:
+                    logger.error(f"스모크 쿼리 결과 없음: {query}")
+                    return False
             except Exception as e:
-                logger.error(f"{collection_name} 마지막 배치 임베딩 실패: {e}")
+                logger.error(f"스모크 쿼리 실패 ({query}): {e}")
+                return False
+        return True
 
-        if store:
-            logger.info(f"{collection_name} 콜렉션 생성 완료 (총 {len(documents)}개 문서)")
-        else:
-            logger.error(f"{collection_name} 콜렉션 생성 실패")
+    def _drop_collection(self, collection_name: str):
+        """콜렉션과 매니페스트 삭제"""
+        try:
+            self._open_store(collection_name).delete_collection()
+            self._manifest(collection_name).path.unlink(missing_ok=True)
+            logger.info(f"이전 버전 콜렉션 삭제: {collection_name}")
+        except Exception as e:
+            logger.warning(f"콜렉션 삭제 실패 ({collection_name}): {e}")
+
+    def _refresh_aliases(self):
+        """다른 프로세스에서 alias를 바꿨으면 새 버전 콜렉션으로 전환 (최대 5초 간격 확인)"""
+        now = time.monotonic()
+        if now - self._alias_checked_at < 5:
+            return
+        self._alias_checked_at = now
+        if not self.aliases.changed_on_disk():
+            return
+
+        with self._swap_lock.write():
+            previous = {collection_type: self._resolve_collection_name(collection_type) for collection_type in self.collections}
+            self.aliases.load()
+            for collection_type, old_name in previous.items():
+                new_name = self._resolve_collection_name(collection_type)
+                if new_name != old_name and self.stores.get(collection_type) is not None:
+                    logger.info(f"{collection_type} alias 변경 감지: {old_name} → {new_name}")
+                    self.stores[collection_type] = self._open_store(new_name)
+                    self.keyword_indexes[collection_type] = None
+
+    @contextmanager
+    def _reading(self):
+        """검색 구간: alias 변경 확인 후 교체(write)와 겹치지 않도록 read 락 유지"""
+        self._refresh_aliases()
+        with self._swap_lock.read():
+            yield
+
+    def _open_chroma(self, collection_name: str) -> Chroma:
+        return Chroma(
+            collection_name=collection_name,
+            embedding_function=self.embedding,
+            persist_directory=str(self.vector_db),
+        )
+
+    def _open_backend(self, collection_name: str):
+        """VECTOR_BACKEND 설정에 따른 물리 콜렉션 (chroma | numpy)"""
+        if Config.VECTOR_BACKEND == BACKEND_NUMPY:
+            return NumpyCollection(self.vector_db / "numpy" / collection_name, self.embedding, Config.VECTOR_QUANTIZATION)
+        return ChromaCollection(self._open_chroma(collection_name))
+
+    def _open_store(self, collection_name: str) -> PartitionedCollection:
+        """논리 콜렉션을 종별 파티션 콜렉션 묶음으로 연다"""
+        return PartitionedCollection(collection_name, self._open_backend)
+
+    def _reset_store(self, collection_name: str) -> PartitionedCollection:
+        """콜렉션(파티션 도입 전 단일 콜렉션 포함)을 삭제하고 빈 콜렉션으로 다시 연다"""
+        if Config.VECTOR_BACKEND != BACKEND_NUMPY:
+            self._open_chroma(collection_name).delete_collection()
+        self._open_store(collection_name).delete_collection()
+        return self._open_store(collection_name)
+
+    def _delete_chunks(self, store: PartitionedCollection, chunk_ids: List[str], batch_size: int = 500):
+        for i in range(0, len(chunk_ids), batch_size):
+            store.delete(chunk_ids[i:i + batch_size])
+
+    def _manifest(self, collection_name: str) -> IndexManifest:
+        return IndexManifest(self.vector_db / "manifests" / f"{collection_name}.json")
+
+    def _checkpoint(self, collection_name: str) -> BuildCheckpoint:
+        return BuildCheckpoint(self.vector_db / "manifests" / f"{collection_name}.checkpoint")
+
+    def _build_lock(self, collection_name: str) -> BuildLock:
+        return BuildLock(self.vector_db / "manifests" / f"{collection_name}.lock")
+
+    @staticmethod
+    def _store_matches_manifest(count: int, manifest: IndexManifest, checkpoint: BuildCheckpoint) -> bool:
+        """
+        저장소 문서 수가 매니페스트(+ 중단된 빌드의 체크포인트)와 일치하는지
+        중단된 빌드는 마지막 체크포인트 이후 저장된 청크가 더 있을 수 있음 (동기화 후 정리)
+        """
+        if manifest.exists and not manifest.is_current:
+            return False
+        if not manifest.exists and not checkpoint.chunks:
+            return False
+        expected = len(set(manifest.all_chunk_ids()) | set(checkpoint.chunks))
+        return count >= expected if checkpoint.chunks else count == expected
+
+    def _delete_stray_chunks(self, store: PartitionedCollection, expected_ids: set):
+        """매니페스트에 없는 청크 삭제 (중단된 빌드가 체크포인트 기록 전에 저장한 청크)"""
+        if store.count() == len(expected_ids):
+            return
+        stray = [chunk_id for ids, _ in store.iter_documents() for chunk_id in ids if chunk_id not in expected_ids]
+        if stray:
+            logger.info(f"중단된 빌드에서 남은 청크 {len(stray)}개 삭제")
+            self._delete_chunks(store, stray)
+
+    def _relative_path(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.documents_path).as_posix()
+        except ValueError:
+            return path.as_posix()
 
-        return store
+    def _list_source_files(self, collection_type: str) -> List[Path]:
+        return sorted(self.documents_path.glob(self.SOURCE_PATTERNS[collection_type]))
+
+    def _iter_parsed_files(
+        self, collection_type: str, files: Dict[str, Tuple[Path, str, os.stat_result]],
+        pool: Optional[ProcessPoolExecutor] = None, lookahead: int = 0,
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        파일 순서대로 (rel_path, 청크 목록) 반환 (파일 해시 기준 캐시)
+        - pool이 있으면 캐시에 없는 파일을 최대 lookahead개 앞서 작업자에 제출 (결과 순서는 입력 순서 유지)
+        """
+        def resolve(rel_path: str, path: Path, cache_key: str, pending):
+            if isinstance(pending, list):
+                return rel_path, pending
+            chunks = pending.result() if pending is not None else self.parse_file(collection_type, path, rel_path)
+            self.parsed_cache.put(cache_key, chunks)
+            return rel_path, chunks
+
+        window = deque()
+        for rel_path, (path, sha256, _) in files.items():
+            cache_key = hashlib.md5(
+                f"{rel_path}|{sha256}|{self.chunk_max_tokens}|{self.chunk_overlap_tokens}".encode("utf-8")
+            ).hexdigest()
+            pending = self.parsed_cache.get(cache_key)
+            if pending is None and pool is not None:
+                pending = pool.submit(
+                    parse_file_task, collection_type, path, rel_path, self.chunk_max_tokens, self.chunk_overlap_tokens,
+                )
+            window.append((rel_path, path, cache_key, pending))
+            if len(window) > lookahead:
+                yield resolve(*window.popleft())
+        while window:
+            yield resolve(*window.popleft())
+
+    def _parse_workers(self, file_count: int) -> int:
+        if not self.parallel_parse:
+            return 1
+        return max(1, min(Config.PARSE_WORKERS or os.cpu_count() or 1, file_count))
+
+    @contextmanager
+    def _parse_pool(self, workers: int):
+        """파일 파싱용 프로세스 풀 (작업자 1개면 현재 프로세스에서 파싱)"""
+        if workers <= 1:
+            yield None
+            return
+        # fork: 작업자가 app 패키지를 다시 import하지 않음 (spawn은 작업자당 수 초 소요)
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            # fork 풀은 첫 작업 제출 시 작업자를 모두 띄움 → 임베딩 스레드가 시작되기 전에 미리 fork
+            pool.submit(int).result()
+            yield pool
+
+    def load_general_guide_documents(self) -> Iterator[Document]:
+        """일반 가이드 문서 청크 스트림 (.md 파일)"""
+        yield from self._iter_collection_documents('general_guides', "일반 가이드")
+
+    def load_medication_documents(self) -> Iterator[Document]:
+        """의약품 문서 청크 스트림 (.json 파일, 항목 단위 파싱)"""
+        yield from self._iter_collection_documents('medications', "의약품")
+
+    def _iter_collection_documents(self, collection_type: str, label: str) -> Iterator[Document]:
+        files = self._list_source_files(collection_type)
+        logger.info(f"{label} 파일 수: {len(files)}")
+
+        total = 0
+        for path in files:
+            try:
+                for doc in self._load_source_file(collection_type, path):
+                    total += 1
+                    yield doc
+            except Exception as e:
+                logger.warning(f"{label} 파일 처리 실패 ({path}): {e}")
+
+        logger.info(f"{label} 총 {total}개 문서 청크 로딩 완료")
+
+    def _ingest_chunks(
+        self, store: PartitionedCollection, chunks, collection_name: str,
+        checkpoint: Optional[BuildCheckpoint] = None, on_progress: Optional[Callable[[IngestionResult], None]] = None,
+    ) -> IngestionResult:
+        """
+        청크 (id, text, metadata) 스트림을 임베딩해 종별 파티션에 upsert
+        checkpoint: CHECKPOINT_EVERY개 청크마다 저장소를 flush하고 저장 완료 ID를 기록
+        """
+        unflushed: List[str] = []
+
+        def commit_checkpoint():
+            if checkpoint is not None and unflushed:
+                store.flush()
+                checkpoint.commit(unflushed)
+                unflushed.clear()
+
+        def write(ids, texts, metadatas, embeddings):
+            store.upsert(ids, texts, metadatas, embeddings)
+            unflushed.extend(ids)
+            if len(unflushed) >= self.CHECKPOINT_EVERY:
+                commit_checkpoint()
+
+        def progress(result: IngestionResult):
+            logger.info(f"{collection_name} 저장 진행: {result.written_chunks}/{result.total_chunks}개 청크")
+            if on_progress:
+                on_progress(result)
+
+        pipeline = EmbeddingIngestionPipeline(
+            self.embedding,
+            write,
+            max_workers=Config.EMBEDDING_WORKERS,
+            requests_per_minute=Config.EMBEDDING_RPM,
+            tokens_per_minute=Config.EMBEDDING_TPM,
+        )
+        result = pipeline.run(chunks, progress=progress)
+        commit_checkpoint()
+
+        logger.info(
+            f"{collection_name} 임베딩 완료: {result.written_chunks}/{result.total_chunks}개 청크, "
+            f"{result.total_tokens}토큰, {result.elapsed:.1f}초 (첫 배치 {result.first_batch_seconds or 0:.2f}초)"
+        )
+        if result.failed_ids:
+            logger.error(f"{collection_name} 저장 실패 청크 {len(result.failed_ids)}개 (재시도 초과)")
+        return result
 
     def create_vector_db(self):
         all_documents = self.load_documents()
@@ -405,72 +932,93 @@ class VectorStoreService:
     # -------------------------
     # Multi-Collection Search Methods
     # -------------------------
-    def search_multi_collections(self, query: str, collection_types: List[str], k: int = 5) -> List[Document]:
+    def search_multi_collections(
+        self, query: str, collection_types: List[str], k: int = 5, where: Optional[Dict[str, Any]] = None,
+        partitions: Optional[List[str]] = None, query_embedding: Optional[List[float]] = None,
+    ) -> List[Document]:
         """
         여러 콜렉션에서 검색하여 결과 통합
+        where: 태그 메타데이터 필터, partitions: 조회할 종별 파티션 (없으면 전체)
+        query_embedding: 미리 만든 검색 벡터 (없으면 질문 벡터 캐시 사용)
         """
+        with self._reading():
+            return self._search_multi_collections(query, collection_types, k, where, partitions, query_embedding)
+
+    def _search_multi_collections(
+        self, query: str, collection_types: List[str], k: int, where: Optional[Dict[str, Any]] = None,
+        partitions: Optional[List[str]] = None, query_embedding: Optional[List[float]] = None,
+    ) -> List[Document]:
+        targets = self._search_targets(collection_types, partitions)
+        if not targets:
+            return []
+
+        # 쿼리 임베딩은 한 번만 계산해 모든 콜렉션에 전달
+        try:
+            if query_embedding is None:
+                query_embedding = self.query_vectors.question_vector(query).tolist()
+        except Exception as e:
+            logger.error(f"쿼리 임베딩 실패: {e}")
+            return []
+
         all_results = []
-        
-        for collection_type in collection_types:
-            if collection_type not in self.stores or not self.stores[collection_type]:
-                logger.warning(f"{collection_type} 콜렉션이 초기화되지 않았습니다.")
-                continue
-                
+        futures = {
+            self._search_executor.submit(store.similarity_search_by_vector_with_relevance_scores, query_embedding, k, where or None): collection_type
+            for collection_type, store in targets
+        }
+        for future in as_completed(futures):
+            collection_type = futures[future]
             try:
-                # 각 콜렉션에서 검색
-                results = self.stores[collection_type].similarity_search_with_score(query, k=k)
-                
-                # 점수와 함께 결과 저장 (콜렉션 정보 포함)
-                for doc, score in results:
-                    doc.metadata['search_score'] = score
-                    doc.metadata['source_collection'] = collection_type
-                    all_results.append((doc, score))
-                    
-                logger.info(f"{collection_type} 콜렉션에서 {len(results)}개 결과 검색")
-                
+                results = future.result()
             except Exception as e:
                 logger.error(f"{collection_type} 콜렉션 검색 실패: {e}")
+                continue
+
+            # 점수와 함께 결과 저장 (콜렉션 정보 포함) - 백엔드가 공유 객체를 돌려줄 수 있으므로 복사해서 기록
+            for doc, score in results:
+                metadata = {**doc.metadata, 'search_score': score, 'source_collection': collection_type}
+                all_results.append((Document(id=doc.id, page_content=doc.page_content, metadata=metadata), score))
+            logger.info(f"{collection_type} 콜렉션에서 {len(results)}개 결과 검색")
         
         # 점수순 정렬 후 상위 k개 반환
         all_results.sort(key=lambda x: x[1])  # 거리가 작을수록 유사도 높음
         return [doc for doc, _ in all_results[:k]]
 
+    def _search_targets(self, collection_types: List[str], partitions: Optional[List[str]] = None) -> List[Tuple[str, Any]]:
+        """검색할 (콜렉션 타입, 파티션 콜렉션) 목록 - 비어 있는 파티션은 제외"""
+        targets = []
+        for collection_type in collection_types:
+            if collection_type not in self.stores or not self.stores[collection_type]:
+                logger.warning(f"{collection_type} 콜렉션이 초기화되지 않았습니다.")
+                continue
+            for _, store in self.stores[collection_type].stores(partitions):
+                if store.count():
+                    targets.append((collection_type, store))
+        return targets
+
+    @staticmethod
+    def _partition_where(where: Optional[Dict[str, Any]], partitions: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        """키워드 색인은 파티션이 없으므로 species 조건으로 대신 제한"""
+        if not partitions:
+            return where
+        species_clause = {"species": {"$in": list(partitions)}}
+        return {"$and": [where, species_clause]} if where else species_clause
+
+    def analyze_query(self, query: str, pet_records: dict = None) -> QueryAnalysis:
+        """질문 분석 (의도/콜렉션 라우팅/필터/언급된 제품명) - 요청당 한 번 만들어 검색 단계에 전달"""
+        with self._reading():
+            product_index = self._get_product_index()
+        analysis = analyze_query(query, pet_records, product_index)
+        logger.info(
+            f"질문 분석: 의도={sorted(analysis.intents)} 콜렉션={analysis.collections} "
+            f"제품={analysis.product_names}"
+        )
+        return analysis
+
     def get_collection_by_query_type(self, query: str, pet_records: dict = None) -> List[str]:
         """
-        질문 유형에 따라 검색할 콜렉션 결정
+        질문 유형에 따라 검색할 콜렉션 결정 (QueryAnalyzer 라우팅 규칙)
         """
-        query_lower = query.lower()
-        collections_to_search = []
-        
-        # 의약품 관련 키워드
-        medication_keywords = ['약', '치료', '병', '질병', '아파', '증상', '부작용', 'medication', 'treatment', '처방']
-        
-        # 일반 관리 관련 키워드  
-        general_keywords = ['건강관리', '사료', '운동', '산책', '관리', '키우기', '예방접종', '백신', '목욕', '훈련']
-        
-        # 질문 내용 분석
-        has_medication_intent = any(keyword in query_lower for keyword in medication_keywords)
-        has_general_intent = any(keyword in query_lower for keyword in general_keywords)
-        
-        # 반려동물의 질병/알러지 정보 확인
-        has_medical_history = False
-        if pet_records:
-            diseases = pet_records.get("disease", [])
-            medications = pet_records.get("medication", [])
-            if diseases or medications:
-                has_medical_history = True
-        
-        # 콜렉션 선택 로직
-        if has_medication_intent or (has_medical_history and not has_general_intent):
-            # 의약품 관련 질문이면 의약품 우선, 일반 가이드 보조
-            collections_to_search = ['medications', 'general_guides']
-            logger.info("의약품 관련 질문으로 판단 - 의약품 콜렉션 우선 검색")
-        else:
-            # 일반 관리 질문이면 일반 가이드 우선
-            collections_to_search = ['general_guides']
-            logger.info("일반 관리 질문으로 판단 - 일반 가이드 콜렉션만 검색")
-            
-        return collections_to_search
+        return analyze_query(query, pet_records).collections
 
     # -------------------------
     # Load documents (md + json)
@@ -505,233 +1053,114 @@ class VectorStoreService:
         return all_documents
 
     # -------------------------
-    # Markdown loader
+    # Keyword Search Methods
     # -------------------------
-    def load_markdown(self, file_path: Path) -> List[Document]:
-        try:
-            text = file_path.read_text(encoding="utf-8")
-        except Exception as e:
-            logger.warning(f"Markdown 파일 읽기 실패 ({file_path}): {e}")
-            return []
-
-        meta = self.extract_document_metadata(text)
-        splitter = MarkdownHeaderTextSplitter([("#", "title"), ("##", "subtitle")])
-
-        try:
-            sections = splitter.split_text(text)
-        except Exception as e:
-            logger.warning(f"Markdown 분할 실패({file_path}), 전체를 하나로 처리: {e}")
-            sections = [text]
-
-        docs: List[Document] = []
-        for i, sec in enumerate(sections):
-            if isinstance(sec, Document):
-                content = sec.page_content
-                sec_meta = sec.metadata or {}
-            else:
-                content = str(sec)
-                sec_meta = {}
-
-            clean = self.remove_metadata_blocks(content)
-            if not clean.strip():
-                continue
-
-            metadata = {**meta, **sec_meta, "source_file": file_path.name, "file_path": str(file_path), "section_index": i}
-            metadata = self._sanitize_metadata(metadata)
-            docs.append(Document(page_content=clean, metadata=metadata))
+    def keyword_search(self, query: str, k: int = 5, collection_type: str = 'general_guides', where: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """키워드 기반 검색 (BM25 역색인)"""
+        with self._reading():
+            return self._keyword_search(query, k, collection_type, where)
 
-        return docs
-
-    # -------------------------
-    # JSON loader (robust)
-    # -------------------------
-    def load_json(self, file_path: Path) -> List[Document]:
+    def _keyword_search(self, query: str, k: int, collection_type: str, where: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        if collection_type not in self.stores or not self.stores[collection_type]:
+            logger.warning(f"{collection_type} 콜렉션이 초기화되지 않았습니다.")
+            return []
+        
         try:
-            data = json.loads(file_path.read_text(encoding="utf-8"))
+            index = self._get_keyword_index(collection_type)
+            if index is None:
+                return []
+            
+            return [(doc, score) for _, doc, score in index.search(query, k=k, where=where)]
+            
         except Exception as e:
-            logger.warning(f"JSON 파일 읽기 실패 ({file_path}): {e}")
+            logger.error(f"키워드 검색 중 오류 발생: {e}")
             return []
 
-        docs: List[Document] = []
-
-        # If data is a list of items (common in your medication files)
-        if isinstance(data, list):
-            for idx, item in enumerate(data):
-                try:
-                    if isinstance(item, dict):
-                        # prefer 'text' if present and non-empty
-                        content = item.get("text") if isinstance(item.get("text"), str) and item.get("text").strip() else None
-                        if content is None:
-                            # fallback: serialize entire item
-                            content = json.dumps(item, ensure_ascii=False, indent=2)
-                        metadata = {
-                            "file_path": str(file_path),
-                            "data_type": "medication",
-                            "item_index": idx,
-                        }
-                        # merge item metadata if present
-                        if "metadata" in item and isinstance(item["metadata"], dict):
-                            metadata.update(item["metadata"])
-                        if "id" in item:
-                            metadata["document_id"] = item["id"]
-
-                    else:
-                        # non-dict item -> stringify
-                        content = json.dumps(item, ensure_ascii=False)
-                        metadata = {"file_path": str(file_path), "data_type": "medication", "item_index": idx}
-
-                    # safe chunking (avoids RecursiveJsonSplitter crashes)
-                    chunks = self._safe_chunk_text(content, max_chunk_size=1000)
-                    for c_i, chunk in enumerate(chunks):
-                        meta_copy = dict(metadata)
-                        meta_copy.update({"chunk_index": c_i, "total_chunks": len(chunks)})
-                        docs.append(Document(page_content=chunk, metadata=self._sanitize_metadata(meta_copy)))
-
-                except Exception as item_e:
-                    logger.warning(f"JSON item 처리 실패 ({file_path}, index={idx}): {item_e}")
-                    continue
+    def _get_keyword_index(self, collection_type: str) -> Optional[BM25Index]:
+        """키워드 색인 조회 (없으면 최초 1회만 생성)"""
+        index = self.keyword_indexes.get(collection_type)
+        if index is None:
+            with self._keyword_index_lock:
+                index = self.keyword_indexes.get(collection_type) or self.build_keyword_index(collection_type)
+        return index
+
+    def build_keyword_index(self, collection_type: str) -> Optional[BM25Index]:
+        """콜렉션 전체를 한 번 읽어 BM25 색인 생성 (콜렉션 로드/재생성 시 호출)"""
+        store = self.stores.get(collection_type)
+        if not store:
+            self.keyword_indexes[collection_type] = None
+            return None
 
-        elif isinstance(data, dict):
-            # single JSON object: serialize and chunk
-            content = json.dumps(data, ensure_ascii=False, indent=2)
-            chunks = self._safe_chunk_text(content, max_chunk_size=1000)
-            for c_i, chunk in enumerate(chunks):
-                meta = {"file_path": str(file_path), "data_type": "medication", "chunk_index": c_i, "total_chunks": len(chunks)}
-                docs.append(Document(page_content=chunk, metadata=self._sanitize_metadata(meta)))
-        else:
-            # fallback: stringify whole file
-            content = str(data)
-            chunks = self._safe_chunk_text(content, max_chunk_size=1000)
-            for c_i, chunk in enumerate(chunks):
-                meta = {"file_path": str(file_path), "data_type": "medication", "chunk_index": c_i, "total_chunks": len(chunks)}
-                docs.append(Document(page_content=chunk, metadata=self._sanitize_metadata(meta)))
+        with self._keyword_index_lock:
+            start = time.time()
+            index = BM25Index()
+            for ids, docs in store.iter_documents():
+                index.add_documents(ids, docs)
 
-        return docs
+            self.keyword_indexes[collection_type] = index
+            logger.info(f"{collection_type} 키워드 색인 생성 완료 (문서 수: {len(index)}, {time.time() - start:.2f}초)")
+            return index
 
     # -------------------------
-    # Utilities
+    # Product name lookup (medications)
     # -------------------------
-    def _safe_chunk_text(self, text: str, max_chunk_size: int = 1000) -> List[str]:
-        """
-        Split text into chunks of <= max_chunk_size by sentence boundaries (best-effort).
-        """
-        if not text:
-            return []
-
-        text = text.strip()
-        if len(text) <= max_chunk_size:
-            return [text]
-
-        # Split into sentences (preserve punctuation)
-        sentences = re.split(r'(?<=[\.\?\!\n])\s+', text)
-        chunks = []
-        current = ""
-        for sent in sentences:
-            if not sent:
-                continue
-            if len(current) + len(sent) + 1 <= max_chunk_size:
-                current += (sent if current == "" else " " + sent)
-            else:
-                if current:
-                    chunks.append(current.strip())
-                # if single sentence itself too long, break by characters
-                if len(sent) > max_chunk_size:
-                    for i in range(0, len(sent), max_chunk_size):
-                        part = sent[i:i + max_chunk_size].strip()
-                        if part:
-                            chunks.append(part)
-                    current = ""
-                else:
-                    current = sent
-        if current:
-            chunks.append(current.strip())
-        return chunks
-
-    def extract_document_metadata(self, content: str) -> Dict[str, Any]:
-        metadata: Dict[str, Any] = {}
-        yaml_pattern = r"^---\s*\nmetadata:\s*\n(.*?)\n---"
-        match = re.search(yaml_pattern, content, flags=re.MULTILINE | re.DOTALL)
-        if not match:
-            return metadata
-
-        yaml_content = match.group(1)
-        for line in yaml_content.splitlines():
-            line = line.strip()
-            if ":" in line and not line.startswith("-"):
-                key, val = line.split(":", 1)
-                key = key.strip()
-                value = val.strip().strip('"\'')
-                if key == "categories":
-                    metadata[key] = self.parse_yaml_list(value)
-                else:
-                    metadata[key] = value
-        return metadata
-
-    def parse_yaml_list(self, value: Any) -> List[str]:
-        if isinstance(value, list):
-            return [str(v).strip().strip('"\'') for v in value]
-        if isinstance(value, str) and value.startswith("[") and value.endswith("]"):
-            items = value[1:-1].split(",")
-            return [item.strip().strip('"\'') for item in items]
-        return [str(value).strip().strip('"\'')]
-
-    def remove_metadata_blocks(self, content: str) -> str:
-        yaml_pattern = r"^---\s*\nmetadata:\s*\n.*?\n---\s*\n"
-        cleaned = re.sub(yaml_pattern, "", content, flags=re.MULTILINE | re.DOTALL)
-        cleaned = re.sub(r"\n\s*\n\s*\n", "\n\n", cleaned)
-        return cleaned.strip()
-
-    def _sanitize_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    def find_product_documents(
+        self, query: str, k: int = 5, where: Optional[Dict[str, Any]] = None, partitions: Optional[List[str]] = None,
+        matches: Optional[List[ProductMatch]] = None,
+    ) -> List[Document]:
         """
-        Convert metadata values to primitives (str/int/float/bool). Lists/dicts -> JSON string.
+        질문에 언급된 의약품 제품명을 찾아 해당 제품 청크를 ID로 바로 조회 (임베딩/벡터 검색 없음)
+        - 언급 순, 제품 내 chunk_index 순으로 최대 k개
+        - where/partitions는 검색과 같은 조건으로 적용
+        - matches: QueryAnalysis에서 이미 찾은 제품명 (없으면 query에서 찾음)
         """
-        safe: Dict[str, Any] = {}
-        for k, v in (metadata or {}).items():
-            if isinstance(v, (str, int, float, bool)) or v is None:
-                safe[k] = v
-            else:
-                try:
-                    safe[k] = json.dumps(v, ensure_ascii=False) if not isinstance(v, (str, int, float, bool)) else v
-                except Exception:
-                    safe[k] = str(v)
-        return safe
-
-    # -------------------------
-    # Keyword Search Methods
-    # -------------------------
-    def keyword_search(self, query: str, k: int = 5, collection_type: str = 'general_guides') -> List[Tuple[Document, float]]:
-        """키워드 기반 검색 (TF-IDF 스코어링)"""
-        if collection_type not in self.stores or not self.stores[collection_type]:
-            logger.warning(f"{collection_type} 콜렉션이 초기화되지 않았습니다.")
-            return []
-        
-        store = self.stores[collection_type]
-        
-        try:
-            # 해당 콜렉션의 모든 문서 가져오기
-            all_docs = self._get_all_documents_from_store(store)
-            if not all_docs:
+        with self._reading():
+            product_index = self._get_product_index()
+            if product_index is None:
                 return []
-            
-            # 키워드 전처리
-            query_keywords = self._preprocess_keywords(query)
-            if not query_keywords:
+            if matches is None:
+                matches = product_index.match(query)
+            if not matches:
                 return []
-            
-            # TF-IDF 계산
-            scored_docs = []
-            for doc in all_docs:
-                score = self._calculate_keyword_score(doc.page_content, query_keywords)
-                if score > 0:
-                    scored_docs.append((doc, score))
-            
-            # 점수순 정렬 후 상위 k개 반환
-            scored_docs.sort(key=lambda x: x[1], reverse=True)
-            return scored_docs[:k]
-            
-        except Exception as e:
-            logger.error(f"키워드 검색 중 오류 발생: {e}")
-            return []
+
+            keyword_index = self._product_index[0]
+            doc_where = self._partition_where(where, partitions)
+            results = []
+            for match in matches:
+                for chunk_id in match.chunk_ids:
+                    doc = keyword_index.get(chunk_id)
+                    if doc is None or not matches_where(doc.metadata, doc_where):
+                        continue
+                    metadata = dict(doc.metadata)
+                    metadata['source_collection'] = 'medications'
+                    metadata['matched_product'] = match.mention
+                    results.append(Document(id=chunk_id, page_content=doc.page_content, metadata=metadata))
+                    if len(results) >= k:
+                        break
+                if len(results) >= k:
+                    break
+
+        logger.info(f"제품명 직접 조회: {[match.mention for match in matches]} → {len(results)}개 청크")
+        return results
+
+    def _get_product_index(self) -> Optional[ProductNameIndex]:
+        """의약품 키워드 색인의 문서로 제품명 색인 생성 (키워드 색인이 교체되면 다시 생성)"""
+        keyword_index = self._get_keyword_index('medications') if self.stores.get('medications') else None
+        if keyword_index is None:
+            return None
+        cached = self._product_index
+        if cached is None or cached[0] is not keyword_index:
+            with self._keyword_index_lock:
+                cached = self._product_index
+                if cached is None or cached[0] is not keyword_index:
+                    start = time.time()
+                    product_index = ProductNameIndex()
+                    items = keyword_index.items()
+                    product_index.add_documents([doc_id for doc_id, _ in items], [doc for _, doc in items])
+                    product_index.build()
+                    cached = self._product_index = (keyword_index, product_index)
+                    logger.info(f"제품명 색인 생성 완료 (청크 수: {len(product_index)}, {time.time() - start:.2f}초)")
+        return cached[1]
 
     def _get_all_documents(self) -> List[Document]:
         """벡터 스토어에서 모든 문서 가져오기 (하위 호환성)"""
@@ -744,134 +1173,140 @@ class VectorStoreService:
     def _get_all_documents_from_store(self, store) -> List[Document]:
         """특정 스토어에서 모든 문서 가져오기"""
         try:
-            # Chroma에서 모든 문서 ID 가져오기
-            collection = store._collection
-            all_data = collection.get()
-            
             documents = []
-            if all_data and 'documents' in all_data and 'metadatas' in all_data:
-                for i, (content, metadata) in enumerate(zip(all_data['documents'], all_data['metadatas'])):
-                    doc = Document(page_content=content, metadata=metadata or {})
-                    documents.append(doc)
-            
+            for _, docs in store.iter_documents():
+                documents.extend(docs)
             return documents
             
         except Exception as e:
             logger.error(f"모든 문서 가져오기 실패: {e}")
             return []
 
-    def _preprocess_keywords(self, query: str) -> List[str]:
-        """키워드 전처리 (한국어/영어 지원)"""
-        # 소문자 변환 및 특수문자 제거
-        query = re.sub(r'[^\w\s가-힣]', ' ', query.lower())
-        
-        # 단어 분리 및 불용어 제거
-        stop_words = {'은', '는', '이', '가', '을', '를', '에', '의', '와', '과', '도', '로', '으로', 
-                     'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with'}
-        
-        keywords = [word.strip() for word in query.split() if len(word.strip()) > 1 and word.strip() not in stop_words]
-        return keywords
-
-    def _calculate_keyword_score(self, content: str, keywords: List[str]) -> float:
-        """TF-IDF 기반 키워드 스코어 계산"""
-        if not content or not keywords:
-            return 0.0
-        
-        content_lower = content.lower()
-        score = 0.0
-        
-        for keyword in keywords:
-            # 단순 TF 계산 (빈도)
-            tf = content_lower.count(keyword.lower())
-            if tf > 0:
-                # 키워드 길이에 따른 가중치 (긴 키워드에 더 높은 점수)
-                weight = len(keyword) / 10.0 + 1.0
-                score += tf * weight
-        
-        return score
-
     # -------------------------
     # Hybrid Search Methods
     # -------------------------
     def hybrid_search(self, query: str, k: int = 5, vector_weight: float = 0.5, keyword_weight: float = 0.5, collection_type: str = 'general_guides') -> List[Document]:
         """하이브리드 검색 (벡터 + 키워드) - 단일 콜렉션"""
-        if collection_type not in self.stores or not self.stores[collection_type]:
-            logger.warning(f"{collection_type} 콜렉션이 초기화되지 않았습니다.")
+        return self.hybrid_search_multi_collections(
+            query, [collection_type], k=k, vector_weight=vector_weight, keyword_weight=keyword_weight
+        )
+
+    def hybrid_search_multi_collections(
+        self,
+        query: str,
+        collection_types: List[str],
+        k: int = 5,
+        vector_weight: float = 0.5,
+        keyword_weight: float = 0.5,
+        budget_seconds: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        partitions: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Document]:
+        """
+        멀티 콜렉션 하이브리드 검색
+        - 콜렉션별 벡터/키워드 검색을 동시에 실행
+        - 청크 ID 기준 Reciprocal Rank Fusion으로 통합
+        - budget_seconds 안에 끝난 결과만 사용 (벡터 검색은 쿼리 벡터 준비 후부터 계산)
+        - where: 태그 메타데이터 필터 (벡터/키워드 검색 모두 적용)
+        - partitions: 조회할 종별 파티션 (없으면 전체)
+        - query_embedding: 미리 만든 검색 벡터 (없으면 질문 벡터 캐시 사용, 키워드 검색은 항상 query)
+        """
+        with self._reading():
+            return self._hybrid_search_multi_collections(
+                query, collection_types, k, vector_weight, keyword_weight,
+                Config.HYBRID_SEARCH_BUDGET_SECONDS if budget_seconds is None else budget_seconds,
+                where, partitions, query_embedding,
+            )
+
+    def _hybrid_search_multi_collections(
+        self, query: str, collection_types: List[str], k: int, vector_weight: float, keyword_weight: float, budget_seconds: float,
+        where: Optional[Dict[str, Any]] = None, partitions: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Document]:
+        targets = self._search_targets(collection_types, partitions)
+        if not targets:
             return []
-            
-        store = self.stores[collection_type]
-        
+
+        start = time.time()
+        candidates = k * 2
+        futures = {}
+        # 검색 종류별 마감 시각 - 벡터 검색 예산은 쿼리 벡터가 준비된 뒤부터 계산
+        deadlines = {"keyword": start + budget_seconds}
+
+        # 키워드 검색은 임베딩을 기다리지 않고 먼저 시작
+        keyword_where = self._partition_where(where, partitions)
+        for collection_type in dict.fromkeys(collection_type for collection_type, _ in targets):
+            future = self._search_executor.submit(self._keyword_search, query, candidates, collection_type, keyword_where)
+            futures[future] = (collection_type, "keyword", keyword_weight)
+
         try:
-            # 벡터 검색 결과
-            vector_results = []
-            try:
-                vector_docs = store.similarity_search_with_score(query, k=k*2)
-                # 점수 정규화 (유사도를 0-1 범위로)
-                if vector_docs:
-                    max_score = max(score for _, score in vector_docs)
-                    min_score = min(score for _, score in vector_docs)
-                    score_range = max_score - min_score if max_score > min_score else 1
-                    
-                    for doc, score in vector_docs:
-                        # 거리를 유사도로 변환 (거리가 작을수록 유사도가 높음)
-                        normalized_score = 1 - ((score - min_score) / score_range)
-                        vector_results.append((doc, normalized_score))
-            except Exception as e:
-                logger.warning(f"벡터 검색 실패: {e}")
-            
-            # 키워드 검색 결과
-            keyword_results = self.keyword_search(query, k=k*2, collection_type=collection_type)
-            
-            # 키워드 검색 점수 정규화
-            if keyword_results:
-                max_kw_score = max(score for _, score in keyword_results)
-                min_kw_score = min(score for _, score in keyword_results)
-                kw_score_range = max_kw_score - min_kw_score if max_kw_score > min_kw_score else 1
-                
-                normalized_kw_results = []
-                for doc, score in keyword_results:
-                    normalized_score = (score - min_kw_score) / kw_score_range if kw_score_range > 0 else 0
-                    normalized_kw_results.append((doc, normalized_score))
-                keyword_results = normalized_kw_results
-            
-            # 문서별 점수 통합
-            doc_scores = {}
-            
-            # 벡터 검색 점수 추가
-            for doc, score in vector_results:
-                doc_key = self._get_doc_key(doc)
-                doc_scores[doc_key] = doc_scores.get(doc_key, {'doc': doc, 'vector_score': 0, 'keyword_score': 0})
-                doc_scores[doc_key]['vector_score'] = score
-            
-            # 키워드 검색 점수 추가
-            for doc, score in keyword_results:
-                doc_key = self._get_doc_key(doc)
-                if doc_key not in doc_scores:
-                    doc_scores[doc_key] = {'doc': doc, 'vector_score': 0, 'keyword_score': 0}
-                doc_scores[doc_key]['keyword_score'] = score
-            
-            # 최종 점수 계산 및 정렬
-            final_results = []
-            for doc_key, data in doc_scores.items():
-                final_score = (data['vector_score'] * vector_weight + 
-                             data['keyword_score'] * keyword_weight)
-                final_results.append((data['doc'], final_score))
-            
-            # 점수순 정렬
-            final_results.sort(key=lambda x: x[1], reverse=True)
-            
-            # 상위 k개 문서만 반환
-            return [doc for doc, _ in final_results[:k]]
-            
+            if query_embedding is None:
+                query_embedding = self.query_vectors.question_vector(query).tolist()
+            embedded = time.time()
+            deadlines["vector"] = embedded + budget_seconds
+            if embedded - start > budget_seconds:
+                logger.warning(f"쿼리 임베딩이 시간 예산({budget_seconds}초)보다 오래 걸림: {(embedded - start) * 1000:.0f}ms")
+            for collection_type, store in targets:
+                future = self._search_executor.submit(
+                    store.similarity_search_by_vector_with_relevance_scores, query_embedding, candidates, where or None
+                )
+                futures[future] = (collection_type, "vector", vector_weight)
         except Exception as e:
-            logger.error(f"하이브리드 검색 중 오류 발생: {e}")
-            # 실패 시 벡터 검색만 사용
+            logger.warning(f"쿼리 임베딩 실패 - 키워드 결과만 사용합니다: {e}")
+
+        done, not_done = set(), set()
+        for source, deadline in sorted(deadlines.items(), key=lambda item: item[1]):
+            group = [future for future, (_, kind, _) in futures.items() if kind == source]
+            finished, pending = wait(group, timeout=max(0.0, deadline - time.time()))
+            done |= finished
+            not_done |= pending
+        if not_done:
+            labels = [f"{futures[f][0]}/{futures[f][1]}" for f in not_done]
+            logger.warning(
+                f"하이브리드 검색 시간 예산({budget_seconds}초) 초과 - 제외된 검색: {labels} "
+                f"(경과 {(time.time() - start) * 1000:.0f}ms)"
+            )
+
+        # 같은 콜렉션의 파티션별 벡터 결과는 거리순으로 합쳐 하나의 순위 목록으로
+        ranked_lists: Dict[Tuple[str, str], List[Tuple[Document, float]]] = {}
+        for future in done:
+            collection_type, source, _ = futures[future]
             try:
-                if store:
-                    return store.similarity_search(query, k=k)
-            except:
-                pass
-            return []
+                ranked_lists.setdefault((collection_type, source), []).extend(future.result())
+            except Exception as e:
+                logger.error(f"{collection_type} {source} 검색 실패: {e}")
+
+        fused: Dict[str, Dict[str, Any]] = {}
+        for (collection_type, source), ranked in ranked_lists.items():
+            weight = vector_weight if source == "vector" else keyword_weight
+            if source == "vector":
+                ranked = sorted(ranked, key=lambda x: x[1])[:candidates]
+
+            for rank, (doc, score) in enumerate(ranked, start=1):
+                doc_key = doc.id or self._get_doc_key(doc)
+                entry = fused.setdefault(doc_key, {'doc': doc, 'collection': collection_type, 'score': 0.0})
+                entry['score'] += weight / (self.RRF_K + rank)
+                entry[f'{source}_score'] = score
+
+        ranked_docs = sorted(fused.values(), key=lambda entry: entry['score'], reverse=True)[:k]
+
+        results = []
+        for entry in ranked_docs:
+            # 키워드 색인의 Document는 공유 객체이므로 복사해서 점수 기록
+            doc = entry['doc']
+            metadata = dict(doc.metadata)
+            metadata['source_collection'] = entry['collection']
+            metadata['rrf_score'] = entry['score']
+            for source in ("vector", "keyword"):
+                if f'{source}_score' in entry:
+                    metadata[f'{source}_score'] = entry[f'{source}_score']
+            results.append(Document(id=doc.id, page_content=doc.page_content, metadata=metadata))
+
+        logger.info(
+            f"하이브리드 검색 완료: 후보 {len(fused)}개 → {len(results)}개 ({(time.time() - start) * 1000:.0f}ms)"
+        )
+        return results
 
     def _get_doc_key(self, doc: Document) -> str:
         """문서의 고유 키 생성"""
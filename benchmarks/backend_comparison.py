@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+벡터 백엔드 비교 (chroma vs numpy)
+- 같은 문서/임베딩 캐시로 백엔드별 벡터 DB를 만들고
+- 기동 시간(서비스 생성 + 변경 없는 동기화 + 첫 검색)과 질문별 벡터 검색 지연시간 p50/p95/p99 측정
+- 두 백엔드의 top-k 결과 일치율(overlap@k)과 recall@k도 함께 출력
+
+사용 예:
+    python benchmarks/backend_comparison.py
+    python benchmarks/backend_comparison.py --embeddings openai --output benchmarks/results/backends.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+# 프로젝트 루트를 Python path에 추가
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.retrieval_benchmark import RetrievalBenchmark, load_golden_set, percentiles, score_query
+
+BACKENDS = ("chroma", "numpy")
+
+
+def open_service(args, backend: str):
+    """백엔드별 벡터 DB 경로로 서비스 생성 (임베딩 캐시는 공유)"""
+    from config import Config
+
+    Config.DOCUMENTS_PATH = str(args.documents)
+    Config.VECTOR_DB = str(args.work_dir / args.embeddings / f"vector_db_{backend}")
+    Config.EMBEDDING_PROVIDER = args.embeddings
+    Config.VECTOR_BACKEND = backend
+
+    from app.services.dailycare.vectorstore_service import VectorStoreService
+
+    service = VectorStoreService()
+    service.initialize_vector_db()
+    return service
+
+
+def measure_backend(args, backend: str, golden_set: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # 1) 최초 구축 (이미 있으면 변경 없는 동기화)
+    start = time.perf_counter()
+    open_service(args, backend)
+    build_seconds = time.perf_counter() - start
+
+    # 2) 기동: 구축된 DB를 새로 열고 첫 검색까지
+    start = time.perf_counter()
+    service = open_service(args, backend)
+    benchmark = RetrievalBenchmark(service, k=args.k)
+    first = golden_set[0]
+    benchmark.search(first["query"], first.get("species", ""), "vector", "routed", "filter_on")
+    startup_seconds = time.perf_counter() - start
+
+    # 3) 질문별 지연시간
+    latencies, recalls, results = [], [], {}
+    for item in golden_set:
+        docs = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            docs = benchmark.search(item["query"], item.get("species", ""), "vector", "routed", "filter_on")
+            latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(score_query(docs, item["expected"], args.k)[0])
+        results[item["query"]] = [doc.id or doc.metadata.get("document_id") for doc in docs]
+
+    summary = {
+        "build_seconds": round(build_seconds, 2),
+        "startup_seconds": round(startup_seconds, 3),
+        "latency_ms": percentiles(latencies),
+        f"recall_at_{args.k}": round(float(np.mean(recalls)), 4),
+        "chunks": {name: store.count() if store else 0 for name, store in service.stores.items()},
+    }
+    print(
+        f"{backend:<8} 구축 {summary['build_seconds']:.1f}초  기동 {summary['startup_seconds']:.2f}초  "
+        f"p50={summary['latency_ms']['p50']:.1f}ms p95={summary['latency_ms']['p95']:.1f}ms  "
+        f"recall@{args.k}={summary[f'recall_at_{args.k}']:.3f}"
+    )
+    return {"summary": summary, "results": results}
+
+
+def overlap(a: Dict[str, List[str]], b: Dict[str, List[str]], k: int) -> float:
+    """질문별 top-k ID 집합 일치율 평균"""
+    scores = [len(set(a[q][:k]) & set(b.get(q, [])[:k])) / max(len(a[q][:k]), 1) for q in a]
+    return round(float(np.mean(scores)), 4) if scores else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 백엔드 비교 (chroma vs numpy)")
+    parser.add_argument("--golden-set", type=Path, default=Path(__file__).parent / "golden_set.json")
+    parser.add_argument("--documents", type=Path, default=project_root / "storage" / "documents")
+    parser.add_argument("--work-dir", type=Path, default=Path(__file__).parent / ".cache", help="벤치마크용 벡터 DB/캐시 경로")
+    parser.add_argument("--embeddings", choices=["local", "openai"], default="local")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5, help="질문별 반복 횟수 (지연시간 표본)")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.embeddings == "local":
+        # 로컬 임베딩은 API를 호출하지 않지만 앱 모듈 import 시 키가 필요
+        os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+    golden_set = load_golden_set(args.golden_set)
+    measured = {backend: measure_backend(args, backend, golden_set) for backend in BACKENDS}
+
+    agreement = overlap(measured["chroma"]["results"], measured["numpy"]["results"], args.k)
+    print(f"\nchroma/numpy top-{args.k} 일치율: {agreement:.3f}")
+
+    if args.output:
+        result = {
+            "backends": {backend: data["summary"] for backend, data in measured.items()},
+            "overlap_at_k": agreement,
+            "meta": {"embeddings": args.embeddings, "k": args.k, "repeat": args.repeat, "queries": len(golden_set)},
+        }
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"결과 저장: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+검색 성능/품질 벤치마크
+- golden_set.json 질문별 기대 출처(가이드 파일명 / 의약품 ID) 기준 recall@k, MRR
+- 검색 모드(vector / keyword / hybrid / product_hybrid: 제품명 직접 조회 후 hybrid로 채움) × 콜렉션(routed / all) × 필터(on / off) 조합별 지연시간 p50/p95/p99
+- 기본은 네트워크 없는 결정적 임베딩(--embeddings local), 실제 임베딩은 --embeddings openai
+- 결과는 JSON으로 저장하고 --baseline 결과와 비교
+
+사용 예:
+    python benchmarks/retrieval_benchmark.py --output benchmarks/results/latest.json
+    python benchmarks/retrieval_benchmark.py --baseline benchmarks/results/main.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# 프로젝트 루트를 Python path에 추가
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+MODES = ("vector", "keyword", "hybrid", "product_hybrid")
+ROUTINGS = ("routed", "all")
+FILTERS = ("filter_on", "filter_off")
+
+
+def load_golden_set(path: Path) -> List[Dict[str, Any]]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def document_ids(metadata: Dict[str, Any]) -> List[str]:
+    """청크가 대표하는 문서 ID (준중복 통합된 대표 청크는 변형 제품 ID 포함)"""
+    variants = json.loads(metadata["variant_document_ids"]) if metadata.get("variant_document_ids") else []
+    return [metadata.get("document_id")] + variants
+
+
+def is_relevant(doc, expected: Dict[str, List[str]]) -> bool:
+    metadata = doc.metadata or {}
+    return (
+        metadata.get("source_file") in expected.get("source_files", [])
+        or any(doc_id in expected.get("document_ids", []) for doc_id in document_ids(metadata))
+    )
+
+
+def score_query(docs, expected: Dict[str, List[str]], k: int) -> Tuple[float, float, Optional[int]]:
+    """(recall@k, reciprocal rank, 첫 정답 순위)
+
+    recall@k 분모는 min(기대 정답 수, k) - 정답이 k개보다 많아도 1.0에 도달 가능
+    """
+    targets = set(expected.get("source_files", [])) | set(expected.get("document_ids", []))
+    found = set()
+    first_rank = None
+    for rank, doc in enumerate(docs[:k], start=1):
+        if is_relevant(doc, expected):
+            metadata = doc.metadata or {}
+            matched = [doc_id for doc_id in document_ids(metadata) if doc_id in targets]
+            found.update(matched or [metadata.get("source_file")])
+            if first_rank is None:
+                first_rank = rank
+    recall = len(found) / min(len(targets), k) if targets else 0.0
+    return recall, (1.0 / first_rank if first_rank else 0.0), first_rank
+
+
+def percentiles(latencies_ms: List[float]) -> Dict[str, float]:
+    if not latencies_ms:
+        return {}
+    values = np.array(latencies_ms)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "mean": round(float(values.mean()), 2),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=project_root, text=True).strip()
+    except Exception:
+        return None
+
+
+class RetrievalBenchmark:
+    """VectorStoreService를 그대로 사용해 조합별 검색 결과/지연시간 측정"""
+
+    def __init__(self, service, k: int = 5):
+        from app.services.dailycare.care_chatbot_service import CareChatbotService
+
+        self.service = service
+        self.k = k
+        self.chatbot = CareChatbotService
+
+    def search(self, query: str, species: str, mode: str, routing: str, filtering: str):
+        records = {"pet": {"species_name": species}}
+        # 챗봇과 같이 질문 분석 1회 + 질문 벡터/반려동물 프로필 벡터 가중합 (키워드 검색은 원본 질문)
+        analysis = self.service.analyze_query(query, records)
+        query_embedding = self.service.query_vectors.combine(query, species, self.chatbot._create_pet_context(records))
+        if routing == "routed":
+            collections = analysis.collections
+        else:
+            collections = list(self.service.collections)
+
+        where, partitions = None, None
+        if filtering == "filter_on":
+            where = analysis.where or None
+            partitions = analysis.partitions
+
+        if mode == "vector":
+            return self.service.search_multi_collections(
+                query, collections, k=self.k, where=where, partitions=partitions, query_embedding=query_embedding
+            )
+        if mode == "hybrid":
+            return self.service.hybrid_search_multi_collections(
+                query, collections, k=self.k, where=where, partitions=partitions, query_embedding=query_embedding
+            )
+        if mode == "product_hybrid":
+            # 챗봇과 같이 원본 질문의 제품명 청크를 먼저 두고 남은 자리만 hybrid 결과로 채움
+            product_docs = self.service.find_product_documents(
+                query, k=self.k, where=where, partitions=partitions, matches=analysis.product_matches
+            )
+            if len(product_docs) >= self.k:
+                return product_docs
+            product_ids = {doc.id for doc in product_docs}
+            docs = self.service.hybrid_search_multi_collections(
+                query, collections, k=self.k, where=where, partitions=partitions, query_embedding=query_embedding
+            )
+            return product_docs + [doc for doc in docs if doc.id not in product_ids][:self.k - len(product_docs)]
+
+        keyword_where = self.service._partition_where(where, partitions)
+        results = []
+        for collection_type in collections:
+            results.extend(self.service.keyword_search(query, k=self.k, collection_type=collection_type, where=keyword_where))
+        results.sort(key=lambda x: x[1], reverse=True)
+        return [doc for doc, _ in results[:self.k]]
+
+    def run(self, golden_set: List[Dict[str, Any]], repeat: int = 3, per_query: bool = False) -> Dict[str, Any]:
+        configs: Dict[str, Any] = {}
+        details: Dict[str, Any] = {}
+
+        for mode in MODES:
+            for routing in ROUTINGS:
+                for filtering in FILTERS:
+                    name = f"{mode}|{routing}|{filtering}"
+                    recalls, reciprocal_ranks, latencies, rows = [], [], [], []
+
+                    for item in golden_set:
+                        docs = None
+                        for _ in range(repeat):
+                            start = time.perf_counter()
+                            docs = self.search(item["query"], item.get("species", ""), mode, routing, filtering)
+                            latencies.append((time.perf_counter() - start) * 1000)
+
+                        recall, reciprocal_rank, first_rank = score_query(docs or [], item["expected"], self.k)
+                        recalls.append(recall)
+                        reciprocal_ranks.append(reciprocal_rank)
+                        rows.append({"query": item["query"], "recall": round(recall, 3), "first_rank": first_rank})
+
+                    configs[name] = {
+                        f"recall_at_{self.k}": round(float(np.mean(recalls)), 4),
+                        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+                        "latency_ms": percentiles(latencies),
+                        "queries": len(golden_set),
+                    }
+                    if per_query:
+                        details[name] = rows
+                    print(
+                        f"{name:<32} recall@{self.k}={configs[name][f'recall_at_{self.k}']:.3f} "
+                        f"mrr={configs[name]['mrr']:.3f} p95={configs[name]['latency_ms'].get('p95', 0):.1f}ms"
+                    )
+
+        result = {"configs": configs}
+        if per_query:
+            result["per_query"] = details
+        return result
+
+
+def compare_with_baseline(current: Dict[str, Any], baseline: Dict[str, Any], k: int):
+    """baseline 대비 변화량 출력"""
+    print("\n=== baseline 비교 (현재 - baseline) ===")
+    for name, metrics in current["configs"].items():
+        base = baseline.get("configs", {}).get(name)
+        if not base:
+            print(f"{name:<32} (baseline 없음)")
+            continue
+        recall_key = f"recall_at_{k}"
+        d_recall = metrics[recall_key] - base.get(recall_key, 0)
+        d_mrr = metrics["mrr"] - base.get("mrr", 0)
+        d_p95 = metrics["latency_ms"].get("p95", 0) - base.get("latency_ms", {}).get("p95", 0)
+        print(f"{name:<32} recall {d_recall:+.3f}  mrr {d_mrr:+.3f}  p95 {d_p95:+.1f}ms")
+
+
+def build_service(args):
+    """벤치마크 전용 벡터 DB 경로로 서비스 준비 (임베딩 종류별로 분리)"""
+    from config import Config
+
+    Config.DOCUMENTS_PATH = str(args.documents)
+    Config.VECTOR_DB = str(args.work_dir / args.embeddings / "vector_db")
+    Config.EMBEDDING_PROVIDER = args.embeddings
+
+    from app.services.dailycare.vectorstore_service import VectorStoreService
+
+    service = VectorStoreService()
+
+    start = time.time()
+    stores = service.initialize_vector_db()
+    print(f"벡터 DB 준비 완료 ({time.time() - start:.1f}초): " + ", ".join(
+        f"{name}={store.count() if store else 0}" for name, store in stores.items()
+    ))
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 성능/품질 벤치마크")
+    parser.add_argument("--golden-set", type=Path, default=Path(__file__).parent / "golden_set.json")
+    parser.add_argument("--documents", type=Path, default=project_root / "storage" / "documents")
+    parser.add_argument("--work-dir", type=Path, default=Path(__file__).parent / ".cache", help="벤치마크용 벡터 DB/캐시 경로")
+    parser.add_argument("--embeddings", choices=["local", "openai"], default="local")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3, help="질문별 반복 횟수 (지연시간 표본)")
+    parser.add_argument("--per-query", action="store_true", help="질문별 결과 포함")
+    parser.add_argument("--output", type=Path, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", type=Path, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.embeddings == "local":
+        # 로컬 임베딩은 API를 호출하지 않지만 앱 모듈 import 시 키가 필요
+        os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+    golden_set = load_golden_set(args.golden_set)
+    service = build_service(args)
+    benchmark = RetrievalBenchmark(service, k=args.k)
+    result = benchmark.run(golden_set, repeat=args.repeat, per_query=args.per_query)
+
+    result["meta"] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "embeddings": args.embeddings,
+        "k": args.k,
+        "repeat": args.repeat,
+        "golden_set": str(args.golden_set),
+        "queries": len(golden_set),
+    }
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n결과 저장: {args.output}")
+
+    if args.baseline:
+        compare_with_baseline(result, json.loads(args.baseline.read_text(encoding="utf-8")), args.k)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,6 +18,56 @@ class Config:
     # 벡터DB 설정
     VECTOR_DB = os.getenv('VECTOR_DB', './vector_db')
     DOCUMENTS_PATH = os.getenv('DOCUMENTS_PATH')
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '200000'))
+    # blue/green 재색인 후 이전 버전 콜렉션 삭제까지 유예 시간(초)
+    VECTOR_GC_GRACE_SECONDS = float(os.getenv('VECTOR_GC_GRACE_SECONDS', '60'))
+    # 챗봇 요청이 벡터 스토어 준비를 기다리는 최대 시간(초), 실패 후 재시도 간격(초)
+    VECTOR_WARMUP_WAIT_SECONDS = float(os.getenv('VECTOR_WARMUP_WAIT_SECONDS', '2'))
+    VECTOR_WARMUP_RETRY_SECONDS = float(os.getenv('VECTOR_WARMUP_RETRY_SECONDS', '30'))
+    # 멀티 콜렉션 동시 검색 스레드 수
+    VECTOR_SEARCH_WORKERS = int(os.getenv('VECTOR_SEARCH_WORKERS', '4'))
+    # 하이브리드 검색 시간 예산(초), 초과한 검색 결과는 제외
+    HYBRID_SEARCH_BUDGET_SECONDS = float(os.getenv('HYBRID_SEARCH_BUDGET_SECONDS', '1.5'))
+    # 케어 챗봇 기록 조회/알러지 확인을 검색과 겹쳐 실행하는 스레드 수 (0이면 순차 실행)
+    CHATBOT_PIPELINE_WORKERS = int(os.getenv('CHATBOT_PIPELINE_WORKERS', '8'))
+    # 검색 벡터에 섞는 반려동물 프로필 벡터 가중치 (0이면 질문 벡터만 사용)
+    PET_CONTEXT_WEIGHT = float(os.getenv('PET_CONTEXT_WEIGHT', '0.1'))
+
+    # 벡터 저장소 백엔드: chroma | numpy (mmap .npy + 메타데이터 사이드카, 전수 검색)
+    VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma')
+    # int8 스칼라 양자화 (none이면 float32)
+    # - numpy 백엔드 인덱스: 후보 스캔이 int8 코드만 읽어 스캔 작업 메모리가 약 1/4
+    #   (재계산용 float32 원본을 함께 저장하므로 디스크 크기는 float32만 둘 때의 약 1.25배)
+    # - 임베딩 캐시: BLOB 자체를 int8로 저장해 파일 크기도 약 1/4
+    VECTOR_QUANTIZATION = os.getenv('VECTOR_QUANTIZATION', 'int8')
+    EMBEDDING_CACHE_QUANTIZATION = os.getenv('EMBEDDING_CACHE_QUANTIZATION', 'int8')
+
+    # 임베딩 제공자: openai | local (네트워크 없는 결정적 해싱 임베딩 - 테스트/벤치마크/폐쇄망 빌드용)
+    EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'openai')
+    # OpenAI 임베딩 모델/출력 차원 (차원 축소는 text-embedding-3-* 만 지원, 0이면 모델 기본값)
+    # 바꾸면 기존 콜렉션과 섞이지 않도록 init_vector_db.py --migrate-embeddings로 재색인
+    EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-ada-002')
+    EMBEDDING_DIMENSIONS = int(os.getenv('EMBEDDING_DIMENSIONS', '0'))
+    LOCAL_EMBEDDING_DIMENSIONS = int(os.getenv('LOCAL_EMBEDDING_DIMENSIONS', '512'))
+
+    # 청크 상한/겹침 (cl100k_base 토큰 수)
+    CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '1000'))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', '100'))
+
+    # 의약품 준중복 청크 통합 기준 (문자 5-gram Jaccard, 0이면 통합하지 않음)
+    MEDICATION_DEDUP_THRESHOLD = float(os.getenv('MEDICATION_DEDUP_THRESHOLD', '0.85'))
+    # 대표 청크 뒤 몇 개 청크 안의 준중복까지 묶을지 (클수록 더 많이 묶지만 임베딩 시작 전 대기/메모리 증가)
+    MEDICATION_DEDUP_WINDOW = int(os.getenv('MEDICATION_DEDUP_WINDOW', '256'))
+    # 의약품 성분 색인이 원본 JSON 변경을 다시 확인하는 간격(초, 0이면 요청마다 확인)
+    MEDICATION_INDEX_CHECK_SECONDS = float(os.getenv('MEDICATION_INDEX_CHECK_SECONDS', '30'))
+
+    # 원본 파일 파싱/토큰 계산 프로세스 수 (0이면 CPU 코어 수, 1이면 현재 프로세스에서 파싱)
+    PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', '0'))
+
+    # 임베딩 수집 동시성 / rate limit 예산
+    EMBEDDING_WORKERS = int(os.getenv('EMBEDDING_WORKERS', '4'))
+    EMBEDDING_RPM = int(os.getenv('EMBEDDING_RPM', '3000'))
+    EMBEDDING_TPM = int(os.getenv('EMBEDDING_TPM', '1000000'))
 
     # 파일 저장 경로
     STORAGE_PATH=os.getenv('STORAGE_PATH', os.path.join(os.path.dirname(__file__), 'app', 'static', 'uploads'))
@@ -8,6 +8,7 @@
 import os
 import sys
 import logging
+import argparse
 from pathlib import Path
 
 # 프로젝트 루트를 Python path에 추가
@@ -29,8 +30,55 @@ def setup_logging():
     )
     return logging.getLogger(__name__)
 
+def rebuild(vector_service, logger):
+    """서비스 중단 없이 새 버전 콜렉션으로 재색인 후 alias 교체"""
+    failed = []
+    for collection_type in vector_service.collections:
+        if not vector_service.rebuild_collection_blue_green(collection_type):
+            failed.append(collection_type)
+
+    logger.info(f"이전 버전 콜렉션 정리 대기 ({Config.VECTOR_GC_GRACE_SECONDS}초)...")
+    vector_service.wait_for_gc()
+
+    if failed:
+        logger.error(f"❌ 재색인 검증 실패로 기존 버전을 유지한 콜렉션: {failed}")
+        return 1
+    logger.info("✅ blue/green 재색인 완료")
+    return 0
+
+def migrate_embeddings(vector_service, logger):
+    """임베딩 모델/차원이 바뀐 콜렉션만 새 버전 콜렉션에 재임베딩 후 교체 (기존 콜렉션에 섞지 않음)"""
+    pending = vector_service.pending_embedding_migrations()
+    if not pending:
+        logger.info("✅ 모든 콜렉션이 현재 임베딩 설정으로 만들어져 있습니다.")
+        return 0
+
+    current = vector_service._embedding_signature() or {}
+    failed = []
+    for collection_type, recorded in pending.items():
+        logger.info(
+            f"{collection_type}: {recorded.get('model')}({recorded.get('dimensions')}차원) → "
+            f"{current.get('model')}({current.get('dimensions')}차원) 재색인"
+        )
+        if not vector_service.rebuild_collection_blue_green(collection_type):
+            failed.append(collection_type)
+
+    logger.info(f"이전 버전 콜렉션 정리 대기 ({Config.VECTOR_GC_GRACE_SECONDS}초)...")
+    vector_service.wait_for_gc()
+
+    if failed:
+        logger.error(f"❌ 마이그레이션 검증 실패로 기존 버전을 유지한 콜렉션: {failed}")
+        return 1
+    logger.info("✅ 임베딩 마이그레이션 완료")
+    return 0
+
 def main():
     """벡터 DB 초기화 메인 함수"""
+    parser = argparse.ArgumentParser(description="벡터 DB 초기화")
+    parser.add_argument("--rebuild", action="store_true", help="새 버전 콜렉션을 만들어 검증 후 교체 (blue/green)")
+    parser.add_argument("--migrate-embeddings", action="store_true", help="EMBEDDING_MODEL/DIMENSIONS가 바뀐 콜렉션만 새 버전으로 재임베딩")
+    args = parser.parse_args()
+
     logger = setup_logging()
     logger.info("=== 벡터 DB 초기화 시작 ===")
     
@@ -44,7 +92,12 @@ def main():
             return 1
         
         # 벡터 스토어 서비스 초기화
-        vector_service = VectorStoreService()
+        vector_service = VectorStoreService(parallel_parse=True)
+
+        if args.rebuild:
+            return rebuild(vector_service, logger)
+        if args.migrate_embeddings:
+            return migrate_embeddings(vector_service, logger)
         
         # 기존 벡터 DB 확인
         vector_db_path = Path(Config.VECTOR_DB)
@@ -59,7 +112,7 @@ def main():
             for collection_name, store in stores.items():
                 if store:
                     try:
-                        count = store._collection.count()
+                        count = store.count()
                         logger.info(f"{collection_name} 컬렉션: {count}개 문서")
                     except Exception as e:
                         logger.warning(f"{collection_name} 컬렉션 상태 확인 실패: {e}")
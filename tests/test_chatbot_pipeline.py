@@ -0,0 +1,120 @@
+import pytest
+import sys
+import os
+import time
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app.services.dailycare.care_chatbot_service import CareChatbotService
+from app.services.dailycare.stage_timings import LatencyStats, StageTimings
+
+
+SERVICE = "app.services.dailycare.care_chatbot_service"
+DELAY = 0.1
+
+
+def slow(value):
+    def load(pet_id):
+        time.sleep(DELAY)
+        return value
+    return load
+
+
+@pytest.fixture
+def flask_app():
+    app = Flask(__name__)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def loaders():
+    return {
+        'pet': slow({"pet_id": 1, "species_name": "강아지"}),
+        'health': slow([]),
+        'allergy': slow([SimpleNamespace(allergen="닭")]),
+        'disease': slow([]),
+        'medication': slow([]),
+        'surgery': slow([]),
+        'vaccination': slow([]),
+    }
+
+
+class TestStageTimings:
+
+    def test_stage_and_latency_percentiles(self):
+        timings = StageTimings()
+        with timings.stage("records"):
+            time.sleep(0.01)
+        result = timings.finish()
+        assert result["records"] >= 10 and result["total"] >= result["records"]
+
+        stats = LatencyStats(window=3)
+        for total in (10.0, 20.0, 30.0, 40.0):
+            stats.add({"total": total})
+        assert stats.snapshot()["total"]["count"] == 3
+        assert stats.snapshot()["total"]["p50"] == 30.0
+
+
+class TestChatbotPipeline:
+
+    def test_records_and_retrieval_overlap(self, flask_app, loaders):
+        """기록 7건은 동시에, 벡터 스토어 대기/질문 임베딩은 기록 조회와 겹쳐, 알러지 확인은 검색과 겹쳐 실행"""
+        vector_store = MagicMock()
+        record_threads = set()
+
+        def record_loader(name, load):
+            def wrapped(pet_id):
+                record_threads.add(threading.current_thread().name)
+                return load(pet_id)
+            return wrapped
+
+        def wait_for_store(*args, **kwargs):
+            time.sleep(DELAY)
+            return vector_store
+
+        def search(query, pet_records=None, k=5, search_type="hybrid", analysis=None):
+            time.sleep(DELAY)
+            assert analysis is vector_store.analyze_query.return_value
+            return "참고자료"
+
+        def allergy_check(records, user_input):
+            time.sleep(DELAY)
+            return []
+
+        with patch.object(CareChatbotService, "_record_loaders",
+                          return_value={name: record_loader(name, load) for name, load in loaders.items()}), \
+                patch.object(CareChatbotService, "get_vector_store", side_effect=wait_for_store), \
+                patch.object(CareChatbotService, "search_knowledge_base", side_effect=search), \
+                patch.object(CareChatbotService, "find_allergy_conflicts", side_effect=allergy_check), \
+                patch(f"{SERVICE}.get_gpt_response", return_value="답변"):
+            timings = StageTimings()
+            answer = CareChatbotService.chatbot_with_records("산책 시간?", 1, 1, timings=timings)
+
+        assert answer == "답변"
+        assert all(name.startswith("care-chatbot") for name in record_threads)
+        vector_store.query_vectors.question_vector.assert_called_once_with("산책 시간?")
+        stages = timings.stages
+        assert {"vector_store_wait", "question_embedding", "records", "analysis", "retrieval", "allergy_check", "llm", "total"} <= set(stages)
+        # 순차 실행이면 기록 7건 + 벡터 스토어 대기 + 검색 + 알러지 확인 = 10 * DELAY
+        assert stages["records"] < 4 * DELAY * 1000
+        assert stages["total"] < 6 * DELAY * 1000
+
+    def test_sequential_when_pool_disabled(self, flask_app, loaders):
+        """CHATBOT_PIPELINE_WORKERS=0이면 같은 단계를 순차 실행"""
+        with patch.object(CareChatbotService, "_pipeline_executor", None), \
+                patch.object(CareChatbotService, "_record_loaders", return_value=loaders), \
+                patch.object(CareChatbotService, "get_vector_store", return_value=None), \
+                patch.object(CareChatbotService, "find_allergy_conflicts", return_value=[]) as allergy_check, \
+                patch(f"{SERVICE}.get_gpt_response", return_value="답변") as gpt:
+            timings = StageTimings()
+            assert CareChatbotService.chatbot_with_records("산책 시간?", 1, 1, timings=timings) == "답변"
+
+        assert allergy_check.call_args.args[0]["allergy"][0].allergen == "닭"
+        assert "반려동물 기록" in gpt.call_args.args[0]
+        assert timings.stages["records"] >= 7 * DELAY * 1000
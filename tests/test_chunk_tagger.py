@@ -0,0 +1,51 @@
+import pytest
+import sys
+import os
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare.chunk_tagger import tag_chunk, detect_species
+from app.services.dailycare.keyword_index import matches_where
+
+
+class TestChunkTagger:
+
+    def test_detect_species(self):
+        """'개' 단독/합성어만 강아지로 판단"""
+        assert detect_species("개 부루셀라병") == "dog"
+        assert detect_species("고양이 사료") == "cat"
+        assert detect_species("개와 고양이 공통") == "common"
+        assert detect_species("3개월 이후 개선") is None
+
+    def test_header_takes_precedence_over_body(self):
+        """헤더/카테고리에 종이 있으면 본문 언급보다 우선"""
+        tags = tag_chunk("고양이와 달리 주의가 필요합니다", {"title": "강아지 예방접종"}, "general_guide")
+        assert tags["species"] == "dog"
+        assert tags["species_dog"] and not tags["species_cat"]
+        assert tags["topic_vaccine"]
+        assert not tags["is_medication"]
+
+    def test_untagged_chunk_is_common(self):
+        """종 언급이 없으면 공통 문서"""
+        tags = tag_chunk("구충제 용법용량", {"product_name": "드론탈"}, "medication")
+        assert tags["species"] == "common"
+        assert tags["species_dog"] and tags["species_cat"]
+        assert tags["is_medication"] and tags["topic_parasite"]
+
+    def test_ear_topic_requires_specific_terms(self):
+        """'귀'가 들어간 다른 단어(귀엽다, 귀가, 귀하)는 피부 주제가 아님"""
+        for text in ("귀여운 강아지와 산책 후 귀가", "귀하의 반려동물 등록 안내"):
+            assert not tag_chunk(text, {}, "general_guide")["topic_skin"]
+        for text in ("외이도에 염증이 생기면", "귀 가려움이 심할 때", "귓병 예방"):
+            assert tag_chunk(text, {}, "general_guide")["topic_skin"]
+
+    def test_matches_where(self):
+        metadata = {"species_dog": True, "is_medication": False, "topic_vaccine": False}
+        assert matches_where(metadata, {"species_dog": True})
+        assert not matches_where(metadata, {"species_cat": True})
+        assert matches_where(metadata, {"$and": [{"species_dog": True}, {"$or": [{"is_medication": False}, {"topic_vaccine": True}]}]})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
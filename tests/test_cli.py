@@ -0,0 +1,67 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from flask import Flask
+from app.cli import is_vectors_command, register_cli
+
+
+class TestVectorsBuild:
+
+    @pytest.fixture
+    def runner(self):
+        app = Flask(__name__)
+        register_cli(app)
+        return app.test_cli_runner()
+
+    @pytest.fixture
+    def service(self):
+        service = MagicMock()
+        service.collections = {'general_guides': 'mypetsvoice_general_guides'}
+        service.plan_collection.return_value = {
+            "collection": "mypetsvoice_general_guides", "files": 2, "total_chunks": 3,
+            "embed_chunks": 1, "embed_tokens": 42, "resumed": 0,
+        }
+        with patch('app.services.dailycare.vectorstore_service.VectorStoreService', return_value=service):
+            yield service
+
+    def test_dry_run_does_not_sync(self, runner, service):
+        """--dry-run은 계획만 출력"""
+        result = runner.invoke(args=['vectors', 'build', '--dry-run'])
+        assert result.exit_code == 0
+        assert "임베딩 1개" in result.output
+        service.sync_collection.assert_not_called()
+
+    def test_build_succeeds_when_count_matches(self, runner, service):
+        service.sync_collection.return_value.count.return_value = 3
+        result = runner.invoke(args=['vectors', 'build', '--collection', 'general_guides'])
+        assert result.exit_code == 0
+        assert service.sync_collection.call_args.kwargs["progress"] is not None
+
+    def test_count_mismatch_exits_non_zero(self, runner, service):
+        """동기화 후 문서 수가 파싱된 청크 수와 다르면 실패"""
+        service.sync_collection.return_value.count.return_value = 2
+        result = runner.invoke(args=['vectors', 'build'])
+        assert result.exit_code == 1
+
+        service.sync_collection.return_value = None
+        assert runner.invoke(args=['vectors', 'build']).exit_code == 1
+
+    def test_unknown_collection_rejected(self, runner, service):
+        result = runner.invoke(args=['vectors', 'build', '--collection', 'unknown'])
+        assert result.exit_code != 0
+        service.plan_collection.assert_not_called()
+
+    def test_only_vectors_command_skips_warmup(self, monkeypatch):
+        """flask vectors ...만 백그라운드 준비를 건너뛰고 flask run은 기동 시 준비"""
+        monkeypatch.setenv('FLASK_RUN_FROM_CLI', 'true')
+        assert is_vectors_command(['flask', '--app', 'run', 'vectors', 'build'])
+        assert not is_vectors_command(['flask', '--app', 'run', 'run', '--port', '5000'])
+        monkeypatch.delenv('FLASK_RUN_FROM_CLI')
+        assert not is_vectors_command(['python', 'vectors'])
@@ -0,0 +1,144 @@
+import pytest
+import sys
+import os
+import threading
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare.embedding_pipeline import EmbeddingIngestionPipeline, is_rate_limit_error, prefetch
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyEmbeddings:
+    """처음 몇 번은 429를 반환하는 가짜 임베딩"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls += 1
+            if self.failures > 0:
+                self.failures -= 1
+                raise RateLimitError("429 Too Many Requests")
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def make_chunks(n):
+    return [(f"id{i}", f"텍스트 {i}", {"item_index": i}) for i in range(n)]
+
+
+class TestEmbeddingIngestionPipeline:
+
+    def collect_writer(self):
+        written = {}
+
+        def write(ids, texts, metadatas, embeddings):
+            for chunk_id, embedding in zip(ids, embeddings):
+                written[chunk_id] = embedding
+        return written, write
+
+    def test_all_chunks_written(self):
+        """모든 청크가 저장되는지 테스트"""
+        written, write = self.collect_writer()
+        pipeline = EmbeddingIngestionPipeline(
+            FlakyEmbeddings(), write, max_workers=3, batch_size=7, base_backoff=0.01, token_counter=len
+        )
+        result = pipeline.run(make_chunks(50))
+
+        assert result.ok
+        assert result.total_chunks == 50
+        assert set(written.keys()) == {f"id{i}" for i in range(50)}
+
+    def test_rate_limited_batches_are_retried(self):
+        """429 응답 배치는 버려지지 않고 재시도"""
+        written, write = self.collect_writer()
+        embeddings = FlakyEmbeddings(failures=2)
+        pipeline = EmbeddingIngestionPipeline(
+            embeddings, write, max_workers=2, batch_size=10, base_backoff=0.01, token_counter=len
+        )
+        result = pipeline.run(make_chunks(20))
+
+        assert result.ok
+        assert len(written) == 20
+        assert embeddings.calls == 4
+
+    def test_exhausted_retries_are_reported(self):
+        """재시도 초과 배치는 failed_ids로 보고"""
+        written, write = self.collect_writer()
+        pipeline = EmbeddingIngestionPipeline(
+            FlakyEmbeddings(failures=100), write, max_workers=1, batch_size=5, max_retries=2, base_backoff=0.01,
+            token_counter=len,
+        )
+        result = pipeline.run(make_chunks(5))
+
+        assert not result.ok
+        assert sorted(result.failed_ids) == [f"id{i}" for i in range(5)]
+
+    def test_producer_errors_propagate(self):
+        """청크 생산(파싱) 중 예외는 run 호출 측에서 다시 발생"""
+        def chunks():
+            yield from make_chunks(3)
+            raise ValueError("파싱 실패")
+
+        _, write = self.collect_writer()
+        pipeline = EmbeddingIngestionPipeline(FlakyEmbeddings(), write, max_workers=1, batch_size=2, token_counter=len)
+        with pytest.raises(ValueError):
+            pipeline.run(chunks())
+
+    def test_progress_callback_errors_do_not_stop_writer(self):
+        """진행 상황 콜백이 예외를 내도 writer는 계속 저장 (작업자가 큐에서 멈추지 않음)"""
+        written, write = self.collect_writer()
+        calls = []
+
+        def progress(result):
+            calls.append(result.written_chunks)
+            raise RuntimeError("체크포인트 저장 실패")
+
+        pipeline = EmbeddingIngestionPipeline(
+            FlakyEmbeddings(), write, max_workers=2, batch_size=2, token_counter=len, prefetch_chunks=0
+        )
+        result = pipeline.run(make_chunks(20), progress=progress)
+
+        assert result.ok and len(written) == 20
+        assert len(calls) == 10
+
+    def test_writer_thread_errors_propagate(self):
+        """writer 스레드가 죽으면 run은 멈추지 않고 그 예외를 다시 발생"""
+        class WriterCrash(BaseException):
+            pass
+
+        def write(ids, texts, metadatas, embeddings):
+            raise WriterCrash()
+
+        pipeline = EmbeddingIngestionPipeline(
+            FlakyEmbeddings(), write, max_workers=1, batch_size=1, token_counter=len, prefetch_chunks=0
+        )
+        with pytest.raises(WriterCrash):
+            pipeline.run(make_chunks(20))
+
+    def test_prefetch_is_bounded(self):
+        """생산 측은 큐 크기 이상 앞서가지 않음"""
+        produced = []
+
+        def items():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        stream = prefetch(items(), maxsize=4)
+        assert next(stream) == 0
+        threading.Event().wait(0.2)
+        # 소비 1개 + 큐 4개 + 넣으려고 대기 중인 1개
+        assert len(produced) <= 6
+        assert list(stream) == list(range(1, 100))
+
+    def test_is_rate_limit_error(self):
+        assert is_rate_limit_error(RateLimitError("x"))
+        assert not is_rate_limit_error(ValueError("bad input"))
@@ -0,0 +1,87 @@
+import pytest
+import sys
+import os
+import numpy as np
+from unittest.mock import MagicMock, patch
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from app.services.dailycare.embedding_providers import (
+    HashedNgramEmbeddingProvider, OpenAIEmbeddingProvider, LEGACY_CACHE_NAMESPACE,
+)
+from app.services.dailycare.vectorstore_service import CachedOpenAIEmbeddings
+
+
+class TestHashedNgramEmbeddingProvider:
+
+    @pytest.fixture
+    def provider(self):
+        return HashedNgramEmbeddingProvider(dimensions=256)
+
+    def test_deterministic_and_normalized(self, provider):
+        """같은 입력은 인스턴스와 무관하게 같은 단위 벡터"""
+        first = provider.embed_query("강아지 예방접종 시기")
+        assert first == HashedNgramEmbeddingProvider(dimensions=256).embed_query("강아지 예방접종 시기")
+        assert len(first) == 256
+        assert abs(float(np.dot(first, first)) - 1.0) < 1e-5
+
+    def test_similar_texts_are_closer(self, provider):
+        """어휘가 겹치는 문장이 무관한 문장보다 가까움"""
+        query, near, far = provider.embed_documents([
+            "강아지 종합백신 예방접종 일정",
+            "강아지 예방접종 일정과 종합백신",
+            "고양이 사료 급여량 계산",
+        ])
+        assert np.dot(query, near) > np.dot(query, far)
+
+    def test_empty_text(self, provider):
+        assert provider.embed_query("   ") == [0.0] * 256
+
+
+class TestCacheNamespace:
+
+    def test_cache_key_namespaced_by_provider(self, tmp_path):
+        """제공자/차원이 다르면 같은 텍스트라도 캐시 키가 다름"""
+        small = CachedOpenAIEmbeddings(HashedNgramEmbeddingProvider(dimensions=64), str(tmp_path / "a"))
+        large = CachedOpenAIEmbeddings(HashedNgramEmbeddingProvider(dimensions=128), str(tmp_path / "b"))
+        assert small.get_cache_key("구충제") != large.get_cache_key("구충제")
+
+        vector = small.embed_query("구충제")
+        assert len(vector) == 64
+        assert small.embed_query("구충제") == vector
+
+    def test_legacy_openai_key_unchanged(self, tmp_path):
+        """기본 OpenAI 모델은 기존 캐시 키(md5(text))를 유지"""
+        import hashlib
+
+        openai = MagicMock(model="text-embedding-ada-002", dimensions=None)
+        provider = OpenAIEmbeddingProvider(openai)
+        assert provider.cache_namespace == LEGACY_CACHE_NAMESPACE
+
+        cached = CachedOpenAIEmbeddings(provider, str(tmp_path))
+        assert cached.get_cache_key("구충제") == hashlib.md5("구충제".encode("utf-8")).hexdigest()
+
+    def test_reduced_dimensions_rejected_for_ada(self):
+        """ada-002는 차원 축소 불가, text-embedding-3 모델은 지정 차원으로 서명"""
+        with pytest.raises(ValueError):
+            OpenAIEmbeddingProvider(MagicMock(model="text-embedding-ada-002", dimensions=512))
+
+        provider = OpenAIEmbeddingProvider(MagicMock(model="text-embedding-3-small", dimensions=512))
+        assert provider.signature() == {"provider": "openai", "model": "text-embedding-3-small", "dimensions": 512}
+
+    def test_service_uses_local_provider(self, tmp_path):
+        """EMBEDDING_PROVIDER=local이면 OpenAI 클라이언트를 만들지 않음"""
+        from app.services.dailycare.vectorstore_service import VectorStoreService
+
+        with patch("app.services.dailycare.vectorstore_service.Config") as mock_config, \
+             patch("app.services.dailycare.vectorstore_service.OpenAIEmbeddings") as mock_openai:
+            mock_config.EMBEDDING_PROVIDER = "local"
+            mock_config.LOCAL_EMBEDDING_DIMENSIONS = 32
+            provider = VectorStoreService._create_embedding_provider()
+
+        mock_openai.assert_not_called()
+        assert isinstance(provider, HashedNgramEmbeddingProvider)
+        assert provider.dimensions == 32
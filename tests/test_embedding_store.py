@@ -0,0 +1,107 @@
+import pytest
+import sys
+import os
+import pickle
+import numpy as np
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare.embedding_store import EmbeddingStore
+
+
+class TestEmbeddingStore:
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = EmbeddingStore(str(tmp_path / "embeddings.sqlite3"), max_entries=10)
+        yield store
+        store.close()
+
+    def test_put_and_get_many(self, store):
+        """다건 저장/조회 테스트"""
+        store.put_many({"a": [0.1, 0.2, 0.3], "b": [1.0, 2.0, 3.0]})
+        found = store.get_many(["a", "b", "missing"])
+
+        assert set(found.keys()) == {"a", "b"}
+        assert found["b"] == [1.0, 2.0, 3.0]
+        assert found["a"] == pytest.approx([0.1, 0.2, 0.3], rel=1e-6)
+
+    def test_int8_quantized_store(self, tmp_path):
+        """int8 저장은 약 1/4 크기로 근사 복원, 기존 float32 행도 함께 읽음"""
+        path = str(tmp_path / "embeddings.sqlite3")
+        vector = np.random.default_rng(0).normal(scale=0.05, size=1536).astype(np.float32)
+
+        legacy = EmbeddingStore(path, max_entries=10)
+        legacy.put_many({"float": vector.tolist()})
+        legacy.close()
+
+        store = EmbeddingStore(path, max_entries=10, quantization="int8")
+        store.put_many({"int8": vector.tolist()})
+        found = store.get_many(["float", "int8"])
+        blob_sizes = dict(store._conn.execute("SELECT key, length(vector) FROM embeddings").fetchall())
+        store.close()
+
+        assert found["float"] == pytest.approx(vector.tolist(), rel=1e-6)
+        restored = np.array(found["int8"])
+        assert np.abs(restored - vector).max() <= (vector.max() - vector.min()) / 255
+        assert blob_sizes["int8"] == 1536 + 8
+        assert blob_sizes["float"] == 1536 * 4
+
+    def test_lru_eviction(self, tmp_path):
+        """상한 초과 시 오래 사용되지 않은 항목부터 정리"""
+        store = EmbeddingStore(str(tmp_path / "embeddings.sqlite3"), max_entries=10, touch_interval=0)
+        store.put_many({f"old{i}": [float(i)] for i in range(10)})
+        store.get_many(["old0"])  # 최근 사용으로 갱신 (다음 저장 때 반영)
+        store.put_many({f"new{i}": [float(i)] for i in range(5)})
+
+        assert len(store) == 10
+        assert "old0" in store.get_many(["old0"])
+        store.close()
+
+    def test_cache_hits_do_not_write(self, store):
+        """touch_interval 안의 재조회는 쓰기 없음, 오래된 항목의 갱신은 모았다가 저장 트랜잭션에서 반영"""
+        store.put_many({"a": [1.0], "b": [2.0]})
+        store._conn.execute("UPDATE embeddings SET last_access = 0 WHERE key = 'a'")
+        store._conn.commit()
+        changes = store._conn.total_changes
+
+        for _ in range(3):
+            assert set(store.get_many(["a", "b"])) == {"a", "b"}
+        assert store._conn.total_changes == changes
+        assert list(store._pending_touches) == ["a"]
+
+        store.put_many({"c": [3.0]})
+        last_access = dict(store._conn.execute("SELECT key, last_access FROM embeddings").fetchall())
+        assert last_access["a"] > 0
+        assert store._pending_touches == {}
+
+    def test_puts_below_limit_do_not_count_rows(self, tmp_path):
+        """상한 아래의 저장은 COUNT(*)를 실행하지 않고, 추정치가 상한을 넘을 때만 다시 세어 정리"""
+        store = EmbeddingStore(str(tmp_path / "embeddings.sqlite3"), max_entries=10)
+        statements = []
+        store._conn.set_trace_callback(statements.append)
+
+        for i in range(11):
+            store.put_many({f"q{i}": [float(i)]})
+        assert not any("COUNT(*)" in sql for sql in statements)
+
+        # 덮어쓰기도 추정치에 더해지므로 다시 센 뒤 실제 행 수로 보정 (정리 없음)
+        store.put_many({"q0": [0.0]})
+        assert sum("COUNT(*)" in sql for sql in statements) == 1
+        assert store._estimated_count == len(store) == 11
+
+        store.put_many({f"new{i}": [float(i)] for i in range(3)})
+        assert len(store) == 10
+        assert store._estimated_count == 10
+        store.close()
+
+    def test_import_pickle_dir(self, store, tmp_path):
+        """기존 pkl 캐시 이관 테스트"""
+        legacy_dir = tmp_path / "legacy"
+        legacy_dir.mkdir()
+        with open(legacy_dir / "abc123.pkl", "wb") as f:
+            pickle.dump([0.5, 0.25], f)
+
+        assert store.import_pickle_dir(str(legacy_dir)) == 1
+        assert store.get_many(["abc123"])["abc123"] == [0.5, 0.25]
@@ -0,0 +1,41 @@
+import pytest
+import io
+import sys
+import os
+import json
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare.json_stream import iter_json_items
+
+
+class TestIterJsonItems:
+
+    @pytest.mark.parametrize("read_size", [1, 7, 1 << 16])
+    def test_array_items_match_json_loads(self, read_size):
+        """버퍼 크기와 무관하게 json.loads와 같은 항목 (경계에 걸린 숫자/문자열 포함)"""
+        data = [{"id": "med_1", "text": '구충제 [정제], "따옴표"'}, 12345, -1.5e3, "문자열", None, True, [1, [2]], {}]
+        text = " \n[ " + ",\n  ".join(json.dumps(item, ensure_ascii=False) for item in data) + " ]\n"
+
+        items = list(iter_json_items(io.StringIO(text), read_size=read_size))
+        assert items == list(enumerate(data))
+
+    def test_empty_array(self):
+        assert list(iter_json_items(io.StringIO(" [ ] "))) == []
+
+    def test_non_array_is_single_value(self):
+        """최상위가 객체면 (None, 전체 값) 하나"""
+        assert list(iter_json_items(io.StringIO('{"a": [1, 2]}'), read_size=3)) == [(None, {"a": [1, 2]})]
+
+    def test_items_before_error_are_yielded(self):
+        """형식 오류 전까지의 항목은 반환하고 이후 JSONDecodeError"""
+        stream = iter_json_items(io.StringIO('[{"a": 1}, {"b": 2} {"c": 3}]'), read_size=4)
+        assert next(stream) == (0, {"a": 1})
+        assert next(stream) == (1, {"b": 2})
+        with pytest.raises(json.JSONDecodeError):
+            next(stream)
+
+    def test_unterminated_array(self):
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_items(io.StringIO('[1, 2'), read_size=2))
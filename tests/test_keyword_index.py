@@ -0,0 +1,83 @@
+import pytest
+import sys
+import os
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from app.services.dailycare.keyword_index import KoreanTokenizer, BM25Index
+
+
+class TestKoreanTokenizer:
+
+    def test_strip_particle(self):
+        """조사 제거 테스트"""
+        tokenizer = KoreanTokenizer()
+        assert tokenizer.strip_particle("강아지가") == "강아지"
+        assert tokenizer.strip_particle("병원에서") == "병원"
+        # 어간이 너무 짧아지면 제거하지 않음
+        assert tokenizer.strip_particle("개가") == "개가"
+
+    def test_i_particle_keeps_nouns_ending_in_i(self):
+        """'이'로 끝나는 명사는 그대로, 조사가 붙어도 같은 토큰"""
+        tokenizer = KoreanTokenizer()
+        assert tokenizer.strip_particle("고양이") == "고양이"
+        assert tokenizer.strip_particle("고양이가") == "고양이"
+        assert tokenizer.strip_particle("고양이나") == "고양이"
+        assert tokenizer.strip_particle("피부병이") == "피부병"
+        # 받침 없는 말 뒤의 '이'는 조사가 아님
+        assert tokenizer.strip_particle("아이") == "아이"
+        assert tokenizer.tokenize("고양이")[0] == tokenizer.tokenize("고양이가")[0] == "고양이"
+
+    def test_stop_words_checked_before_and_after_stripping(self):
+        """'요'/'나'로 끝나는 불용어가 조사 제거 후 남지 않음"""
+        tokenizer = KoreanTokenizer()
+        assert tokenizer.tokenize("알려주세요") == []
+        assert tokenizer.tokenize("주세요") == []
+        assert tokenizer.tokenize("있나요") == []
+        assert tokenizer.tokenize("사료 양 알려주세요") == ["사료"]
+
+    def test_tokenize_ngrams(self):
+        """n-gram 생성 테스트"""
+        tokens = KoreanTokenizer().tokenize("예방접종은 언제 하나요?")
+        assert "예방접종" in tokens
+        assert "접종" in tokens
+        assert "하나요" not in tokens
+
+
+class TestBM25Index:
+
+    @pytest.fixture
+    def index(self):
+        index = BM25Index()
+        index.add_documents(
+            ["a", "b", "c"],
+            [
+                Document(page_content="강아지 예방접종 일정과 백신 종류", metadata={"source_file": "vaccine.md"}),
+                Document(page_content="고양이 사료 급여량 가이드", metadata={"source_file": "food.md"}),
+                Document(page_content="넥스가드 스펙트라 용법용량: 체중에 따라 투여", metadata={"source_file": "med.json"}),
+            ],
+        )
+        return index
+
+    def test_search_ranks_matching_document(self, index):
+        """관련 문서가 상위에 오는지 테스트"""
+        results = index.search("강아지 백신 접종 시기", k=2)
+        assert results[0][0] == "a"
+        assert results[0][2] > 0
+
+    def test_partial_word_match(self, index):
+        """띄어쓰기가 다른 복합어도 n-gram으로 매칭"""
+        results = index.search("넥스가드의 용량", k=1)
+        assert results[0][0] == "c"
+
+    def test_replace_and_remove(self, index):
+        """문서 교체/삭제 테스트"""
+        index.add_documents(["b"], [Document(page_content="고양이 구토 대처법")])
+        assert len(index) == 3
+        assert index.search("사료", k=3) == []
+
+        index.remove_documents(["a"])
+        assert "a" not in index
+        assert all(doc_id != "a" for doc_id, _, _ in index.search("예방접종", k=3))
@@ -0,0 +1,189 @@
+import pytest
+import sys
+import os
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare import medication_index
+from app.services.dailycare.medication_index import (
+    MedicationIngredientIndex, allergen_terms, get_medication_index, parse_ingredients,
+)
+
+
+ITEMS = [
+    {
+        "id": "med_1",
+        "text": "제품명: 아목시 정(아목시실린)\\n영문명: Amoxi Tab\\n\\n효능효과: 세균성 피부염, 요로감염의 치료\\n\\n"
+                "용법용량:\\n1일 2회 (아목시실린으로서 10mg/kg)",
+        "metadata": {"product_name": "아목시 정(아목시실린)", "company": "펫제약"},
+    },
+    {
+        "id": "med_2",
+        "text": "제품명: 뿌치츄어블(치킨향, 수출용)\\n\\n주요 원료약품:\\n• 피란텔파모산염: 50mg\\n• 닭고기분말: 100mg\\n\\n"
+                "효능효과: 개의 회충, 구충 구제",
+        "metadata": {"product_name": "뿌치츄어블(치킨향, 수출용)"},
+    },
+    {
+        "id": "med_3",
+        "text": "제품명: 더마케어 연고\\n\\n주요 원료약품:\\n• 덱사메타손: 1mg\\n\\n효능효과: 알레르기성 피부염의 증상 완화",
+        "metadata": {"product_name": "더마케어 연고"},
+    },
+]
+
+
+@pytest.fixture
+def index():
+    index = MedicationIngredientIndex()
+    for item in ITEMS:
+        index.add_item(item)
+    return index
+
+
+class TestParsing:
+
+    def test_parse_ingredients_from_list_and_active(self):
+        """원료약품 목록 / "○○으로서" (제품명 괄호 안 표기는 성분으로 보지 않음)"""
+        assert parse_ingredients(ITEMS[0]["text"]) == ["아목시실린"]
+        assert parse_ingredients(ITEMS[1]["text"]) == ["피란텔파모산염", "닭고기분말"]
+
+    def test_allergen_terms_include_synonyms(self):
+        assert {"닭", "chicken", "치킨"} <= allergen_terms("닭고기")
+        assert "아목시실린" in allergen_terms("페니실린 알러지")
+        for allergen in ("소고기 알러지", "쇠고기", "우육", "beef", "소고기알레르기"):
+            assert {"소고기", "쇠고기", "우육", "beef"} <= allergen_terms(allergen)
+
+
+class TestMedicationIngredientIndex:
+
+    def test_products_with_ingredient(self, index):
+        assert index.products_with_ingredient("닭") == {"med_2"}
+        assert index.products_with_ingredient("페니실린") == {"med_1"}
+        assert index.products_with_ingredient("연어") == set()
+
+    def test_products_for_indication(self, index):
+        assert index.products_for_indication("피부염") == {"med_1", "med_3"}
+        assert index.products_for_indication("알레르기성 피부염") == {"med_3"}
+
+    def test_check_allergies_limited_to_given_products(self, index):
+        """대상 제품 안에서만, 겹치는 성분 표기와 함께 반환"""
+        conflicts = index.check_allergies(["닭", "페니실린"], index.resolve_products(["뿌치츄어블 먹여도 돼?"]))
+        assert [(c.allergen, c.document_id, c.ingredients) for c in conflicts] == [
+            ("닭", "med_2", ["닭고기분말"]),
+        ]
+        assert [c.document_id for c in index.check_allergies(["페니실린"])] == ["med_1"]
+
+    def test_get_medication_index_rebuilds_when_files_change(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(medication_index, "_cached", None)
+        monkeypatch.setattr(medication_index.Config, "MEDICATION_INDEX_CHECK_SECONDS", 0)
+        path = tmp_path / "medications.json"
+        path.write_text(json.dumps(ITEMS[:1], ensure_ascii=False), encoding="utf-8")
+        first = get_medication_index(str(tmp_path))
+        assert get_medication_index(str(tmp_path)) is first
+
+        path.write_text(json.dumps(ITEMS, ensure_ascii=False), encoding="utf-8")
+        assert len(get_medication_index(str(tmp_path))) == 3
+
+    def test_get_medication_index_skips_file_checks_within_interval(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(medication_index, "_cached", None)
+        monkeypatch.setattr(medication_index.Config, "MEDICATION_INDEX_CHECK_SECONDS", 60)
+        path = tmp_path / "medications.json"
+        path.write_text(json.dumps(ITEMS[:1], ensure_ascii=False), encoding="utf-8")
+        first = get_medication_index(str(tmp_path))
+
+        checks = []
+        original = medication_index._files_signature
+        monkeypatch.setattr(medication_index, "_files_signature", lambda paths: checks.append(paths) or original(paths))
+        path.write_text(json.dumps(ITEMS, ensure_ascii=False), encoding="utf-8")
+        assert get_medication_index(str(tmp_path)) is first
+        assert checks == []
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    """수집된 의약품 문서 (storage/documents/processed_medications)"""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "storage", "documents", "processed_medications",
+                        "medicine_data_fixed(401-730)_batch_5249.json")
+    return MedicationIngredientIndex.from_files([path])
+
+
+class TestRealCorpus:
+
+    @staticmethod
+    def product_id(corpus, name):
+        return next(i for i, product in corpus.products.items() if product.product_name == name)
+
+    def test_product_name_parentheses_are_not_ingredients(self, corpus):
+        product = corpus.products[self.product_id(corpus, "플루가드 H9N2 백신")]
+        assert product.ingredients == ["저병원성 조류인플루엔자바이러스(LPAIV) A/Chicken/Korea/01310/2001(H9N2)(사독)"]
+        shampoo = corpus.products[self.product_id(corpus, "토탈라이프 애견용 투인원 샴푸 앤 린스")]
+        assert shampoo.ingredients == []
+
+    def test_vaccine_host_and_strain_names_are_not_allergens(self, corpus):
+        """닭 숙주/분리주 이름("닭 전염성기관지염바이러스", "A/Chicken/...")은 닭 알러지와 무관"""
+        assert corpus.check_allergies(["닭"]) == []
+        assert corpus.check_allergies(["chicken"]) == []
+        assert corpus.check_allergies(["돼지고기"]) == []
+
+    def test_real_allergen_matches(self, corpus):
+        conflicts = {c.product_name: c.ingredients for c in corpus.check_allergies(["우유"])}
+        assert conflicts["요드퀴놀"] == ["Casein"]
+        assert conflicts["플로론 프리믹스"] == ["유당수화물(Lactose Monohydrate, EP)"]
+        amoxicillin = {c.product_name: c.ingredients for c in corpus.check_allergies(["페니실린 알러지"])}
+        assert "아목시실린수화물(Amoxycillin hydrate,KP;역가)" in amoxicillin["아목실수용산"]
+
+
+    def test_substring_lookup_matches_full_scan(self, corpus):
+        """2-gram 후보로 찾은 부분 일치 결과가 어휘 전체 비교 결과와 같음"""
+        for index in (corpus._ingredient_index, corpus._indication_index):
+            for term in ("닭", "아목시", "casein", "유당", "피부염", "설사", "염", "없는성분"):
+                expected = set()
+                for token, products in index.postings.items():
+                    if term in token:
+                        expected |= products
+                assert index.containing(term) == expected
+
+
+class TestAllergyCheckUsage:
+
+    def test_chatbot_flags_pet_medications_and_mentioned_products(self, index):
+        from app.services.dailycare.care_chatbot_service import CareChatbotService
+
+        records = {
+            "allergy": [SimpleNamespace(allergen="닭고기"), SimpleNamespace(allergen="페니실린")],
+            "medication": [SimpleNamespace(medication_name="아목시 정")],
+        }
+        with patch("app.services.dailycare.care_chatbot_service.get_medication_index", return_value=index):
+            conflicts = CareChatbotService.find_allergy_conflicts(records, "뿌치츄어블 같이 먹여도 돼?")
+            assert CareChatbotService.find_allergy_conflicts({"allergy": [], "medication": []}, "뿌치츄어블") == []
+
+        assert {(c.allergen, c.document_id) for c in conflicts} == {("닭고기", "med_2"), ("페니실린", "med_1")}
+        prompt = CareChatbotService.build_enhanced_prompt(
+            "질문", "기록", "자료", CareChatbotService.summarize_allergy_conflicts(conflicts)
+        )
+        assert "알러지 주의" in prompt and "뿌치츄어블(치킨향, 수출용)" in prompt
+
+    def test_allergy_check_endpoint(self, index):
+        from flask import Flask
+        from app.routes.dailycare.dailycare_api import dailycare_api_bp
+
+        # 성분 표기가 없는 제품은 안전 목록이 아닌 미확인 목록으로
+        index.add_item({"id": "med_4", "text": "제품명: 구충 샴푸\\n\\n효능효과: 개의 구충 보조", "metadata": {"product_name": "구충 샴푸"}})
+        app = Flask(__name__)
+        app.register_blueprint(dailycare_api_bp, url_prefix="/api/dailycares")
+        with patch("app.routes.dailycare.dailycare_api.get_medication_index", return_value=index), \
+                patch("app.routes.dailycare.dailycare_api.MedicalCareService") as service:
+            service.get_allergy_pet.return_value = [SimpleNamespace(allergen="닭")]
+            service.get_medications_by_pet.return_value = [SimpleNamespace(medication_name="뿌치츄어블")]
+            response = app.test_client().get("/api/dailycares/allergy-check/1?indication=구충")
+
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data["checked_products"] == ["뿌치츄어블(치킨향, 수출용)"]
+        assert [c["document_id"] for c in data["conflicts"]] == ["med_2"]
+        assert data["safe_products"] == []
+        assert data["unverified_products"] == ["구충 샴푸"]
@@ -0,0 +1,84 @@
+import pytest
+import sys
+import os
+import json
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare.near_duplicates import NearDuplicateDetector, collapse_near_duplicate_chunks, shingles, jaccard
+from app.services.dailycare.index_manifest import chunk_content_hash
+
+
+BODY = "효능효과: 개의 외부기생충(벼룩, 진드기) 구제. 용법용량: 체중 10kg당 1회 1포를 목덜미에 도포한다. 주의사항: 눈에 들어가지 않게 할 것."
+
+
+def make_chunk(chunk_id, name, text, species="dog", company="펫제약"):
+    metadata = {
+        "document_id": chunk_id, "product_name": name, "company": company, "chunk_index": 0,
+        "species": species, "species_dog": species in ("dog", "common"), "species_cat": species in ("cat", "common"),
+    }
+    return {"id": chunk_id, "text": text, "metadata": metadata, "hash": chunk_content_hash(text, metadata)}
+
+
+class TestNearDuplicateDetector:
+
+    @pytest.fixture
+    def detector(self):
+        return NearDuplicateDetector(threshold=0.85)
+
+    def test_shingles_normalize_whitespace(self):
+        """공백/줄바꿈/대소문자 차이는 무시"""
+        assert shingles("Pet  Guard\n정") == shingles("pet guard 정")
+        assert jaccard(set(), set()) == 1.0
+
+    def test_clusters_near_duplicates(self, detector):
+        """제품명만 다른 본문은 묶고 다른 본문은 제외"""
+        texts = [f"펫가드 라벤더향 {BODY}", "고양이 회충 구제용 정제, 체중 1kg당 1정 경구투여", f"펫가드 자몽향 {BODY}"]
+        assert detector.clusters(texts) == [[0, 2]]
+
+    def test_block_keys_separate_groups(self, detector):
+        """block key가 다르면 같은 본문이라도 묶지 않음"""
+        texts = [BODY, BODY, BODY]
+        assert detector.clusters(texts, ["dog", "cat", "dog"]) == [[0, 2]]
+
+
+class TestCollapseNearDuplicateChunks:
+
+    def test_canonical_chunk_keeps_variants(self):
+        """첫 청크가 대표가 되고 다른 제품명/ID를 메타데이터와 본문에 보존"""
+        chunks = [
+            make_chunk("a", "펫가드 라벤더향", f"펫가드 라벤더향 {BODY}"),
+            make_chunk("b", "펫가드 자몽향", f"펫가드 자몽향 {BODY}"),
+            make_chunk("c", "펫가드 플러스", f"펫가드 플러스 {BODY}", company="다른제약"),
+        ]
+        collapsed = collapse_near_duplicate_chunks(chunks, NearDuplicateDetector(), chunk_content_hash)
+
+        assert [chunk["id"] for chunk in collapsed] == ["a", "c"]
+        canonical = collapsed[0]
+        assert json.loads(canonical["metadata"]["variant_document_ids"]) == ["a", "b"]
+        assert json.loads(canonical["metadata"]["variant_product_names"]) == ["펫가드 라벤더향", "펫가드 자몽향"]
+        assert canonical["metadata"]["variant_count"] == 2
+        assert canonical["text"].endswith("유사 제품: 펫가드 자몽향")
+        assert canonical["hash"] == chunk_content_hash(canonical["text"], canonical["metadata"])
+        assert collapsed[1] is chunks[2]
+        assert canonical["metadata"]["species"] == "dog"
+
+    def test_species_variants_are_collapsed_into_common(self):
+        """강아지용/고양이용만 다른 제품은 하나로 합치고 두 종 모두에서 검색되게 common으로"""
+        chunks = [
+            make_chunk("dog", "펫가드 스팟온 강아지용", f"펫가드 스팟온 강아지용 {BODY}"),
+            make_chunk("cat", "펫가드 스팟온 고양이용", f"펫가드 스팟온 고양이용 {BODY}", species="cat"),
+        ]
+        collapsed = collapse_near_duplicate_chunks(chunks, NearDuplicateDetector(), chunk_content_hash)
+
+        assert [chunk["id"] for chunk in collapsed] == ["dog"]
+        metadata = collapsed[0]["metadata"]
+        assert metadata["species"] == "common"
+        assert metadata["species_dog"] and metadata["species_cat"]
+        assert json.loads(metadata["variant_document_ids"]) == ["dog", "cat"]
+        assert chunks[0]["metadata"]["species"] == "dog"
+
+    def test_no_duplicates_is_identity(self):
+        chunks = [make_chunk("a", "A", f"가 {BODY}"), make_chunk("b", "B", "전혀 다른 제품 설명입니다")]
+        assert collapse_near_duplicate_chunks(chunks, NearDuplicateDetector(), chunk_content_hash) == chunks
@@ -0,0 +1,83 @@
+import pytest
+import sys
+import os
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from app.services.dailycare.aho_corasick import AhoCorasick
+from app.services.dailycare.product_name_index import ProductNameIndex, name_keys, normalize_name
+
+
+class TestAhoCorasick:
+
+    def test_finds_overlapping_patterns(self):
+        automaton = AhoCorasick([("he", 1), ("she", 2), ("his", 3), ("hers", 4)]).build()
+        assert sorted(automaton.iter_matches("ushers")) == [(1, 4, 2), (2, 4, 1), (2, 6, 4)]
+
+    def test_longest_matches_prefers_leftmost_longest(self):
+        """겹치면 왼쪽, 같은 위치면 긴 패턴"""
+        automaton = AhoCorasick([("하트", "a"), ("하트케어", "b"), ("케어정", "c")])
+        assert automaton.longest_matches("하트케어정") == [(0, 4, ["b"])]
+
+    def test_rebuild_after_add(self):
+        automaton = AhoCorasick([("abc", 1)]).build()
+        automaton.add("bc", 2)
+        assert sorted(value for _, _, value in automaton.iter_matches("abc")) == [1, 2]
+
+
+class TestProductNameIndex:
+
+    @pytest.fixture
+    def index(self):
+        index = ProductNameIndex(max_products=2)
+        docs = {
+            "med_1": Document(
+                page_content="제품명: 하트케어 정\\n영문명: Heartcare Tablet\\n제조업체: 펫제약",
+                metadata={"product_name": "하트케어 정", "company": "펫제약", "chunk_index": 0},
+            ),
+            "med_2": Document(
+                page_content="제품명: 솔렌시아 주(Frunevetmab)\\n영문명: SOLENSIA",
+                metadata={"product_name": "솔렌시아 주(Frunevetmab)", "chunk_index": 0},
+            ),
+            "med_3": Document(page_content="제품명: DHP 백신", metadata={"product_name": "DHP 백신", "chunk_index": 0}),
+        }
+        # 같은 브랜드 제품이 max_products보다 많으면 브랜드만으로는 찾지 않음
+        for i, variant in enumerate(["라벤더", "자몽", "레몬"]):
+            docs[f"shampoo_{i}"] = Document(
+                page_content=f"제품명: 골드메달 {variant} 샴푸",
+                metadata={"product_name": f"골드메달 {variant} 샴푸", "chunk_index": 0},
+            )
+        index.add_documents(list(docs), list(docs.values()))
+        return index
+
+    def test_name_keys(self):
+        assert name_keys("솔렌시아 주(Frunevetmab)") == {"솔렌시아주frunevetmab", "솔렌시아주", "솔렌시아"}
+        assert normalize_name("SR-3 주사액") == "sr3주사액"
+
+    def test_matches_brand_base_and_english_name(self, index):
+        """브랜드/제형을 뺀 이름/영문명으로 언급해도 찾음"""
+        assert [m.chunk_ids for m in index.match("하트케어 먹여도 돼?")] == [["med_1"]]
+        assert [m.chunk_ids for m in index.match("솔렌시아 부작용")] == [["med_2"]]
+        assert [m.chunk_ids for m in index.match("heartcare 용량")] == [["med_1"]]
+
+    def test_generic_questions_do_not_match(self, index):
+        assert index.match("강아지 예방접종 시기") == []
+        assert index.match("골드메달 샴푸 어떻게 써?") == []
+
+    def test_ascii_keys_respect_word_boundary(self, index):
+        """영문 키는 더 긴 영문 단어의 일부면 무시 (DHP ⊂ DHPPL)"""
+        assert index.match("DHPPL 백신 접종") == []
+        assert [m.chunk_ids for m in index.match("DHP 백신 접종")] == [["med_3"]]
+
+    def test_variant_names_and_removal(self, index):
+        """준중복 통합 청크는 다른 제품명으로도 찾고, 삭제하면 찾지 않음"""
+        index.add_documents(["med_4"], [Document(
+            page_content="제품명: 펫가드 라벤더향",
+            metadata={"product_name": "펫가드 라벤더향", "variant_product_names": '["펫가드 라벤더향", "펫가드 자몽향"]'},
+        )])
+        assert [m.chunk_ids for m in index.match("펫가드 자몽향 사용법")] == [["med_4"]]
+
+        index.remove_documents(["med_4"])
+        assert index.match("펫가드 자몽향 사용법") == []
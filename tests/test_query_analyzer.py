@@ -0,0 +1,76 @@
+import pytest
+import sys
+import os
+import json
+from types import SimpleNamespace
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from app.services.dailycare.query_analyzer import QueryAnalyzer, analyze_query
+from app.services.dailycare.product_name_index import ProductNameIndex
+
+
+DOG = {"pet": {"species_name": "강아지"}}
+
+
+class TestQueryAnalyzer:
+
+    def test_scan_collects_intents_in_one_pass(self):
+        """띄어쓰기/대소문자 차이와 무관하게 의도별 어휘 탐지"""
+        analysis = analyze_query("예방 접종 후 산책해도 되나요? Vaccine 부작용", DOG)
+        assert {"vaccine", "general", "medication", "topic_exercise"} <= analysis.intents
+        assert analysis.matched_terms["vaccine"] == ["예방접종", "접종", "vaccine"]
+
+    def test_routing_rules(self):
+        """의약품 의도 → 의약품 우선 / 질병·복용약 기록만 있으면 일반 관리 의도가 없을 때만 의약품"""
+        history = {**DOG, "medication": [SimpleNamespace(medication_name="하트케어")]}
+        assert analyze_query("피부병 치료 방법", DOG).collections == ['medications', 'general_guides']
+        assert analyze_query("요즘 기운이 없어요", history).collections == ['medications', 'general_guides']
+        assert analyze_query("사료 바꾸는 법", history).collections == ['general_guides']
+        assert analyze_query("사료 바꾸는 법", DOG).collections == ['general_guides']
+
+    def test_filters_and_partitions(self):
+        analysis = analyze_query("백신 맞는 시기", {"pet": {"species_name": "고양이"}})
+        assert analysis.where == {"$and": [
+            {"species_cat": True}, {"$or": [{"is_medication": False}, {"topic_vaccine": True}]},
+        ]}
+        assert analysis.partitions == ["cat", "common"]
+        assert analyze_query("산책 시간", DOG).where == {"species_dog": True}
+        assert analyze_query("산책 시간").where == {}
+
+    def test_custom_lexicons_and_rules_are_data(self):
+        analyzer = QueryAnalyzer(
+            lexicons={"emergency": ["응급", "중독"]},
+            routing_rules=[{"intents": {"emergency"}, "collections": ["medications"]}],
+            intent_filters={"emergency": {"topic_emergency": True}},
+        )
+        analysis = analyzer.analyze("초콜릿 중독 응급 처치")
+        assert analysis.collections == ["medications"]
+        assert analysis.where == {"topic_emergency": True}
+        assert analyzer.analyze("산책").collections == ["general_guides"]
+
+    def test_product_matches(self):
+        index = ProductNameIndex()
+        index.add_documents(["med_1"], [Document(page_content="제품명: 하트케어 정", metadata={"product_name": "하트케어 정"})])
+        analysis = analyze_query("하트케어 먹여도 돼?", DOG, index)
+        assert analysis.product_names == ["하트케어 정"]
+        assert analysis.product_matches[0].chunk_ids == ["med_1"]
+
+    def test_product_name_question_routes_to_medications(self):
+        """의약품 어휘 없이 제품명만 물어도 의약품 콜렉션 포함 (실제 수집 문서)"""
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "storage", "documents", "processed_medications",
+                            "medicine_data_fixed(401-730)_batch_5249.json")
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+        index = ProductNameIndex()
+        index.add_documents([item["id"] for item in items],
+                            [Document(page_content=item["text"], metadata=item["metadata"]) for item in items])
+
+        analysis = analyze_query("토탈라이프 샴푸 용법 알려줘", DOG, index)
+        assert "토탈라이프 애견용 투인원 샴푸 앤 린스" in analysis.product_names
+        assert "medication" not in analysis.intents
+        assert analysis.collections == ['medications', 'general_guides']
+        assert analyze_query("토탈라이프 샴푸 용법 알려줘", DOG).collections == ['general_guides']
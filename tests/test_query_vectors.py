@@ -0,0 +1,68 @@
+import pytest
+import sys
+import os
+
+import numpy as np
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import Embeddings
+from app.services.dailycare.query_vectors import QueryVectorCache, normalize_question
+
+
+class CountingEmbeddings(Embeddings):
+    """텍스트별로 고정된 벡터를 돌려주고 호출 횟수를 기록"""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        rng = np.random.default_rng(sum(map(ord, text)))
+        return rng.normal(size=8).tolist()
+
+
+@pytest.fixture
+def embedding():
+    return CountingEmbeddings()
+
+
+class TestQueryVectorCache:
+
+    def test_normalize_question(self):
+        assert normalize_question("  강아지   예방접종  시기?? ") == "강아지 예방접종 시기"
+        assert normalize_question("DHPPL 언제 맞아요?") == normalize_question("dhppl 언제 맞아요")
+
+    def test_same_question_is_embedded_once_across_pets(self, embedding):
+        """질문 벡터는 반려동물과 무관하게 정규화된 질문별로 재사용"""
+        cache = QueryVectorCache(embedding.embed_query, pet_weight=0.2)
+        cache.combine("강아지 예방접종 시기?", 1, "강아지 말티즈 3살")
+        cache.combine("강아지 예방접종  시기", 2, "강아지 푸들 5살")
+        cache.combine("강아지 예방접종 시기", 1, "강아지 말티즈 3살")
+        assert embedding.calls == ["강아지 예방접종 시기", "강아지 말티즈 3살", "강아지 푸들 5살"]
+
+    def test_pet_vector_is_reembedded_when_profile_changes(self, embedding):
+        """명시적 무효화 없이 프로필 해시가 바뀌면 다시 임베딩 (반려동물별 최신 프로필 1개만 유지)"""
+        cache = QueryVectorCache(embedding.embed_query, max_pets=1)
+        first = cache.pet_vector(1, "강아지 3kg")
+        assert cache.pet_vector(1, "강아지 3kg") is first
+        changed = cache.pet_vector(1, "강아지 3kg 알러지: 닭고기")
+        assert cache.pet_vector(1, "강아지 3kg 알러지: 닭고기") is changed
+        cache.pet_vector(1, "강아지 3kg")
+        assert embedding.calls == ["강아지 3kg", "강아지 3kg 알러지: 닭고기", "강아지 3kg"]
+        assert cache.pet_vector(1, "") is None
+
+    def test_combine_weights_unit_vectors(self, embedding):
+        cache = QueryVectorCache(embedding.embed_query)
+        question = cache.question_vector("구충제 용법")
+        pet = cache.pet_vector(None, "고양이 노령")
+
+        assert np.allclose(cache.combine("구충제 용법", None, "고양이 노령", weight=0), question)
+        combined = np.array(cache.combine("구충제 용법", None, "고양이 노령", weight=0.3))
+        expected = 0.7 * question + 0.3 * pet
+        assert np.isclose(np.linalg.norm(combined), 1.0, atol=1e-5)
+        assert np.allclose(combined, expected / np.linalg.norm(expected), atol=1e-5)
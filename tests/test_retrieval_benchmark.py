@@ -0,0 +1,51 @@
+import pytest
+import sys
+import os
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+from benchmarks.retrieval_benchmark import score_query, percentiles, load_golden_set
+from pathlib import Path
+
+
+class TestRetrievalBenchmark:
+
+    def test_score_query(self):
+        """recall@k 분모는 min(정답 수, k), MRR은 첫 정답 순위 기준"""
+        docs = [
+            Document(page_content="a", metadata={"source_file": "other.md"}),
+            Document(page_content="b", metadata={"source_file": "cat_healthcare.md"}),
+            Document(page_content="c", metadata={"document_id": "med_1"}),
+        ]
+        expected = {"source_files": ["cat_healthcare.md"], "document_ids": ["med_1", "med_2", "med_3"]}
+
+        recall, reciprocal_rank, first_rank = score_query(docs, expected, k=2)
+        assert recall == 0.5
+        assert reciprocal_rank == 0.5
+        assert first_rank == 2
+
+    def test_score_query_credits_collapsed_variants(self):
+        """준중복 통합된 대표 청크는 변형 제품 ID도 정답으로 인정"""
+        docs = [Document(page_content="a", metadata={"document_id": "med_1", "variant_document_ids": '["med_1", "med_2"]'})]
+        expected = {"document_ids": ["med_2", "med_3"]}
+
+        recall, _, first_rank = score_query(docs, expected, k=5)
+        assert recall == 0.5
+        assert first_rank == 1
+
+    def test_percentiles(self):
+        result = percentiles([float(i) for i in range(1, 101)])
+        assert result["p50"] == 50.5
+        assert result["p99"] > result["p95"] > result["p50"]
+
+    def test_golden_set_is_well_formed(self):
+        golden_set = load_golden_set(Path(__file__).parent.parent / "benchmarks" / "golden_set.json")
+        assert golden_set
+        for item in golden_set:
+            assert item["query"] and item["expected"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
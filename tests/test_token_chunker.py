@@ -0,0 +1,54 @@
+import pytest
+import sys
+import os
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare.token_chunker import TokenChunker
+
+
+def word_count(text):
+    return len(text.split())
+
+
+class TestTokenChunker:
+
+    @pytest.fixture
+    def chunker(self):
+        return TokenChunker(max_tokens=10, overlap_tokens=5, token_counter=word_count)
+
+    def test_short_text_is_single_chunk(self, chunker):
+        assert chunker.split("  강아지 예방접종 일정  ") == [("강아지 예방접종 일정", 3)]
+        assert chunker.split("   ") == []
+
+    def test_chunks_are_capped_and_overlap_by_sentence(self, chunker):
+        """문장 경계로 상한 이하 청크를 만들고 앞 청크의 마지막 문장을 겹침"""
+        sentences = [f"문장 {i} 은 다섯 단어." for i in range(6)]
+        chunks = chunker.split(" ".join(sentences))
+
+        assert all(tokens <= 10 for _, tokens in chunks)
+        assert chunks[0][0] == " ".join(sentences[:2])
+        # 두 번째 청크는 첫 청크의 마지막 문장(5 토큰)으로 시작
+        assert chunks[1][0].startswith(sentences[1])
+        assert chunks[-1][0].endswith(sentences[-1])
+
+    def test_long_sentence_falls_back_to_words(self, chunker):
+        """한 문장이 상한을 넘으면 단어 단위로 나눔"""
+        text = " ".join(f"w{i}" for i in range(25))
+        chunks = chunker.split(text)
+
+        assert all(tokens <= 10 for _, tokens in chunks)
+        assert chunks[0][0].split()[0] == "w0" and chunks[-1][0].split()[-1] == "w24"
+
+    def test_long_word_falls_back_to_characters(self):
+        """공백 없는 긴 문자열은 글자 단위로 자름 (글자 수 = 토큰 수)"""
+        chunker = TokenChunker(max_tokens=8, overlap_tokens=0, token_counter=len)
+        chunks = chunker.split("가" * 30)
+
+        assert "".join(text for text, _ in chunks) == "가" * 30
+        assert all(tokens <= 8 for _, tokens in chunks)
+
+    def test_invalid_overlap(self):
+        with pytest.raises(ValueError):
+            TokenChunker(max_tokens=10, overlap_tokens=10, token_counter=len)
@@ -0,0 +1,221 @@
+import pytest
+import sys
+import os
+import numpy as np
+from unittest.mock import patch
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare.vector_backends import NumpyCollection, where_mask, _column_array
+from app.services.dailycare.keyword_index import matches_where
+from app.services.dailycare.quantization import quantize_int8, dequantize_int8, approximate_dot
+
+
+def make_rows(count, dimensions=8, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, dimensions)).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(count)]
+    documents = [f"문서 {i}" for i in range(count)]
+    metadatas = [
+        {"species": ["dog", "cat", "common"][i % 3], "species_dog": i % 3 != 1, "topic_vaccine": i % 4 == 0}
+        for i in range(count)
+    ]
+    return ids, documents, metadatas, vectors
+
+
+class TestNumpyCollection:
+
+    @pytest.fixture
+    def collection(self, tmp_path):
+        return NumpyCollection(tmp_path / "guides_dog")
+
+    def test_search_matches_brute_force(self, collection):
+        """top-k 결과와 거리가 전수 계산한 제곱 L2 거리와 일치"""
+        ids, documents, metadatas, vectors = make_rows(50)
+        collection.upsert(ids, documents, metadatas, vectors.tolist())
+        query = vectors[7] + 0.01
+
+        results = collection.similarity_search_by_vector_with_relevance_scores(query.tolist(), k=5)
+
+        expected = np.argsort(((vectors - query) ** 2).sum(axis=1))[:5]
+        assert [doc.id for doc, _ in results] == [ids[i] for i in expected]
+        assert results[0][0].id == "chunk-7"
+        assert results[0][1] == pytest.approx(float(((vectors[7] - query) ** 2).sum()), abs=1e-4)
+
+    def test_filter_mask(self, collection):
+        """where 필터를 만족하는 행만 반환"""
+        ids, documents, metadatas, vectors = make_rows(30)
+        collection.upsert(ids, documents, metadatas, vectors.tolist())
+
+        where = {"$and": [{"species_dog": True}, {"$or": [{"topic_vaccine": True}, {"species": "common"}]}]}
+        results = collection.similarity_search_by_vector_with_relevance_scores(vectors[0].tolist(), k=30, filter=where)
+
+        assert results
+        assert all(matches_where(doc.metadata, where) for doc, _ in results)
+        assert len(results) == sum(matches_where(metadata, where) for metadata in metadatas)
+
+    def test_flush_persists_and_reopens_as_mmap(self, collection, tmp_path):
+        """flush 후 다른 인스턴스(워커)에서 mmap으로 열림"""
+        ids, documents, metadatas, vectors = make_rows(10)
+        collection.upsert(ids, documents, metadatas, vectors.tolist())
+        assert NumpyCollection(tmp_path / "guides_dog").count() == 0
+
+        collection.flush()
+        reopened = NumpyCollection(tmp_path / "guides_dog")
+        assert reopened.count() == 10
+        assert isinstance(reopened._segment.matrix, np.memmap)
+        assert reopened.get_page(2, 3)[0] == ["chunk-3", "chunk-4"]
+        assert reopened.get_page(2, 3)[2][0] == metadatas[3]
+
+    def test_upsert_replaces_and_delete(self, collection, tmp_path):
+        """같은 ID는 덮어쓰고, 삭제 후 다른 인스턴스도 변경을 다시 로드"""
+        ids, documents, metadatas, vectors = make_rows(6)
+        collection.upsert(ids, documents, metadatas, vectors.tolist())
+        collection.flush()
+        reader = NumpyCollection(tmp_path / "guides_dog")
+
+        collection.upsert(["chunk-2"], ["수정된 문서"], [{"species": "cat"}], [vectors[5].tolist()])
+        collection.delete(["chunk-0", "missing"])
+        collection.flush()
+
+        assert reader.count() == 5
+        hit, distance = reader.similarity_search_by_vector_with_relevance_scores(vectors[5].tolist(), k=2)[0]
+        assert hit.id in ("chunk-2", "chunk-5") and distance == pytest.approx(0.0, abs=1e-4)
+        page = dict(zip(*reader.get_page(10, 0)[:2]))
+        assert page["chunk-2"] == "수정된 문서"
+        assert "chunk-0" not in page
+        assert len(list((tmp_path / "guides_dog").glob("embeddings.*.npy"))) == 1
+
+    def test_int8_candidates_are_rescored_exactly(self, tmp_path):
+        """int8 근사로 후보를 고르고 float32로 재계산 → float32 전수 검색과 같은 결과"""
+        ids, documents, metadatas, vectors = make_rows(500, dimensions=64, seed=1)
+        exact = NumpyCollection(tmp_path / "exact", quantization="none")
+        quantized = NumpyCollection(tmp_path / "int8", quantization="int8")
+        for collection in (exact, quantized):
+            collection.upsert(ids, documents, metadatas, vectors.tolist())
+            collection.flush()
+
+        reopened = NumpyCollection(tmp_path / "int8", quantization="int8")
+        assert reopened._segment.codes.dtype == np.int8
+        assert reopened._segment.codes.nbytes * 4 == reopened._segment.matrix.nbytes
+
+        for query in vectors[:20] + 0.05:
+            expected = exact.similarity_search_by_vector_with_relevance_scores(query.tolist(), k=5, filter={"species_dog": True})
+            actual = reopened.similarity_search_by_vector_with_relevance_scores(query.tolist(), k=5, filter={"species_dog": True})
+            assert [doc.id for doc, _ in actual] == [doc.id for doc, _ in expected]
+            assert [score for _, score in actual] == pytest.approx([score for _, score in expected], rel=1e-4)
+
+    def test_unquantized_generation_opens_as_int8(self, tmp_path):
+        """float32로 저장된 콜렉션도 int8 설정으로 열면 코드를 계산해 사용"""
+        ids, documents, metadatas, vectors = make_rows(20)
+        writer = NumpyCollection(tmp_path / "guides", quantization="none")
+        writer.upsert(ids, documents, metadatas, vectors.tolist())
+        writer.flush()
+
+        reader = NumpyCollection(tmp_path / "guides", quantization="int8")
+        assert reader._segment.codes is not None
+        assert reader.similarity_search_by_vector_with_relevance_scores(vectors[3].tolist(), k=1)[0][0].id == "chunk-3"
+
+    def test_batched_upserts_only_quantize_new_rows(self, tmp_path):
+        """배치 upsert는 버퍼에 이어 붙이고 이번 배치 행만 양자화 (기존 행 재계산 없음)"""
+        ids, documents, metadatas, vectors = make_rows(300)
+        collection = NumpyCollection(tmp_path / "guides_dog")
+        quantized_rows = []
+        real_quantize = quantize_int8
+
+        def counting_quantize(matrix):
+            quantized_rows.append(len(matrix))
+            return real_quantize(matrix)
+
+        with patch("app.services.dailycare.vector_backends.quantize_int8", side_effect=counting_quantize):
+            buffers = set()
+            for start in range(0, 300, 50):
+                collection.upsert(ids[start:start + 50], documents[start:start + 50],
+                                  metadatas[start:start + 50], vectors[start:start + 50].tolist())
+                buffers.add(id(collection._rows.matrix))
+            collection.upsert(["chunk-3"], ["수정"], [{"species": "cat"}], [vectors[0].tolist()])
+
+        assert quantized_rows == [50] * 6 + [1]
+        # 용량을 2배씩 늘리므로 재할당은 로그 횟수
+        assert len(buffers) <= 4
+        assert collection.count() == 300
+        hit, distance = collection.similarity_search_by_vector_with_relevance_scores(vectors[0].tolist(), k=2)[0]
+        assert hit.id in ("chunk-0", "chunk-3") and distance == pytest.approx(0.0, abs=1e-2)
+        assert collection.similarity_search_by_vector_with_relevance_scores(
+            vectors[0].tolist(), k=300, filter={"species": "cat"})[0][0].id == "chunk-3"
+
+    def test_appends_are_invisible_to_earlier_snapshots(self, collection):
+        """검색 중인 이전 스냅샷은 이후 추가된 행을 보지 않음"""
+        ids, documents, metadatas, vectors = make_rows(20)
+        collection.upsert(ids[:10], documents[:10], metadatas[:10], vectors[:10].tolist())
+        snapshot = collection._segment
+        collection.upsert(ids[10:], documents[10:], metadatas[10:], vectors[10:].tolist())
+
+        assert snapshot.size == 10 and len(snapshot.matrix) == 10
+        assert all(len(column) == 10 for column in snapshot.columns.values())
+        assert collection.count() == 20
+        collection.flush()
+        assert NumpyCollection(collection.directory).get_page(30, 0)[0] == ids
+
+    def test_dimension_mismatch_is_rejected(self, collection):
+        collection.upsert(["a"], ["a"], [{}], [[0.1, 0.2]])
+        with pytest.raises(ValueError):
+            collection.upsert(["b"], ["b"], [{}], [[0.1, 0.2, 0.3]])
+
+    def test_delete_collection(self, collection, tmp_path):
+        ids, documents, metadatas, vectors = make_rows(3)
+        collection.upsert(ids, documents, metadatas, vectors.tolist())
+        collection.flush()
+        collection.delete_collection()
+        assert collection.count() == 0
+        assert not (tmp_path / "guides_dog").exists()
+
+
+class TestWhereMask:
+
+    def test_matches_keyword_index_semantics(self):
+        """where_mask는 matches_where와 같은 결과"""
+        metadatas = [
+            {"species": "dog", "species_dog": True, "is_medication": False},
+            {"species": "cat", "species_dog": False, "is_medication": True, "topic_vaccine": True},
+            {"species": "common", "species_dog": True, "is_medication": True},
+            {"species": "dog", "species_dog": True},
+        ]
+        keys = {key for metadata in metadatas for key in metadata}
+        columns = {key: _column_array([metadata.get(key) for metadata in metadatas]) for key in keys}
+
+        filters = [
+            {"species_dog": True},
+            {"species": {"$in": ["cat", "common"]}},
+            {"species": {"$ne": "dog"}},
+            {"$or": [{"is_medication": False}, {"topic_vaccine": True}]},
+            {"$and": [{"species_dog": True}, {"is_medication": {"$eq": True}}]},
+            {"unknown_key": "x"},
+        ]
+        for where in filters:
+            expected = [matches_where(metadata, where) for metadata in metadatas]
+            assert where_mask(columns, where, len(metadatas)).tolist() == expected, where
+
+
+class TestQuantization:
+
+    def test_round_trip_error_is_bounded(self):
+        """복원 오차는 벡터별 양자화 간격의 절반 이내"""
+        vectors = np.random.default_rng(2).normal(size=(10, 128)).astype(np.float32)
+        codes, scales, offsets = quantize_int8(vectors)
+        restored = dequantize_int8(codes, scales, offsets)
+        assert codes.dtype == np.int8
+        assert np.all(np.abs(restored - vectors) <= scales[:, None] / 2 + 1e-6)
+
+    def test_approximate_dot(self):
+        vectors = np.random.default_rng(3).normal(size=(300, 64)).astype(np.float32)
+        query = vectors[0]
+        codes, scales, offsets = quantize_int8(vectors)
+        approx = approximate_dot(codes, scales, offsets, query, block_rows=64)
+        assert np.allclose(approx, dequantize_int8(codes, scales, offsets) @ query, atol=1e-3)
+        assert np.argmax(approx) == 0
+
+    def test_constant_vector(self):
+        codes, scales, offsets = quantize_int8(np.full((1, 4), 0.5, dtype=np.float32))
+        assert dequantize_int8(codes, scales, offsets) == pytest.approx(np.full((1, 4), 0.5))
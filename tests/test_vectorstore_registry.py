@@ -0,0 +1,75 @@
+import pytest
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+# 프로젝트 루트를 path에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.dailycare.vectorstore_registry import VectorStoreRegistry
+
+
+class SlowVectorStoreService:
+    """release 이벤트가 설정될 때까지 초기화가 끝나지 않는 가짜 서비스"""
+    instances = 0
+    release = threading.Event()
+    fail = False
+
+    def __init__(self):
+        SlowVectorStoreService.instances += 1
+
+    def initialize_vector_db(self):
+        SlowVectorStoreService.release.wait(5)
+        if SlowVectorStoreService.fail:
+            return {'general_guides': None, 'medications': None}
+        return {'general_guides': object(), 'medications': None}
+
+
+class TestVectorStoreRegistry:
+
+    @pytest.fixture(autouse=True)
+    def fake_service(self):
+        VectorStoreRegistry.reset()
+        SlowVectorStoreService.instances = 0
+        SlowVectorStoreService.release = threading.Event()
+        SlowVectorStoreService.fail = False
+        with patch('app.services.dailycare.vectorstore_service.VectorStoreService', SlowVectorStoreService), \
+             patch('app.services.dailycare.vectorstore_registry.Config') as mock_config:
+            mock_config.VECTOR_WARMUP_RETRY_SECONDS = 0
+            yield
+        SlowVectorStoreService.release.set()
+        VectorStoreRegistry.reset()
+
+    def test_single_flight_warmup(self):
+        """동시에 여러 번 요청해도 서비스는 한 번만 생성"""
+        assert VectorStoreRegistry.start_warmup()
+        assert not VectorStoreRegistry.start_warmup()
+        assert VectorStoreRegistry.get(timeout=0) is None
+        assert VectorStoreRegistry.status()["state"] == VectorStoreRegistry.STATE_WARMING
+
+        SlowVectorStoreService.release.set()
+        service = VectorStoreRegistry.get(timeout=5)
+        assert isinstance(service, SlowVectorStoreService)
+        assert SlowVectorStoreService.instances == 1
+        assert VectorStoreRegistry.status()["state"] == VectorStoreRegistry.STATE_READY
+
+    def test_failed_warmup_can_retry(self):
+        """초기화 실패 시 failed 상태, 이후 요청에서 재시도"""
+        SlowVectorStoreService.fail = True
+        SlowVectorStoreService.release.set()
+        assert VectorStoreRegistry.get(timeout=0.5) is None
+
+        for _ in range(50):
+            if VectorStoreRegistry.status()["state"] == VectorStoreRegistry.STATE_FAILED:
+                break
+            threading.Event().wait(0.05)
+        assert VectorStoreRegistry.status()["state"] == VectorStoreRegistry.STATE_FAILED
+
+        SlowVectorStoreService.fail = False
+        assert VectorStoreRegistry.get(timeout=5) is not None
+        assert SlowVectorStoreService.instances == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,12 +1,17 @@
 import pytest
+import json
+import hashlib
 import sys
 import os
+import threading
+import time
 from unittest.mock import Mock, patch, MagicMock
 
 # 프로젝트 루트를 path에 추가
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.dailycare.vectorstore_service import VectorStoreService
+from app.services.dailycare.index_manifest import BuildLock, ParsedChunkCache, file_sha256
 
 class TestVectorStoreService:
     
@@ -18,6 +23,7 @@ class TestVectorStoreService:
             mock_config.VECTOR_DB = "test_vectordb" 
             mock_config.COLLECTION_NAME = "test_collection"
             mock_config.OPENAI_API_KEY = "test_api_key"
+            mock_config.VECTOR_SEARCH_WORKERS = 2
             yield mock_config
     
     @pytest.fixture
@@ -73,5 +79,404 @@ metadata:
         result2 = service.parse_yaml_list('single_value')
         assert result2 == ["single_value"]
 
+class FakeEmbeddings:
+    """네트워크 없이 동작하는 결정적 임베딩"""
+
+    def __init__(self):
+        self.embedded_texts = []
+
+    def embed_documents(self, texts):
+        self.embedded_texts.extend(texts)
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text) % 13), float(sum(map(ord, text)) % 17), 1.0]
+
+
+class FakeEncoder:
+    def encode(self, text):
+        return text.split()
+
+
+class TestIncrementalReindex:
+
+    @pytest.fixture(params=["chroma", "numpy"])
+    def service(self, request, tmp_path):
+        docs_path = tmp_path / "documents"
+        (docs_path / "guide").mkdir(parents=True)
+        (docs_path / "guide" / "a.md").write_text("# 예방접종\n강아지 예방접종 일정\n\n## 사료\n사료 급여량", encoding="utf-8")
+        (docs_path / "guide" / "b.md").write_text("# 산책\n하루 두 번 산책", encoding="utf-8")
+
+        with patch('app.services.dailycare.vectorstore_service.Config') as mock_config, \
+             patch('app.services.dailycare.vectorstore_service.OpenAIEmbeddings'), \
+             patch('app.services.dailycare.token_chunker.tiktoken.get_encoding', return_value=FakeEncoder()):
+            mock_config.DOCUMENTS_PATH = str(docs_path)
+            mock_config.VECTOR_DB = str(tmp_path / "vector_db")
+            mock_config.VECTOR_BACKEND = request.param
+            mock_config.VECTOR_QUANTIZATION = "int8"
+            mock_config.EMBEDDING_CACHE_QUANTIZATION = "int8"
+            mock_config.EMBEDDING_CACHE_MAX_ENTRIES = 1000
+            mock_config.EMBEDDING_WORKERS = 2
+            mock_config.EMBEDDING_RPM = 10_000
+            mock_config.EMBEDDING_TPM = 1_000_000
+            mock_config.VECTOR_GC_GRACE_SECONDS = 0
+            mock_config.VECTOR_SEARCH_WORKERS = 2
+            mock_config.HYBRID_SEARCH_BUDGET_SECONDS = 5
+            mock_config.MEDICATION_DEDUP_THRESHOLD = 0.85
+            mock_config.MEDICATION_DEDUP_WINDOW = 256
+            mock_config.PARSE_WORKERS = 1
+            mock_config.CHUNK_MAX_TOKENS = 1000
+            mock_config.CHUNK_OVERLAP_TOKENS = 100
+            service = VectorStoreService()
+            service.embedding = FakeEmbeddings()
+            yield service
+
+    def test_only_changed_chunks_are_reindexed(self, service):
+        """변경된 파일의 변경된 청크만 다시 임베딩"""
+        store = service.sync_collection('general_guides')
+        assert store.count() == 3
+
+        service.embedding.embedded_texts.clear()
+        guide_dir = service.documents_path / "guide"
+        (guide_dir / "a.md").write_text("# 예방접종\n강아지 예방접종 일정\n\n## 사료\n사료 급여량 조절", encoding="utf-8")
+        (guide_dir / "b.md").unlink()
+        (guide_dir / "c.md").write_text("# 목욕\n한 달에 한 번", encoding="utf-8")
+
+        store = service.sync_collection('general_guides', store)
+        assert store.count() == 3
+        assert len(service.embedding.embedded_texts) == 2
+        sources = {doc.metadata["source_file"] for _, docs in store.iter_documents() for doc in docs}
+        assert sources == {"a.md", "c.md"}
+
+    def test_unchanged_corpus_is_noop(self, service):
+        """변경이 없으면 임베딩 호출 없음"""
+        store = service.sync_collection('general_guides')
+        service.embedding.embedded_texts.clear()
+        service.sync_collection('general_guides', store)
+        assert service.embedding.embedded_texts == []
+
+    def test_interrupted_sync_resumes_from_checkpoint(self, service):
+        """매니페스트 저장 전에 중단돼도 저장이 끝난 청크는 다시 임베딩하지 않음"""
+        store = service.sync_collection('general_guides')
+        guide_dir = service.documents_path / "guide"
+        (guide_dir / "a.md").write_text("# 예방접종\n강아지 예방접종 일정\n\n## 사료\n사료 급여량 조절", encoding="utf-8")
+        (guide_dir / "b.md").unlink()
+        (guide_dir / "c.md").write_text("# 목욕\n한 달에 한 번", encoding="utf-8")
+
+        # 임베딩/저장 후 삭제 단계에서 중단
+        with patch.object(service, '_delete_chunks', side_effect=RuntimeError("중단")):
+            with pytest.raises(RuntimeError):
+                service.sync_collection('general_guides', store)
+
+        plan = service.plan_collection('general_guides')
+        assert plan["total_chunks"] == 3
+        assert plan["resumed"] == 2
+        assert plan["embed_chunks"] == 0
+
+        service.embedding.embedded_texts.clear()
+        store = service.sync_collection('general_guides')
+        assert service.embedding.embedded_texts == []
+        assert store.count() == 3
+        assert not service._checkpoint(service.collections['general_guides']).exists
+
+    def test_sync_waits_for_build_lock(self, service):
+        """다른 프로세스(CLI 빌드 등)가 빌드 잠금을 잡고 있으면 끝날 때까지 동기화를 시작하지 않음"""
+        lock = BuildLock(service.vector_db / "manifests" / "mypetsvoice_general_guides.lock")
+        assert lock.acquire(blocking=False)
+        results = []
+        worker = threading.Thread(target=lambda: results.append(service.sync_collection('general_guides')))
+        worker.start()
+        worker.join(0.3)
+        assert worker.is_alive() and service.embedding.embedded_texts == []
+        assert not BuildLock(lock.path).acquire(blocking=False)
+
+        lock.release()
+        worker.join(10)
+        assert results[0].count() == 3
+
+    def test_plan_counts_chunks_to_embed(self, service):
+        """dry-run 계획: 새 콜렉션은 전체, 동기화 후에는 0개 임베딩"""
+        plan = service.plan_collection('general_guides')
+        assert plan["files"] == 2
+        assert plan["total_chunks"] == plan["embed_chunks"] == 3
+        assert plan["embed_tokens"] > 0
+
+        service.sync_collection('general_guides')
+        assert service.plan_collection('general_guides')["embed_chunks"] == 0
+
+    def test_multi_collection_search_embeds_query_once(self, service):
+        """여러 콜렉션 검색 시 쿼리 임베딩은 1회만 계산"""
+        store = service.sync_collection('general_guides')
+        service.stores['general_guides'] = store
+        service.stores['medications'] = store
+
+        with patch.object(service.embedding, 'embed_query', wraps=service.embedding.embed_query) as embed_query:
+            results = service.search_multi_collections("산책", ['medications', 'general_guides'], k=4)
+
+        assert embed_query.call_count == 1
+        assert len(results) == 4
+        assert {doc.metadata['source_collection'] for doc in results} == {'medications', 'general_guides'}
+
+    def test_search_results_do_not_mutate_shared_documents(self, service):
+        """검색 점수/콜렉션은 복사본에 기록 (백엔드가 공유하는 Document는 그대로)"""
+        from langchain_core.documents import Document
+
+        shared = Document(id="chunk-1", page_content="산책", metadata={"title": "산책"})
+        store = Mock()
+        store.similarity_search_by_vector_with_relevance_scores.return_value = [(shared, 0.1)]
+        with patch.object(service, '_search_targets', return_value=[('medications', store), ('general_guides', store)]):
+            results = service.search_multi_collections("산책", ['medications', 'general_guides'], k=2, query_embedding=[1.0])
+
+        assert shared.metadata == {"title": "산책"}
+        assert {doc.metadata['source_collection'] for doc in results} == {'medications', 'general_guides'}
+        assert all(doc.metadata['search_score'] == 0.1 and doc.id == "chunk-1" for doc in results)
+
+    def test_repeated_questions_reuse_cached_query_vector(self, service):
+        """정규화한 질문이 같으면 재임베딩하지 않고, 반려동물 프로필 벡터는 프로필이 같으면 재사용"""
+        service.stores['general_guides'] = service.sync_collection('general_guides')
+
+        with patch.object(service.embedding, 'embed_query', wraps=service.embedding.embed_query) as embed_query:
+            for question in ["산책 횟수?", "산책  횟수", "산책 횟수"]:
+                query_embedding = service.query_vectors.combine(question, 1, "강아지 말티즈 3살")
+                service.hybrid_search_multi_collections(question, ['general_guides'], k=3, query_embedding=query_embedding)
+                service.search_multi_collections(question, ['general_guides'], k=3)
+
+        assert [c.args[0] for c in embed_query.call_args_list] == ["산책 횟수", "강아지 말티즈 3살"]
+
+    def test_hybrid_search_fuses_by_chunk_id(self, service):
+        """벡터/키워드 결과를 청크 ID로 합쳐 중복 없이 RRF 순위로 반환"""
+        service.stores['general_guides'] = service.sync_collection('general_guides')
+
+        results = service.hybrid_search_multi_collections("산책", ['general_guides'], k=3)
+
+        ids = [doc.id for doc in results]
+        assert len(ids) == len(set(ids)) == 3
+        assert "산책" in results[0].page_content
+        assert 'keyword_score' in results[0].metadata and 'vector_score' in results[0].metadata
+        scores = [doc.metadata['rrf_score'] for doc in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_vector_budget_starts_after_query_embedding(self, service, caplog):
+        """임베딩이 느려도 벡터 검색은 자기 예산을 받고, 예산을 넘긴 검색은 로그로 남김"""
+        service.stores['general_guides'] = service.sync_collection('general_guides')
+        question_vector = service.query_vectors.question_vector
+
+        def slow_question_vector(query):
+            time.sleep(0.3)
+            return question_vector(query)
+
+        with patch.object(service.query_vectors, 'question_vector', side_effect=slow_question_vector):
+            results = service.hybrid_search_multi_collections("산책", ['general_guides'], k=3, budget_seconds=0.2)
+        assert 'vector_score' in results[0].metadata
+
+        search_targets = service._search_targets
+
+        def slow_targets(*args):
+            targets = []
+            for collection_type, store in search_targets(*args):
+                slow_store = Mock()
+                slow_store.similarity_search_by_vector_with_relevance_scores.side_effect = \
+                    lambda *a, store=store: time.sleep(0.3) or store.similarity_search_by_vector_with_relevance_scores(*a)
+                targets.append((collection_type, slow_store))
+            return targets
+
+        with patch.object(service, '_search_targets', side_effect=slow_targets), \
+                caplog.at_level("WARNING", logger="app.services.dailycare.vectorstore_service"):
+            results = service.hybrid_search_multi_collections("산책", ['general_guides'], k=3, budget_seconds=0.1)
+        assert results and all('vector_score' not in doc.metadata for doc in results)
+        assert "general_guides/vector" in caplog.text
+
+    def test_species_filter_is_applied(self, service):
+        """종 태그 필터가 벡터/키워드 검색 모두에 적용"""
+        service.stores['general_guides'] = service.sync_collection('general_guides')
+        where = {"species_cat": True}
+
+        vector_docs = service.search_multi_collections("예방접종", ['general_guides'], k=5, where=where)
+        hybrid_docs = service.hybrid_search_multi_collections("예방접종", ['general_guides'], k=5, where=where)
+
+        for doc in vector_docs + hybrid_docs:
+            assert doc.metadata["species_cat"] is True
+            assert "강아지" not in doc.page_content
+        assert vector_docs and hybrid_docs
+
+    def test_chunks_are_stored_in_species_partitions(self, service):
+        """청크는 species 태그별 파티션에 저장되고 파티션 지정 검색은 해당 파티션만 조회"""
+        (service.documents_path / "guide" / "cat.md").write_text("# 고양이 사료\n고양이 사료 급여량", encoding="utf-8")
+        store = service.sync_collection('general_guides')
+        service.stores['general_guides'] = store
+
+        assert store.count(['dog']) == 1
+        assert store.count(['cat']) == 1
+        assert store.count(['common']) == 2
+
+        docs = service.search_multi_collections("사료", ['general_guides'], k=10, partitions=['dog', 'common'])
+        assert docs and all(doc.metadata['species'] in ('dog', 'common') for doc in docs)
+        docs = service.hybrid_search_multi_collections("사료", ['general_guides'], k=10, partitions=['cat', 'common'])
+        assert docs and all(doc.metadata['species'] in ('cat', 'common') for doc in docs)
+
+    def test_blue_green_rebuild_swaps_alias(self, service):
+        """새 버전 콜렉션 검증 후 alias 교체, 이전 콜렉션은 정리"""
+        service.stores['general_guides'] = service.sync_collection('general_guides')
+        old_name = service._resolve_collection_name('general_guides')
+
+        assert service.rebuild_collection_blue_green('general_guides')
+        service.wait_for_gc()
+
+        new_name = service._resolve_collection_name('general_guides')
+        assert new_name == 'mypetsvoice_general_guides__v1'
+        assert service.stores['general_guides'].name == new_name
+        assert service.stores['general_guides'].count() == 3
+        assert service.keyword_search("산책", k=1, collection_type='general_guides')
+        remaining = [c.name for c in service._open_chroma(new_name)._client.list_collections()]
+        assert not [name for name in remaining if name.startswith(old_name + "_") and "__v" not in name]
+
+    def test_failed_validation_keeps_current_version(self, service):
+        """검증 실패 시 alias와 기존 콜렉션 유지"""
+        service.stores['general_guides'] = service.sync_collection('general_guides')
+        for path in (service.documents_path / "guide").iterdir():
+            path.unlink()
+
+        assert not service.rebuild_collection_blue_green('general_guides')
+        assert service.aliases.resolve('general_guides') is None
+        assert service.stores['general_guides'].count() == 3
+
+    def test_embedding_model_change_requires_migration(self, service, tmp_path):
+        """임베딩 차원이 바뀌면 기존 콜렉션에 섞지 않고, 마이그레이션으로 새 버전에 재색인"""
+        from app.services.dailycare.vectorstore_service import CachedOpenAIEmbeddings
+        from app.services.dailycare.embedding_providers import HashedNgramEmbeddingProvider
+
+        service.embedding = CachedOpenAIEmbeddings(HashedNgramEmbeddingProvider(dimensions=16), str(tmp_path / "cache"))
+        service.stores['general_guides'] = service.sync_collection('general_guides')
+        name = service._resolve_collection_name('general_guides')
+        assert service._manifest(name).load().embedding["dimensions"] == 16
+
+        service.embedding = CachedOpenAIEmbeddings(HashedNgramEmbeddingProvider(dimensions=32), str(tmp_path / "cache"))
+        assert service.sync_collection('general_guides') is None
+        assert service.pending_embedding_migrations() == {
+            'general_guides': {"provider": "local", "model": "hashed-char-ngram-2-4", "dimensions": 16}
+        }
+
+        assert service.rebuild_collection_blue_green('general_guides')
+        service.wait_for_gc()
+        new_name = service._resolve_collection_name('general_guides')
+        assert new_name != name
+        assert service._manifest(new_name).load().embedding["dimensions"] == 32
+        assert 'general_guides' not in service.pending_embedding_migrations()
+        assert service.search_multi_collections("산책", ['general_guides'], k=1)
+
+    def test_parallel_parsing_keeps_file_order(self, service, tmp_path):
+        """프로세스 풀 파싱은 직렬 파싱과 같은 순서/내용이고 토큰 수를 메타데이터에 기록"""
+        for i in range(4):
+            (service.documents_path / "guide" / f"extra_{i}.md").write_text(f"# 제목 {i}\n본문 {i}", encoding="utf-8")
+        files = {
+            service._relative_path(path): (path, file_sha256(path), path.stat())
+            for path in service._list_source_files('general_guides')
+        }
+        serial = list(service._iter_parsed_files('general_guides', files))
+
+        service.parsed_cache = ParsedChunkCache(tmp_path / "parsed_parallel")
+        with service._parse_pool(2) as pool:
+            parallel = list(service._iter_parsed_files('general_guides', files, pool, lookahead=1))
+
+        assert parallel == serial
+        assert [rel_path for rel_path, _ in parallel] == list(files)
+        assert all(chunk["metadata"]["token_count"] > 0 for _, chunks in parallel for chunk in chunks)
+
+    def test_process_pool_parsing_is_opt_in(self, service):
+        """웹 프로세스(기본값)는 직렬 파싱, CLI/배포 스크립트만 프로세스 풀 사용"""
+        with patch('app.services.dailycare.vectorstore_service.Config.PARSE_WORKERS', 4):
+            assert service._parse_workers(10) == 1
+            service.parallel_parse = True
+            assert service._parse_workers(10) == 4
+            assert service._parse_workers(2) == 2
+
+    def test_near_duplicate_medications_are_collapsed(self, service):
+        """향/색상만 다른 같은 제조사 제품은 대표 청크 1개로 통합, 다른 제품은 유지"""
+        body = "효능효과: 개의 외부기생충(벼룩, 진드기) 구제. 용법용량: 체중 10kg당 1회 1포를 목덜미에 도포한다. 주의사항: 눈에 들어가지 않게 할 것."
+        items = [
+            {"id": "med_a", "text": f"제품명: 펫가드 라벤더향\n{body}", "metadata": {"product_name": "펫가드 라벤더향", "company": "펫제약"}},
+            {"id": "med_b", "text": f"제품명: 펫가드 자몽향\n{body}", "metadata": {"product_name": "펫가드 자몽향", "company": "펫제약"}},
+            {"id": "med_c", "text": "제품명: 캣케어 정\n효능효과: 고양이 회충 구제. 용법용량: 체중 1kg당 1정 경구투여.", "metadata": {"product_name": "캣케어 정", "company": "펫제약"}},
+        ]
+        med_dir = service.documents_path / "med"
+        med_dir.mkdir()
+        (med_dir / "a.json").write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+
+        store = service.sync_collection('medications')
+        docs = {doc.metadata["document_id"]: doc for _, page in store.iter_documents() for doc in page}
+
+        assert set(docs) == {"med_a", "med_c"}
+        assert json.loads(docs["med_a"].metadata["variant_document_ids"]) == ["med_a", "med_b"]
+        assert "펫가드 자몽향" in docs["med_a"].page_content
+
+        # 변경 없는 재동기화는 임베딩 호출 없음
+        service.embedding.embedded_texts.clear()
+        service.sync_collection('medications', store)
+        assert service.embedding.embedded_texts == []
+
+    def test_dedup_streams_before_last_file_is_parsed(self, service):
+        """준중복 통합을 켜도 전체 파싱을 기다리지 않고 첫 배치를 임베딩 (통합 대기는 window개 청크까지)"""
+        med_dir = service.documents_path / "med"
+        med_dir.mkdir()
+        for file_no in range(3):
+            items = [
+                {"id": f"med_{file_no}_{i}", "text": "제품명: " + hashlib.md5(f"{file_no}-{i}".encode()).hexdigest() * 3,
+                 "metadata": {"product_name": f"제품 {file_no}-{i}"}}
+                for i in range(60)
+            ]
+            (med_dir / f"{file_no}.json").write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+
+        embedded = threading.Event()
+        embed_documents = service.embedding.embed_documents
+        parse_file = service.parse_file
+        waited_for_embedding = []
+
+        def embed(texts):
+            embedded.set()
+            return embed_documents(texts)
+
+        def parse(collection_type, path, rel_path):
+            if path.name == "2.json":
+                waited_for_embedding.append(embedded.wait(5))
+            return parse_file(collection_type, path, rel_path)
+
+        with patch('app.services.dailycare.vectorstore_service.Config.MEDICATION_DEDUP_WINDOW', 4), \
+                patch.object(service.embedding, 'embed_documents', side_effect=embed), \
+                patch.object(service, 'parse_file', side_effect=parse):
+            store = service.sync_collection('medications')
+
+        assert waited_for_embedding == [True]
+        assert store.count() == 180
+
+    def test_product_name_lookup_fetches_chunks_by_id(self, service):
+        """질문 속 제품명은 임베딩 없이 해당 청크를 바로 조회하고, 재색인 결과를 반영"""
+        items = [
+            {"id": "med_a", "text": "제품명: 캣케어 정\n효능효과: 고양이 회충 구제", "metadata": {"product_name": "캣케어 정", "species": "고양이"}},
+            {"id": "med_b", "text": "제품명: 헤파겐\n효능효과: 간 기능 개선", "metadata": {"product_name": "헤파겐"}},
+        ]
+        med_file = service.documents_path / "med" / "a.json"
+        med_file.parent.mkdir()
+        med_file.write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+        service.stores['medications'] = service.sync_collection('medications')
+
+        service.embedding.embedded_texts.clear()
+        docs = service.find_product_documents("캣케어 용량 알려줘")
+        assert [doc.metadata["document_id"] for doc in docs] == ["med_a"]
+        assert docs[0].metadata["matched_product"] == "캣케어"
+        assert service.embedding.embedded_texts == []
+        assert service.find_product_documents("강아지 산책") == []
+
+        med_file.write_text(json.dumps(items[1:], ensure_ascii=False), encoding="utf-8")
+        service.sync_collection('medications', service.stores['medications'])
+        assert service.find_product_documents("캣케어 용량 알려줘") == []
+        assert [doc.metadata["document_id"] for doc in service.find_product_documents("헤파겐은?")] == ["med_b"]
+
+        # 질문 분석에서 찾은 제품명을 그대로 넘겨 다시 찾지 않음
+        analysis = service.analyze_query("헤파겐 부작용", {"pet": {"species_name": "강아지"}})
+        assert analysis.product_names == ["헤파겐"] and analysis.collections[0] == 'medications'
+        docs = service.find_product_documents("", where=analysis.where, partitions=analysis.partitions, matches=analysis.product_matches)
+        assert [doc.metadata["document_id"] for doc in docs] == ["med_b"]
+
+
 if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
\ No newline at end of file
+    pytest.main([__file__, "-v"])